@@ -6,7 +6,23 @@ from pathlib import Path
 # Storage
 DATA_DIR = Path(os.environ.get("TASK_DATA_DIR", "."))
 TASKS_FILE = DATA_DIR / "tasks.json"
-MAX_TASKS = 1000
+BINARY_TASKS_FILE = DATA_DIR / "tasks.bin"
+
+# Snapshot backend: "json" (tasks.json) or "binary" (columnar tasks.bin)
+STORAGE_BACKEND = os.environ.get("TASK_STORAGE", "json")
+MAX_TASKS = int(os.environ.get("TASK_MAX_TASKS", "1000"))
+
+# Journaled storage: mutations are appended to <tasks file>.journal and
+# folded into the snapshot once COMPACT_THRESHOLD records have accumulated.
+JOURNAL_ENABLED = os.environ.get("TASK_JOURNAL", "false").lower() == "true"
+JOURNAL_SUFFIX = ".journal"
+COMPACT_THRESHOLD = int(os.environ.get("TASK_COMPACT_THRESHOLD", "500"))
+
+# `task-tracker serve` listens here; other calls use it when it is running
+SOCKET_PATH = Path(os.environ.get("TASK_SOCKET", DATA_DIR / "task-tracker.sock"))
+
+# Lazy loading: keep snapshot records raw until a command actually needs them
+LAZY_LOAD = os.environ.get("TASK_LAZY_LOAD", "false").lower() == "true"
 
 # Priority levels (lower number = higher priority)
 PRIORITY_MAP = {
@@ -0,0 +1,128 @@
+"""`task-tracker serve` — keep the store loaded and answer CLI calls over a socket.
+
+The protocol is one JSON line per connection. The client sends
+``{"argv": [...], "cwd": "..."}`` and the daemon replies with
+``{"stdout": "...", "stderr": "...", "code": 0}``. It runs the command
+exactly as the CLI would, against a TaskManager it keeps in memory.
+
+Requests are handled one at a time, and the store is refreshed before each
+one, so changes made by processes that bypass the daemon are picked up (see
+`TaskManager.refresh`). The client side only needs `socket` and `json`, so
+a call answered by the daemon never imports the store or the formatters.
+"""
+
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Optional
+
+CONNECT_TIMEOUT = 1.0
+# How long a command may run in the daemon before the client gives up
+REPLY_TIMEOUT = 60.0
+
+
+class DaemonError(RuntimeError):
+    """The daemon took a command but gave no usable answer."""
+
+
+def request(socket_path: Path, argv: list[str]) -> Optional[dict]:
+    """Run `argv` in the daemon; None if no daemon is listening.
+
+    None means the command was never delivered, so the caller can safely
+    run it itself. Once it has been sent it may have run, so a missing or
+    garbled reply raises DaemonError instead of running it a second time.
+    """
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+    with sock:
+        payload = {"argv": argv, "cwd": os.getcwd()}
+        try:
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            return None
+        try:
+            sock.settimeout(REPLY_TIMEOUT)
+            with sock.makefile("rb") as f:
+                response = json.loads(f.read())
+            return {"stdout": response["stdout"], "stderr": response["stderr"],
+                    "code": response["code"]}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise DaemonError(
+                f"No answer from the daemon on {socket_path} ({str(e) or type(e).__name__}); "
+                "the command may or may not have run"
+            ) from e
+
+
+def _connect(socket_path: Path) -> Optional[socket.socket]:
+    """A socket connected to the daemon, or None if none is listening."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def serve(socket_path: Path, parser, run_command):
+    """Serve requests on `socket_path` until interrupted.
+
+    `parser` and `run_command` are the CLI's own, so a command behaves the
+    same whether it is run directly or through the daemon.
+    """
+    import io
+    import signal
+    import socketserver
+    import traceback
+    from contextlib import redirect_stderr, redirect_stdout
+
+    from task_manager import TaskManager
+
+    running = _connect(socket_path)
+    if running is not None:
+        running.close()
+        raise RuntimeError(f"A task-tracker daemon is already listening on {socket_path}")
+    socket_path.unlink(missing_ok=True)  # left behind by a daemon that died
+
+    manager = TaskManager()
+
+    def execute(argv: list[str], cwd: str) -> dict:
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                args = parser.parse_args(argv)
+                # Paths on the command line are relative to the client
+                for name, value in vars(args).items():
+                    if isinstance(value, Path) and not value.is_absolute():
+                        setattr(args, name, Path(cwd) / value)
+                manager.refresh()
+                code = run_command(parser, args, manager)
+            except SystemExit as e:  # argparse errors and --help
+                code = e.code if isinstance(e.code, int) else 1
+            except Exception:
+                # Report to the client instead of dropping the connection
+                traceback.print_exc()
+                code = 1
+        return {"stdout": out.getvalue(), "stderr": err.getvalue(), "code": code}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            payload = json.loads(self.rfile.readline())
+            response = execute(payload["argv"], payload["cwd"])
+            self.wfile.write(json.dumps(response).encode("utf-8"))
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    server = socketserver.UnixStreamServer(str(socket_path), Handler)
+    print(f"🛰️  Serving {manager.stats()['total']} tasks on {socket_path} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
@@ -1,98 +1,127 @@
-"""Output formatters for task display."""
-
-from typing import Optional
-from config import COLORS
+"""Output formatters for task display.
 
+Each format has an ``iter_*`` generator that yields the output in pieces,
+so large listings can be written as they are produced (`write_tasks`).
+The ``format_*`` functions join those pieces into a single string.
+"""
 
-def format_table(tasks: list, show_color: bool = True) -> str:
-    """Format tasks as an aligned text table."""
-    if not tasks:
-        return "No tasks found."
+import sys
+from typing import Iterator, TextIO
 
-    headers = ["ID", "Status", "Priority", "Title", "Due Date", "Tags"]
-    rows = []
+from config import COLORS
 
-    for t in tasks:
-        status_icon = {"pending": "○", "in_progress": "◑", "done": "●"}.get(t.status, "?")
-        overdue_mark = " ⚠️" if t.is_overdue else ""
-        tags_str = ", ".join(t.tags) if t.tags else ""
-
-        row = [
-            f"#{t.id}",
-            f"{status_icon} {t.status}",
-            t.priority,
-            t.title[:50] + ("…" if len(t.title) > 50 else ""),
-            (t.due_date or "-") + overdue_mark,
-            tags_str,
-        ]
+STATUS_ICONS = {"pending": "○", "in_progress": "◑", "done": "●"}
+TABLE_HEADERS = ["ID", "Status", "Priority", "Title", "Due Date", "Tags"]
+CSV_FIELDS = ["id", "status", "priority", "title", "due_date", "created_at", "completed_at", "tags"]
 
-        if show_color:
-            color = COLORS.get("done" if t.status == "done" else t.priority, "")
-            reset = COLORS["reset"]
-            row = [f"{color}{cell}{reset}" for cell in row]
+# Number of pieces buffered by write_tasks before each write to the stream
+WRITE_BATCH = 256
 
-        rows.append(row)
 
-    # Calculate column widths (strip ANSI for width calculation)
-    import re
-    ansi_re = re.compile(r"\033\[[0-9;]*m")
+def _table_cells(t) -> list[str]:
+    """Uncolored table cells for one task."""
+    overdue_mark = " ⚠️" if t.is_overdue else ""
+    return [
+        f"#{t.id}",
+        f"{STATUS_ICONS.get(t.status, '?')} {t.status}",
+        t.priority,
+        t.title[:50] + ("…" if len(t.title) > 50 else ""),
+        (t.due_date or "-") + overdue_mark,
+        ", ".join(t.tags) if t.tags else "",
+    ]
 
-    def visible_len(s):
-        return len(ansi_re.sub("", s))
 
-    widths = [len(h) for h in headers]
-    for row in rows:
-        for i, cell in enumerate(row):
-            widths[i] = max(widths[i], visible_len(cell))
+def iter_table(tasks: list, show_color: bool = True) -> Iterator[str]:
+    """Yield an aligned text table one line at a time.
 
-    def pad(s, width):
-        return s + " " * (width - visible_len(s))
+    Column widths are measured on the raw cells in a first pass, so color
+    codes never have to be stripped back out and rows aren't kept around.
+    """
+    if not tasks:
+        yield "No tasks found."
+        return
 
-    # Build output
-    lines = []
-    header_line = " | ".join(pad(h, widths[i]) for i, h in enumerate(headers))
-    lines.append(header_line)
-    lines.append("-+-".join("-" * w for w in widths))
+    widths = [len(h) for h in TABLE_HEADERS]
+    for t in tasks:
+        for i, cell in enumerate(_table_cells(t)):
+            if len(cell) > widths[i]:
+                widths[i] = len(cell)
 
-    for row in rows:
-        lines.append(" | ".join(pad(cell, widths[i]) for i, cell in enumerate(row)))
+    yield " | ".join(h.ljust(widths[i]) for i, h in enumerate(TABLE_HEADERS))
+    yield "\n" + "-+-".join("-" * w for w in widths)
 
-    return "\n".join(lines)
+    reset = COLORS["reset"]
+    for t in tasks:
+        cells = _table_cells(t)
+        if show_color:
+            color = COLORS.get("done" if t.status == "done" else t.priority, "")
+            line = " | ".join(
+                f"{color}{cell}{reset}" + " " * (widths[i] - len(cell))
+                for i, cell in enumerate(cells)
+            )
+        else:
+            line = " | ".join(cell.ljust(widths[i]) for i, cell in enumerate(cells))
+        yield "\n" + line
 
 
-def format_json(tasks: list) -> str:
-    """Format tasks as JSON."""
+def iter_json(tasks: list) -> Iterator[str]:
+    """Yield a JSON array one task object at a time."""
     import json
-    return json.dumps([t.to_dict() for t in tasks], indent=2)
 
+    if not tasks:
+        yield "[]"
+        return
 
-def format_csv(tasks: list) -> str:
-    """Format tasks as CSV."""
+    yield "["
+    sep = "\n  "
+    for t in tasks:
+        yield sep + json.dumps(t.to_dict(), indent=2).replace("\n", "\n  ")
+        sep = ",\n  "
+    yield "\n]"
+
+
+def iter_csv(tasks: list) -> Iterator[str]:
+    """Yield CSV output one row at a time."""
     import csv
     import io
 
-    output = io.StringIO()
     if not tasks:
-        return ""
+        return
 
-    fieldnames = ["id", "status", "priority", "title", "due_date", "created_at", "completed_at", "tags"]
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
     writer.writeheader()
 
     for t in tasks:
         d = t.to_dict()
         d["tags"] = ";".join(d.get("tags", []))
-        writer.writerow({k: d.get(k, "") for k in fieldnames})
+        writer.writerow({k: d.get(k, "") for k in CSV_FIELDS})
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+
 
-    return output.getvalue()
+def format_table(tasks: list, show_color: bool = True) -> str:
+    """Format tasks as an aligned text table."""
+    return "".join(iter_table(tasks, show_color=show_color))
 
 
-def format_tasks(tasks: list, fmt: str = "table", color: bool = True) -> str:
-    """Route to the appropriate formatter."""
+def format_json(tasks: list) -> str:
+    """Format tasks as JSON."""
+    return "".join(iter_json(tasks))
+
+
+def format_csv(tasks: list) -> str:
+    """Format tasks as CSV."""
+    return "".join(iter_csv(tasks))
+
+
+def iter_tasks(tasks: list, fmt: str = "table", color: bool = True) -> Iterator[str]:
+    """Route to the appropriate streaming formatter."""
     formatters = {
-        "table": lambda: format_table(tasks, show_color=color),
-        "json": lambda: format_json(tasks),
-        "csv": lambda: format_csv(tasks),
+        "table": lambda: iter_table(tasks, show_color=color),
+        "json": lambda: iter_json(tasks),
+        "csv": lambda: iter_csv(tasks),
     }
 
     formatter = formatters.get(fmt)
@@ -100,3 +129,22 @@ def format_tasks(tasks: list, fmt: str = "table", color: bool = True) -> str:
         raise ValueError(f"Unknown format: {fmt}. Supported: {list(formatters.keys())}")
 
     return formatter()
+
+
+def format_tasks(tasks: list, fmt: str = "table", color: bool = True) -> str:
+    """Format tasks into a single string."""
+    return "".join(iter_tasks(tasks, fmt=fmt, color=color))
+
+
+def write_tasks(tasks: list, fmt: str = "table", color: bool = True,
+                stream: TextIO = None):
+    """Write formatted tasks to a stream (stdout by default) as they are produced."""
+    stream = stream or sys.stdout
+    pending = []
+    for piece in iter_tasks(tasks, fmt=fmt, color=color):
+        pending.append(piece)
+        if len(pending) >= WRITE_BATCH:
+            stream.write("".join(pending))
+            pending.clear()
+    pending.append("\n")
+    stream.write("".join(pending))
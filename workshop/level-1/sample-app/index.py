@@ -0,0 +1,239 @@
+"""In-memory indexes over the task store."""
+
+from bisect import bisect_left, insort
+from collections.abc import Mapping
+from contextlib import contextmanager
+import re
+from datetime import date, datetime
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Union
+
+from config import DATE_FORMAT, PRIORITY_MAP
+from models import Task
+
+# Sort key used for tasks without a due date, so they come last.
+NO_DUE_DATE = "9999-12-31"
+
+# An index entry is either a materialized Task or the raw record it came from.
+Entry = Union[Task, Mapping]
+
+CANONICAL_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class TaskIndex:
+    """Tasks keyed by id, with status, priority and tag buckets.
+
+    Buckets are dicts keyed by task id, so they keep insertion order and
+    support O(1) add/remove. Filtered lookups start from the smallest
+    matching bucket and probe the others, so they scale with the size of
+    that bucket rather than the number of tasks.
+
+    Records added with `add_record()` are kept as raw mappings and only turned
+    into `Task` objects (validation, date parsing) the first time they are
+    looked up, so commands that touch a few tasks don't pay for all of them.
+
+    Open (not done) tasks are also kept in a queue sorted by
+    (due_date, priority rank, id), so the overdue count is a single bisect
+    and the next k tasks to work on are a slice of the queue. Single
+    writes keep it ordered with `insort`; `bulk()` appends and sorts once,
+    for loading whole snapshots.
+    """
+
+    def __init__(self):
+        self._by_id: dict[int, Entry] = {}
+        self._by_status: dict[str, dict[int, None]] = {}
+        self._by_priority: dict[str, dict[int, None]] = {}
+        self._by_tag: dict[str, dict[int, None]] = {}
+        self._queue: list[tuple[str, int, int]] = []
+        # The queue entry of each open task. A raw record's fields may not
+        # match the Task it becomes, so entries are removed by id.
+        self._queue_keys: dict[int, tuple[str, int, int]] = {}
+        self._bulk = False
+
+    @contextmanager
+    def bulk(self):
+        """Insert many tasks, sorting the open-task queue once at the end."""
+        self._bulk = True
+        try:
+            yield self
+        finally:
+            self._bulk = False
+            self._queue.sort()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Task]:
+        for task_id in list(self._by_id):
+            yield self.get(task_id)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._by_id
+
+    def get(self, task_id: int) -> Optional[Task]:
+        entry = self._by_id.get(task_id)
+        if entry is not None and not isinstance(entry, Task):
+            entry = self._by_id[task_id] = Task.from_dict(entry)
+        return entry
+
+    def add(self, task: Task):
+        """Insert a task into every index."""
+        self._insert(task.id, task, task.status, task.priority, task.due_date, task.tags)
+
+    def add_record(self, record: Mapping):
+        """Insert a raw snapshot record without materializing it."""
+        self._insert(
+            record["id"], record,
+            record.get("status", "pending"), record.get("priority", "medium"),
+            normalize_due_date(record.get("due_date")), record.get("tags") or [],
+        )
+
+    def remove(self, task_id: int) -> Optional[Task]:
+        """Drop a task from every index and return it (None if absent)."""
+        task = self.get(task_id)
+        if task is not None:
+            del self._by_id[task_id]
+            self._discard(self._by_status, task.status, task_id)
+            self._discard(self._by_priority, task.priority, task_id)
+            for tag in task.tags:
+                self._discard(self._by_tag, tag, task_id)
+            self._dequeue(task_id)
+        return task
+
+    def update_status(self, task: Task, old_status: str):
+        """Move a task to its new status bucket after it has changed."""
+        if old_status == task.status:
+            return
+        self._discard(self._by_status, old_status, task.id)
+        self._by_status.setdefault(task.status, {})[task.id] = None
+        if "done" in (old_status, task.status):
+            if task.status == "done":
+                self._dequeue(task.id)
+            else:
+                self._enqueue(task.due_date, task.priority_rank, task.id)
+
+    def select(self, status: Optional[str] = None,
+               priority: Optional[str] = None,
+               tags: Iterable[str] = (),
+               any_tags: Iterable[str] = (),
+               not_tags: Iterable[str] = ()) -> list[Task]:
+        """Return the tasks matching every filter.
+
+        `tags` must all be present, at least one of `any_tags` (if given),
+        and none of `not_tags`.
+        """
+        required = [b.get(k, {}) for b, k in ((self._by_status, status),
+                                              (self._by_priority, priority)) if k is not None]
+        required += [self._by_tag.get(tag, {}) for tag in tags]
+        excluded = [self._by_tag[tag] for tag in not_tags if tag in self._by_tag]
+        if any_tags:
+            union: dict[int, None] = {}
+            for tag in any_tags:
+                union.update(self._by_tag.get(tag, {}))
+            required.append(union)
+        if not required and not excluded:
+            return list(self)
+
+        required.sort(key=len)
+        ids, rest = (required[0], required[1:]) if required else (self._by_id, [])
+        return [self.get(tid) for tid in ids
+                if all(tid in b for b in rest) and not any(tid in b for b in excluded)]
+
+    def next(self, limit: int) -> list[Task]:
+        """The first `limit` open tasks by due date, then priority, then id."""
+        return [self.get(tid) for _, _, tid in islice(self._queue, limit)]
+
+    def records(self) -> Iterator[Mapping]:
+        """Yield every task as a field mapping, without materializing."""
+        for entry in self._by_id.values():
+            yield entry.to_dict() if isinstance(entry, Task) else entry
+
+    def count_by_status(self) -> dict[str, int]:
+        return {s: len(bucket) for s, bucket in self._by_status.items()}
+
+    def count_by_priority(self) -> dict[str, int]:
+        return {p: len(bucket) for p, bucket in self._by_priority.items()}
+
+    def count_by_tag(self) -> dict[str, int]:
+        return {t: len(bucket) for t, bucket in self._by_tag.items()}
+
+    def count_overdue(self) -> int:
+        """Count open tasks past their due date."""
+        today = date.today().strftime(DATE_FORMAT)
+        return bisect_left(self._queue, (today,))
+
+    def summary(self) -> dict:
+        """Aggregates persisted with the snapshot (see `stats_from_summary`)."""
+        open_due: dict[str, int] = {}
+        for due, _, _ in self._queue:
+            if due != NO_DUE_DATE:
+                open_due[due] = open_due.get(due, 0) + 1
+        return {
+            "total": len(self),
+            "by_status": self.count_by_status(),
+            "by_priority": self.count_by_priority(),
+            "open_due": open_due,
+        }
+
+    def max_id(self) -> int:
+        """Largest task id in the index (0 when empty)."""
+        return max(self._by_id, default=0)
+
+    def _insert(self, task_id: int, entry: Entry, status: str, priority: str,
+                due_date: Optional[str], tags: Iterable[str]):
+        self._by_id[task_id] = entry
+        self._by_status.setdefault(status, {})[task_id] = None
+        self._by_priority.setdefault(priority, {})[task_id] = None
+        for tag in tags:
+            self._by_tag.setdefault(tag, {})[task_id] = None
+        if status != "done":
+            self._enqueue(due_date, PRIORITY_MAP.get(priority, 0), task_id)
+
+    def _enqueue(self, due_date: Optional[str], rank: int, task_id: int):
+        entry = self._queue_keys[task_id] = (due_date or NO_DUE_DATE, rank, task_id)
+        if self._bulk:
+            self._queue.append(entry)
+        else:
+            insort(self._queue, entry)
+
+    def _dequeue(self, task_id: int):
+        entry = self._queue_keys.pop(task_id, None)
+        if entry is None:
+            return
+        i = bisect_left(self._queue, entry)
+        if i < len(self._queue) and self._queue[i] == entry:
+            del self._queue[i]
+
+    @staticmethod
+    def _discard(buckets: dict[str, dict[int, None]], key: str, task_id: int):
+        bucket = buckets.get(key)
+        if bucket is None:
+            return
+        bucket.pop(task_id, None)
+        if not bucket:
+            del buckets[key]
+
+
+def normalize_due_date(due_date: Optional[str]) -> Optional[str]:
+    """The form `Task` stores a due date in, e.g. "2030-1-5" → "2030-01-05"."""
+    if not due_date or CANONICAL_DATE.fullmatch(due_date):
+        return due_date
+    try:
+        return datetime.strptime(due_date, DATE_FORMAT).strftime(DATE_FORMAT)
+    except ValueError:
+        return due_date  # reported when the record is turned into a Task
+
+
+def stats_from_summary(summary: dict) -> dict:
+    """Build `TaskManager.stats()` output from a persisted summary.
+
+    Only the histogram of open due dates is walked, so this does not depend
+    on the number of tasks.
+    """
+    today = date.today().strftime(DATE_FORMAT)
+    return {
+        "total": summary["total"],
+        "by_status": dict(summary["by_status"]),
+        "by_priority": dict(summary["by_priority"]),
+        "overdue": sum(n for due, n in summary["open_due"].items() if due < today),
+    }
@@ -0,0 +1,92 @@
+"""Append-only write-ahead log for task mutations."""
+
+import json
+from pathlib import Path
+from typing import Iterator
+
+
+class Journal:
+    """Line-delimited JSON log of mutations applied on top of a snapshot.
+
+    Each mutation is appended as one compact record, so the cost of a write
+    does not depend on how many tasks are stored. The log is replayed after
+    the snapshot is loaded and truncated whenever a new snapshot is written.
+
+    ``offset`` is the byte position up to which this process has read or
+    written the log, so records appended by other processes can be replayed
+    incrementally with `replay(journal.offset)`.
+    """
+
+    def __init__(self, filepath: Path):
+        self._filepath = filepath
+        self._count = 0
+        self._torn = False
+        self.offset = 0
+
+    def __len__(self) -> int:
+        """Number of records written since the last compaction."""
+        return self._count
+
+    def size(self) -> int:
+        """Current size of the log file in bytes (0 if absent)."""
+        try:
+            return self._filepath.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def is_empty(self) -> bool:
+        """True when there is nothing to replay (checked without reading)."""
+        return self.size() == 0
+
+    def append(self, record: dict):
+        """Append a single mutation record to the log."""
+        self.append_many([record])
+
+    def append_many(self, records: list[dict]):
+        """Append several mutation records with a single write."""
+        if not records:
+            return
+        lines = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        if self._torn:
+            # Terminate a torn line left by a crash so it can't swallow ours
+            lines = "\n" + lines
+            self._torn = False
+        self._filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._filepath, "ab") as f:
+            f.write(lines.encode("utf-8"))
+            self.offset = f.tell()
+        self._count += len(records)
+
+    def replay(self, offset: int = 0) -> Iterator[dict]:
+        """Yield the records in the log from ``offset``, oldest first.
+
+        A torn final line (e.g. from a crash mid-write) is ignored.
+        """
+        if offset == 0:
+            self._count = 0
+        self.offset = offset
+        if not self._filepath.exists():
+            return
+        with open(self._filepath, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                self.offset += len(line)
+                self._torn = not line.endswith(b"\n")
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Warning: Skipping corrupt journal record in {self._filepath}")
+                    continue
+                self._count += 1
+                yield record
+
+    def truncate(self):
+        """Discard all records (called after a snapshot has been written)."""
+        if self._filepath.exists():
+            self._filepath.unlink()
+        self._count = 0
+        self._torn = False
+        self.offset = 0
@@ -0,0 +1,132 @@
+"""Incremental reader for the tasks.json snapshot.
+
+`json.load` has to hold the whole document (and every parsed record) in
+memory before the first task can be used. `SnapshotReader` instead walks
+the top-level object in fixed-size chunks and yields the entries of the
+`tasks` array one at a time as plain dicts.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Iterator
+
+CHUNK_SIZE = 64 * 1024
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class SnapshotReader:
+    """Stream the records of a snapshot file without loading it whole.
+
+    Top-level keys other than ``tasks`` are collected into ``header``. Keys
+    written before ``tasks`` (``version``, ``next_id``, ...) are available
+    after `read_header()`; keys after it only once `records()` is exhausted.
+    """
+
+    def __init__(self, filepath: Path, chunk_size: int = CHUNK_SIZE):
+        self._filepath = filepath
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self.header: dict = {}
+
+    def read_header(self) -> dict:
+        """Parse only the keys that precede the ``tasks`` array."""
+        with open(self._filepath, "r") as f:
+            self._start(f)
+            self._scan_to_tasks()
+        return self.header
+
+    def records(self) -> Iterator[dict]:
+        """Yield each task record in file order."""
+        with open(self._filepath, "r") as f:
+            self._start(f)
+            if not self._scan_to_tasks():
+                return
+            yield from self._array_items()
+            self._scan_to_tasks()
+
+    # ── Tokenizer ────────────────────────────────────────────────
+
+    def _start(self, f):
+        self._file = f
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.header = {}
+        if self._next_char() != "{":
+            raise json.JSONDecodeError("Expected '{'", self._buf, self._pos)
+        self._pos += 1
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False at end of file."""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _next_char(self) -> str:
+        """Skip whitespace and return the next character ('' at EOF)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str):
+        if self._next_char() != char:
+            raise json.JSONDecodeError(f"Expected {char!r}", self._buf, self._pos)
+        self._pos += 1
+
+    def _value(self):
+        """Decode the next JSON value, reading more input as needed."""
+        self._next_char()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number ending exactly at the buffer edge may be cut short.
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _scan_to_tasks(self) -> bool:
+        """Read top-level members into ``header`` until ``tasks`` or '}'.
+
+        Returns True when positioned at the start of the tasks array.
+        """
+        while True:
+            char = self._next_char()
+            if char == "}" or char == "":
+                return False
+            if char == ",":
+                self._pos += 1
+                continue
+            key = self._value()
+            self._expect(":")
+            if key == "tasks":
+                self._expect("[")
+                return True
+            self.header[key] = self._value()
+
+    def _array_items(self) -> Iterator[dict]:
+        while True:
+            char = self._next_char()
+            if char == "]":
+                self._pos += 1
+                return
+            if char == ",":
+                self._pos += 1
+                continue
+            if char == "":
+                raise json.JSONDecodeError("Unterminated tasks array", self._buf, self._pos)
+            yield self._value()
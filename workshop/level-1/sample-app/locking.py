@@ -0,0 +1,64 @@
+"""Advisory inter-process locking for the task store."""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, locking becomes a no-op
+    fcntl = None
+
+
+class FileLock:
+    """flock() on a sidecar ``.lock`` file.
+
+    Readers take the lock shared and writers exclusive, so a reader never
+    sees a snapshot and journal from two different points in time. Nested
+    acquisitions on the same object are free; asking for an exclusive lock
+    while only holding a shared one is an error (flock can't upgrade
+    atomically).
+    """
+
+    def __init__(self, filepath: Path):
+        self._filepath = filepath
+        self._fd = None
+        self._depth = 0
+        self._exclusive = False
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._acquire(exclusive=False):
+            yield
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._acquire(exclusive=True):
+            yield
+
+    @contextmanager
+    def _acquire(self, exclusive: bool) -> Iterator[None]:
+        if self._depth:
+            if exclusive and not self._exclusive:
+                raise RuntimeError("Cannot upgrade a shared task store lock")
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+
+        if fcntl is not None:
+            self._filepath.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self._filepath, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self._depth, self._exclusive = 1, exclusive
+        try:
+            yield
+        finally:
+            self._depth, self._exclusive = 0, False
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
-"""Task Tracker CLI — entry point and argument parsing."""
+"""Task Tracker CLI — entry point and argument parsing.
+
+Only argparse and config are imported up front; the store and formatters
+are imported once the subcommand is known, so `--help` and commands that
+never print a listing don't pay for them (see scripts/bench_startup.py).
+"""
 
 import argparse
+import os
 import sys
+from pathlib import Path
 
-from task_manager import TaskManager
-from formatter import format_tasks
-from config import PRIORITY_MAP, VALID_STATUSES, SUPPORTED_FORMATS
+from config import PRIORITY_MAP, SOCKET_PATH, VALID_STATUSES, SUPPORTED_FORMATS
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -18,7 +23,7 @@ def build_parser() -> argparse.ArgumentParser:
 
     # ── add ──────────────────────────────────────────────────────
     add_parser = subparsers.add_parser("add", help="Add a new task")
-    add_parser.add_argument("title", help="Task title")
+    add_parser.add_argument("title", nargs="?", help="Task title")
     add_parser.add_argument(
         "--priority", "-p",
         choices=list(PRIORITY_MAP.keys()),
@@ -29,6 +34,10 @@ def build_parser() -> argparse.ArgumentParser:
     add_parser.add_argument(
         "--tags", "-t", nargs="*", default=[], help="Tags for categorization"
     )
+    add_parser.add_argument(
+        "--from-file", type=Path, metavar="CSV",
+        help="Add every row of a CSV file (columns: title, priority, due_date, tags)",
+    )
 
     # ── list ─────────────────────────────────────────────────────
     list_parser = subparsers.add_parser("list", help="List tasks")
@@ -38,6 +47,18 @@ def build_parser() -> argparse.ArgumentParser:
     list_parser.add_argument(
         "--priority", "-p", choices=list(PRIORITY_MAP.keys()), help="Filter by priority"
     )
+    list_parser.add_argument(
+        "--tag", action="append", default=[], metavar="TAG",
+        help="Only tasks with this tag (repeat to require several)",
+    )
+    list_parser.add_argument(
+        "--any-tag", action="append", default=[], metavar="TAG",
+        help="Only tasks with at least one of these tags (repeatable)",
+    )
+    list_parser.add_argument(
+        "--not-tag", action="append", default=[], metavar="TAG",
+        help="Exclude tasks with this tag (repeatable)",
+    )
     list_parser.add_argument(
         "--sort", choices=["priority", "due_date", "created", "id"],
         default="priority", help="Sort order (default: priority)"
@@ -50,32 +71,92 @@ def build_parser() -> argparse.ArgumentParser:
         "--no-color", action="store_true", help="Disable colored output"
     )
 
+    # ── next ─────────────────────────────────────────────────────
+    next_parser = subparsers.add_parser(
+        "next", help="Show the open tasks to work on next (by due date, then priority)"
+    )
+    next_parser.add_argument(
+        "-n", "--limit", type=int, default=10, help="Number of tasks (default: 10)"
+    )
+    next_parser.add_argument(
+        "--format", "-f", choices=SUPPORTED_FORMATS,
+        default="table", help="Output format (default: table)"
+    )
+    next_parser.add_argument(
+        "--no-color", action="store_true", help="Disable colored output"
+    )
+
     # ── complete ─────────────────────────────────────────────────
-    complete_parser = subparsers.add_parser("complete", help="Mark a task as done")
-    complete_parser.add_argument("id", type=int, help="Task ID to complete")
+    complete_parser = subparsers.add_parser("complete", help="Mark tasks as done")
+    complete_parser.add_argument("ids", type=int, nargs="+", metavar="id",
+                                 help="Task ID(s) to complete")
 
     # ── delete ───────────────────────────────────────────────────
-    delete_parser = subparsers.add_parser("delete", help="Delete a task")
-    delete_parser.add_argument("id", type=int, help="Task ID to delete")
+    delete_parser = subparsers.add_parser("delete", help="Delete tasks")
+    delete_parser.add_argument("ids", type=int, nargs="*", metavar="id",
+                               help="Task ID(s) to delete")
+    delete_parser.add_argument(
+        "--status", "-s", choices=VALID_STATUSES, help="Delete all tasks with this status"
+    )
+    delete_parser.add_argument(
+        "--priority", "-p", choices=list(PRIORITY_MAP.keys()),
+        help="Delete all tasks with this priority",
+    )
 
     # ── stats ────────────────────────────────────────────────────
     subparsers.add_parser("stats", help="Show task statistics")
 
+    # ── import / export ──────────────────────────────────────────
+    import_parser = subparsers.add_parser(
+        "import", help="Load tasks from a tasks.json or .bin snapshot"
+    )
+    import_parser.add_argument("path", type=Path, help="Snapshot file to read")
+    import_parser.add_argument(
+        "--replace", action="store_true", help="Overwrite existing tasks"
+    )
+    export_parser = subparsers.add_parser(
+        "export", help="Write all tasks to a .json or .bin snapshot"
+    )
+    export_parser.add_argument("path", type=Path, help="Snapshot file to write")
+
+    # ── serve ────────────────────────────────────────────────────
+    subparsers.add_parser(
+        "serve", help="Keep the store loaded and answer other task-tracker calls over a socket"
+    )
+
+    # ── compact ──────────────────────────────────────────────────
+    subparsers.add_parser(
+        "compact", help="Fold the mutation journal into tasks.json (TASK_JOURNAL=true)"
+    )
+
     return parser
 
 
-def main():
-    parser = build_parser()
-    args = parser.parse_args()
+def read_csv_rows(path: Path) -> list[dict]:
+    """Read task rows for `add --from-file`; tags are ';'-separated."""
+    import csv
 
-    if not args.command:
-        parser.print_help()
-        sys.exit(1)
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["due_date"] = row.get("due_date") or row.get("due")
+        row["tags"] = [t for t in (row.get("tags") or "").split(";") if t]
+    return rows
 
-    manager = TaskManager()
 
+def run_command(parser: argparse.ArgumentParser, args: argparse.Namespace, manager) -> int:
+    """Execute one parsed subcommand against `manager` and return the exit code.
+
+    Output goes to sys.stdout/sys.stderr, so the daemon can capture it.
+    """
     try:
-        if args.command == "add":
+        if args.command == "add" and args.from_file:
+            tasks = manager.add_many(read_csv_rows(args.from_file))
+            print(f"✅ Created {len(tasks)} tasks from {args.from_file}")
+
+        elif args.command == "add":
+            if not args.title:
+                parser.error("add: a title or --from-file is required")
             task = manager.add(
                 title=args.title,
                 priority=args.priority,
@@ -89,17 +170,33 @@ def main():
                 status=args.status,
                 priority=args.priority,
                 sort_by=args.sort,
+                tags=args.tag,
+                any_tags=args.any_tag,
+                not_tags=args.not_tag,
             )
-            output = format_tasks(tasks, fmt=args.format, color=not args.no_color)
-            print(output)
+            from formatter import write_tasks
+            write_tasks(tasks, fmt=args.format, color=not args.no_color)
+
+        elif args.command == "next":
+            tasks = manager.next_tasks(args.limit)
+            from formatter import write_tasks
+            write_tasks(tasks, fmt=args.format, color=not args.no_color)
 
         elif args.command == "complete":
-            task = manager.complete(args.id)
-            print(f"✅ Completed: {task}")
+            for task in manager.complete_many(args.ids):
+                print(f"✅ Completed: {task}")
 
         elif args.command == "delete":
-            task = manager.delete(args.id)
-            print(f"🗑️  Deleted: {task}")
+            if args.ids and (args.status or args.priority):
+                parser.error("delete: give task IDs or filters, not both")
+            if args.ids:
+                tasks = manager.delete_many(args.ids)
+            elif args.status or args.priority:
+                tasks = manager.delete_where(status=args.status, priority=args.priority)
+            else:
+                parser.error("delete: a task ID or --status/--priority is required")
+            for task in tasks:
+                print(f"🗑️  Deleted: {task}")
 
         elif args.command == "stats":
             s = manager.stats()
@@ -108,8 +205,61 @@ def main():
             print(f"By status:   {s['by_status']}")
             print(f"By priority: {s['by_priority']}")
 
+        elif args.command == "import":
+            count = manager.import_snapshot(args.path, replace=args.replace)
+            print(f"📥 Imported {count} tasks from {args.path}")
+
+        elif args.command == "export":
+            count = manager.export_snapshot(args.path)
+            print(f"📤 Exported {count} tasks to {args.path}")
+
+        elif args.command == "compact":
+            manager.compact()
+            print("🗜️  Compacted journal into snapshot")
+
     except (ValueError, RuntimeError) as e:
         print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    try:
+        if args.command == "serve":
+            from daemon import serve
+            try:
+                serve(SOCKET_PATH, parser, run_command)
+            except RuntimeError as e:
+                print(f"❌ Error: {e}", file=sys.stderr)
+                sys.exit(1)
+            return
+
+        # Hand the command to a running daemon if there is one. Checking for
+        # the socket file first keeps the client's imports off the common path.
+        if SOCKET_PATH.exists():
+            from daemon import DaemonError, request
+            try:
+                response = request(SOCKET_PATH, sys.argv[1:])
+            except DaemonError as e:
+                print(f"❌ Error: {e}", file=sys.stderr)
+                sys.exit(1)
+            if response is not None:
+                sys.stdout.write(response["stdout"])
+                sys.stderr.write(response["stderr"])
+                sys.exit(response["code"])
+
+        from task_manager import TaskManager
+        sys.exit(run_command(parser, args, TaskManager()))
+    except BrokenPipeError:
+        # Output was piped into e.g. `head`; stop quietly instead of tracing.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
         sys.exit(1)
 
 
@@ -1,6 +1,6 @@
 """Data models and validation for tasks."""
 
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from datetime import datetime, date
 from typing import Optional
 import json
@@ -8,7 +8,7 @@ import json
 from config import PRIORITY_MAP, VALID_STATUSES, DATE_FORMAT, DATETIME_FORMAT
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     id: int
     title: str
@@ -18,6 +18,9 @@ class Task:
     created_at: str = field(default_factory=lambda: datetime.now().strftime(DATETIME_FORMAT))
     completed_at: Optional[str] = None
     tags: list[str] = field(default_factory=list)
+    # Derived once in __post_init__ so listing/stats don't re-parse per access
+    _due: Optional[date] = field(default=None, init=False, repr=False, compare=False)
+    _rank: int = field(default=99, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         """Validate fields after initialization."""
@@ -29,6 +32,7 @@ class Task:
             raise ValueError(f"Invalid status: {self.status}")
         if self.priority not in PRIORITY_MAP:
             raise ValueError(f"Invalid priority: {self.priority}")
+        self._rank = PRIORITY_MAP[self.priority]
         if self.due_date:
             self._validate_due_date()
 
@@ -37,32 +41,40 @@ class Task:
         try:
             parsed = datetime.strptime(self.due_date, DATE_FORMAT)
             self.due_date = parsed.strftime(DATE_FORMAT)
+            self._due = parsed.date()
         except ValueError:
             raise ValueError(f"Invalid date format: {self.due_date} (expected {DATE_FORMAT})")
 
     @property
     def is_overdue(self) -> bool:
         """Check if the task is past its due date."""
-        if not self.due_date or self.status == "done":
+        if self._due is None or self.status == "done":
             return False
-        due = datetime.strptime(self.due_date, DATE_FORMAT).date()
-        return date.today() > due
+        return date.today() > self._due
 
     @property
     def priority_rank(self) -> int:
         """Numeric priority for sorting (lower = more urgent)."""
-        return PRIORITY_MAP.get(self.priority, 99)
+        return self._rank
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
-        return asdict(self)
+        return {
+            "id": self.id,
+            "title": self.title,
+            "status": self.status,
+            "priority": self.priority,
+            "due_date": self.due_date,
+            "created_at": self.created_at,
+            "completed_at": self.completed_at,
+            "tags": list(self.tags),
+        }
 
     @classmethod
     def from_dict(cls, data: dict) -> "Task":
         """Create a Task from a dictionary."""
         # Handle legacy data that may not have all fields
-        known_fields = {f.name for f in cls.__dataclass_fields__.values()}
-        filtered = {k: v for k, v in data.items() if k in known_fields}
+        filtered = {k: v for k, v in data.items() if k in _TASK_FIELDS}
         return cls(**filtered)
 
     def complete(self):
@@ -78,6 +90,9 @@ class Task:
         return f"[{icon}] #{self.id} [{self.priority}] {self.title}{due}{overdue}"
 
 
+_TASK_FIELDS = frozenset(f.name for f in fields(Task) if f.init)
+
+
 class TaskEncoder(json.JSONEncoder):
     """Custom JSON encoder that handles Task objects."""
     def default(self, obj):
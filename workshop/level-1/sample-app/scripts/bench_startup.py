@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Startup benchmark — measures wall time and import cost per CLI command.
+
+Usage:
+    python scripts/bench_startup.py                # 20 runs per command
+    python scripts/bench_startup.py --runs 50 --tasks 1000
+    python scripts/bench_startup.py --imports 15   # show 15 slowest imports
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+MAIN = str(APP_DIR / "main.py")
+
+COMMANDS = [
+    ["--help"],
+    ["stats"],
+    ["list", "--no-color"],
+    ["list", "--format", "json"],
+]
+
+
+def time_command(argv: list[str], runs: int, env: dict) -> list[float]:
+    """Run argv `runs` times and return wall times in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def slowest_imports(argv: list[str], env: dict, limit: int) -> list[tuple[int, str]]:
+    """Parse `python -X importtime` output into (cumulative µs, module)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith(" " * 3):  # top-level imports only
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def seed_store(data_dir: Path, count: int, env: dict):
+    """Create a store with `count` tasks using a single batched add."""
+    if count <= 0:
+        return
+    csv_path = data_dir / "seed.csv"
+    with open(csv_path, "w") as f:
+        f.write("title,priority,due_date,tags\n")
+        for i in range(count):
+            f.write(f"Task {i},{['low', 'medium', 'high'][i % 3]},2030-01-{i % 28 + 1:02d},bench\n")
+    subprocess.run([sys.executable, MAIN, "add", "--from-file", str(csv_path)],
+                   env=env, stdout=subprocess.DEVNULL, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="Runs per command")
+    parser.add_argument("--tasks", type=int, default=100, help="Tasks in the store")
+    parser.add_argument("--imports", type=int, default=10, help="Slowest imports to show")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "TASK_DATA_DIR": tmp,
+               "TASK_MAX_TASKS": str(max(args.tasks, 1000))}
+        seed_store(Path(tmp), args.tasks, env)
+
+        print("=" * 72)
+        print(f"  Startup benchmark — {args.runs} runs, {args.tasks:,} tasks")
+        print("=" * 72)
+
+        baseline = time_command([sys.executable, "-c", "pass"], args.runs, env)
+        print(f"  {'python -c pass':32s}  min {min(baseline):7.1f} ms"
+              f"  median {statistics.median(baseline):7.1f} ms")
+
+        for command in COMMANDS:
+            timings = time_command([sys.executable, MAIN, *command], args.runs, env)
+            label = "task-tracker " + " ".join(command)
+            print(f"  {label:32s}  min {min(timings):7.1f} ms"
+                  f"  median {statistics.median(timings):7.1f} ms"
+                  f"  (+{statistics.median(timings) - statistics.median(baseline):.1f} ms)")
+
+        if args.imports:
+            print("\n  Slowest top-level imports for `stats` (cumulative):")
+            for micros, name in slowest_imports([MAIN, "stats"], env, args.imports):
+                print(f"    {micros / 1000:7.2f} ms  {name}")
+
+        print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
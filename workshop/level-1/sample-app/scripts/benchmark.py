@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Throughput benchmark — times TaskManager hot paths on synthetic stores.
+
+Usage:
+    python scripts/benchmark.py                          # 1k, 10k, 100k tasks
+    python scripts/benchmark.py --sizes 1000 1000000 --repeat 1
+    python scripts/benchmark.py --backend binary --journal --lazy
+    python scripts/benchmark.py --no-memory              # skip tracemalloc pass
+
+Read operations are timed as the best of --repeat runs, mutations once
+(without TASK_JOURNAL each one rewrites the whole snapshot). Every
+operation is then run again under tracemalloc to report its peak
+allocation. Throughput is tasks/s for operations that visit every task and
+ops/s for queries and mutations.
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+# TaskManager enforces TASK_MAX_TASKS on add; lift it before importing config.
+os.environ["TASK_MAX_TASKS"] = str(10 ** 9)
+
+from config import DATETIME_FORMAT, DATE_FORMAT, PRIORITY_MAP, VALID_STATUSES  # noqa: E402
+from formatter import write_tasks  # noqa: E402
+from index import TaskIndex  # noqa: E402
+from storage import create_storage  # noqa: E402
+from task_manager import TaskManager  # noqa: E402
+
+TAGS = ["work", "home", "urgent", "errand", "backend", "frontend", "ops",
+        "docs", "review", "meeting", "q1", "q2", "q3", "q4", "research"]
+SORTS = ["priority", "due_date", "created", "id"]
+FORMATS = ["table", "json", "csv"]
+
+
+def generate_store(path: Path, count: int, backend: str, seed: int = 0):
+    """Write a snapshot with `count` tasks of varied status, tags and dates."""
+    rng = random.Random(seed)
+    today = date.today()
+    start = today - timedelta(days=365)
+    priorities = list(PRIORITY_MAP)
+    index = TaskIndex()
+    for task_id in range(1, count + 1):
+        status = rng.choice(VALID_STATUSES)
+        created = start + timedelta(days=rng.randrange(365), seconds=rng.randrange(86400))
+        due = today + timedelta(days=rng.randrange(-60, 180)) if rng.random() < 0.7 else None
+        index.add_record({
+            "id": task_id,
+            "title": f"Synthetic task {task_id}",
+            "status": status,
+            "priority": rng.choice(priorities),
+            "due_date": due.strftime(DATE_FORMAT) if due else None,
+            "created_at": created.strftime(DATETIME_FORMAT),
+            "completed_at": created.strftime(DATETIME_FORMAT) if status == "done" else None,
+            "tags": rng.sample(TAGS, rng.randrange(4)),
+        })
+    header = {"version": 1, "next_id": count + 1, "stats": index.summary()}
+    create_storage(path, backend).write(header, index.records())
+
+
+def measure(fn, repeat: int, memory: bool) -> tuple[float, int]:
+    """Return (best wall time in seconds, peak traced bytes or 0)."""
+    best = min(_timed(fn) for _ in range(repeat))
+    peak = 0
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_size(count: int, args) -> list[tuple[str, float, str, int]]:
+    """Benchmark one store size; rows are (name, seconds, throughput, peak)."""
+    rows = []
+    suffix = ".bin" if args.backend == "binary" else ".json"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / f"tasks{suffix}"
+        generate_store(path, count, args.backend)
+
+        def manager() -> TaskManager:
+            return TaskManager(path, journal=args.journal, lazy=args.lazy, backend=args.backend)
+
+        def record(name: str, fn, items: int, unit: str = "tasks/s", repeat: int = args.repeat):
+            seconds, peak = measure(fn, repeat, not args.no_memory)
+            rate = items / seconds if seconds else 0.0
+            rows.append((name, seconds, f"{rate:>12,.0f} {unit:7s}", peak))
+
+        # Loading: construct a manager and force the index to be built.
+        record("load", lambda: len(manager().list_tasks(sort_by="id")), count)
+
+        tm = manager()
+        len(tm.list_tasks(sort_by="id"))
+        for sort_by in SORTS:
+            record(f"list --sort {sort_by}", lambda s=sort_by: tm.list_tasks(sort_by=s), count)
+        record("list --status pending",
+               lambda: tm.list_tasks(status="pending", sort_by="id"), count)
+        record("next -n 10", lambda: tm.next_tasks(10), 1, "ops/s")
+        record("stats", tm.stats, 1, "ops/s")
+
+        tasks = tm.list_tasks(sort_by="id")
+        for fmt in FORMATS:
+            record(f"format {fmt}",
+                   lambda f=fmt: write_tasks(tasks, fmt=f, color=False, stream=io.StringIO()),
+                   count)
+
+        # Mutations persist on every call, so time a fixed number of them.
+        ops = args.ops
+        record(f"add x{ops}",
+               lambda: [tm.add(f"Benchmark task {i}", priority="high") for i in range(ops)],
+               ops, "ops/s", repeat=1)
+        open_ids = iter([t.id for t in tm.list_tasks(status="pending", sort_by="id")])
+        record(f"complete x{ops}",
+               lambda: [tm.complete(next(open_ids)) for _ in range(ops)],
+               ops, "ops/s", repeat=1)
+    return rows
+
+
+def format_bytes(n: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000],
+                        help="Store sizes to generate (default: 1000 10000 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per operation")
+    parser.add_argument("--ops", type=int, default=10, help="Mutations per add/complete run")
+    parser.add_argument("--backend", choices=["json", "binary"], default="json")
+    parser.add_argument("--journal", action="store_true", help="Use journaled storage")
+    parser.add_argument("--lazy", action="store_true", help="Use lazy loading")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory pass")
+    args = parser.parse_args()
+
+    mode = ", ".join([args.backend] + [m for m in ("journal", "lazy") if getattr(args, m)])
+    print("=" * 72)
+    print(f"  TaskManager benchmark — {mode}, best of {args.repeat}")
+    print("=" * 72)
+    for count in args.sizes:
+        print(f"\n  {count:,} tasks")
+        print(f"  {'operation':24s} {'time':>11s} {'throughput':>20s} {'peak mem':>10s}")
+        for name, seconds, rate, peak in run_size(count, args):
+            mem = format_bytes(peak) if not args.no_memory else "-"
+            print(f"  {name:24s} {seconds * 1000:8.2f} ms {rate} {mem:>10s}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
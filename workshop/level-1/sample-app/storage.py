@@ -0,0 +1,300 @@
+"""Snapshot storage backends for the task store.
+
+Both backends expose the same small interface used by TaskManager:
+
+- ``records()`` yields one mapping per task (the fields of `Task.to_dict`)
+- ``header`` holds the remaining top-level values (``next_id``, ...)
+- ``read_header()`` returns those values without reading any records
+- ``write(header, records)`` atomically replaces the snapshot
+
+`JsonStorage` is the human-readable ``tasks.json`` format. `BinaryStorage`
+packs tasks into fixed-width columns plus a string table and reads them
+through ``mmap``, so opening a store costs the same regardless of its size
+and a field is only decoded when it is read.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from datetime import date, datetime
+from pathlib import Path
+from typing import IO, Callable, Iterable, Iterator
+
+from config import DATE_FORMAT, PRIORITY_MAP, VALID_STATUSES
+from loader import SnapshotReader
+
+BACKENDS = ["json", "binary"]
+
+
+class StorageFormatError(ValueError):
+    """Raised when a snapshot file is not in the expected format."""
+
+
+def create_storage(filepath: Path, backend: str = "json"):
+    """Factory for the configured snapshot backend."""
+    if backend == "json":
+        return JsonStorage(filepath)
+    elif backend == "binary":
+        return BinaryStorage(filepath)
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}. Supported: {BACKENDS}")
+
+
+def storage_for_path(filepath: Path):
+    """Pick a backend from the file extension (``.bin`` or JSON)."""
+    return create_storage(filepath, "binary" if filepath.suffix == ".bin" else "json")
+
+
+def write_atomic(filepath: Path, write: Callable[[IO], None], binary: bool = False):
+    """Write a file beside the target, fsync it and rename it into place.
+
+    Readers see either the old or the new snapshot, never a partial one,
+    and processes that still have the old file open or mapped keep a
+    consistent view of it.
+    """
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    tmp = filepath.with_name(f"{filepath.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb" if binary else "w") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filepath)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class JsonStorage:
+    """Pretty-printed ``tasks.json`` snapshot."""
+
+    def __init__(self, filepath: Path):
+        self._filepath = filepath
+        self._reader = SnapshotReader(filepath)
+
+    @property
+    def header(self) -> dict:
+        return self._reader.header
+
+    def exists(self) -> bool:
+        return self._filepath.exists()
+
+    def read_header(self) -> dict:
+        return self._reader.read_header()
+
+    def records(self) -> Iterator[dict]:
+        return self._reader.records()
+
+    def write(self, header: dict, records: Iterable[Mapping]):
+        # Header keys go first so SnapshotReader.read_header() can stop early
+        data = dict(header)
+        data["tasks"] = [r if isinstance(r, dict) else dict(r) for r in records]
+        write_atomic(self._filepath, lambda f: json.dump(data, f, indent=2))
+
+
+# ── Binary columnar format ───────────────────────────────────────
+#
+#   header   magic, format version, task count, next_id,
+#            metadata length, string count            (_HEADER)
+#   meta     UTF-8 JSON object with any other header values
+#   columns  (each padded to 8 bytes, little-endian)
+#            ids        uint32[count]
+#            status     uint8[count]    index into VALID_STATUSES
+#            priority   uint8[count]    index into PRIORITIES
+#            due        int32[count]    date ordinal, 0 = no due date
+#            title      uint32[count]   string ref
+#            created    uint32[count]   string ref
+#            completed  uint32[count]   string ref, NO_STRING = None
+#            tag_start  uint32[count+1] offsets into tag_refs
+#            tag_refs   uint32[n_tags]  string refs
+#            str_start  uint32[n_str+1] byte offsets into str_data
+#            str_data   UTF-8 bytes of every distinct string
+
+MAGIC = b"TTKB"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHxxIIII")
+NO_STRING = 0xFFFFFFFF
+PRIORITIES = list(PRIORITY_MAP)
+_NATIVE_LE = sys.byteorder == "little"
+
+
+def _pad(n: int) -> int:
+    return (-n) % 8
+
+
+class BinaryStorage:
+    """Packed columnar snapshot read through a memory map."""
+
+    def __init__(self, filepath: Path):
+        self._filepath = filepath
+        self._mm = None
+        self.header: dict = {}
+
+    def exists(self) -> bool:
+        return self._filepath.exists()
+
+    def read_header(self) -> dict:
+        self._open()
+        return self.header
+
+    def records(self) -> Iterator["_Row"]:
+        columns = self._open()
+        for i in range(len(columns.ids)):
+            yield _Row(columns, i)
+
+    # ── Reading ──────────────────────────────────────────────────
+
+    def _open(self) -> "_Columns":
+        with open(self._filepath, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise StorageFormatError(f"{self._filepath} is too small to be a task store")
+            # The map stays valid after the file is replaced by a new snapshot
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, next_id, meta_len, n_str = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise StorageFormatError(f"{self._filepath} is not a binary task store")
+        if version != FORMAT_VERSION:
+            raise StorageFormatError(f"Unsupported binary store version: {version}")
+
+        view = memoryview(self._mm)
+        offset = _HEADER.size
+        meta = json.loads(bytes(view[offset:offset + meta_len])) if meta_len else {}
+        offset += meta_len + _pad(meta_len)
+        self.header = {**meta, "next_id": next_id}
+
+        # Column views are cheap to create; nothing is read until indexed.
+
+        def column(code: str, n: int):
+            nonlocal offset
+            width = array(code).itemsize
+            start, offset = offset, offset + n * width
+            offset += _pad(offset)
+            if offset > size:
+                raise StorageFormatError(f"{self._filepath} is truncated")
+            if _NATIVE_LE:
+                return view[start:start + n * width].cast(code)
+            col = array(code, view[start:start + n * width])
+            col.byteswap()
+            return col
+
+        columns = _Columns()
+        columns.ids = column("I", count)
+        columns.status = column("B", count)
+        columns.priority = column("B", count)
+        columns.due = column("i", count)
+        columns.title = column("I", count)
+        columns.created = column("I", count)
+        columns.completed = column("I", count)
+        columns.tag_start = column("I", count + 1)
+        columns.tag_refs = column("I", columns.tag_start[count])
+        columns.str_start = column("I", n_str + 1)
+        columns.str_data = view[offset:offset + columns.str_start[n_str]]
+        return columns
+
+    # ── Writing ──────────────────────────────────────────────────
+
+    def write(self, header: dict, records: Iterable[Mapping]):
+        strings: dict[str, int] = {}
+
+        def ref(s) -> int:
+            if s is None:
+                return NO_STRING
+            if s not in strings:
+                strings[s] = len(strings)
+            return strings[s]
+
+        ids, status, priority, due = array("I"), array("B"), array("B"), array("i")
+        title, created, completed = array("I"), array("I"), array("I")
+        tag_start, tag_refs = array("I", [0]), array("I")
+
+        for r in records:
+            ids.append(r["id"])
+            status.append(VALID_STATUSES.index(r.get("status", "pending")))
+            priority.append(PRIORITIES.index(r.get("priority", "medium")))
+            due_date = r.get("due_date")
+            due.append(datetime.strptime(due_date, DATE_FORMAT).toordinal() if due_date else 0)
+            title.append(ref(r["title"]))
+            created.append(ref(r.get("created_at")))
+            completed.append(ref(r.get("completed_at")))
+            tag_refs.extend(ref(t) for t in r.get("tags") or [])
+            tag_start.append(len(tag_refs))
+
+        str_start, str_data = array("I", [0]), bytearray()
+        for s in strings:
+            str_data += s.encode("utf-8")
+            str_start.append(len(str_data))
+
+        meta = {k: v for k, v in header.items() if k != "next_id"}
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8") if meta else b""
+
+        parts = [
+            _HEADER.pack(MAGIC, FORMAT_VERSION, len(ids), header.get("next_id", 1),
+                         len(meta_bytes), len(strings)),
+            meta_bytes, b"\0" * _pad(len(meta_bytes)),
+        ]
+        for col in (ids, status, priority, due, title, created, completed,
+                    tag_start, tag_refs, str_start):
+            if not _NATIVE_LE:
+                col.byteswap()
+            data = col.tobytes()
+            parts += [data, b"\0" * _pad(len(data))]
+        parts.append(bytes(str_data))
+
+        # Never rewrite in place: other readers may have the old file mapped
+        write_atomic(self._filepath, lambda f: f.writelines(parts), binary=True)
+
+
+class _Columns:
+    """Column views over one mapped snapshot."""
+    __slots__ = ("ids", "status", "priority", "due", "title", "created",
+                 "completed", "tag_start", "tag_refs", "str_start", "str_data")
+
+    def string(self, ref: int):
+        if ref == NO_STRING:
+            return None
+        return bytes(self.str_data[self.str_start[ref]:self.str_start[ref + 1]]).decode("utf-8")
+
+
+_ROW_FIELDS = ("id", "title", "status", "priority", "due_date",
+               "created_at", "completed_at", "tags")
+
+
+class _Row(Mapping):
+    """Read-only view of one task; fields are decoded on access."""
+    __slots__ = ("_c", "_i")
+
+    def __init__(self, columns: _Columns, i: int):
+        self._c = columns
+        self._i = i
+
+    def __getitem__(self, key: str):
+        c, i = self._c, self._i
+        if key == "id":
+            return c.ids[i]
+        if key == "status":
+            return VALID_STATUSES[c.status[i]]
+        if key == "priority":
+            return PRIORITIES[c.priority[i]]
+        if key == "due_date":
+            return date.fromordinal(c.due[i]).strftime(DATE_FORMAT) if c.due[i] else None
+        if key == "title":
+            return c.string(c.title[i])
+        if key == "created_at":
+            return c.string(c.created[i])
+        if key == "completed_at":
+            return c.string(c.completed[i])
+        if key == "tags":
+            return [c.string(r) for r in c.tag_refs[c.tag_start[i]:c.tag_start[i + 1]]]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(_ROW_FIELDS)
+
+    def __len__(self) -> int:
+        return len(_ROW_FIELDS)
@@ -1,97 +1,293 @@
 """Core business logic for task CRUD operations."""
 
 import json
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
-from config import TASKS_FILE, MAX_TASKS, PRIORITY_MAP
-from models import Task, TaskEncoder
+from config import (
+    TASKS_FILE, BINARY_TASKS_FILE, STORAGE_BACKEND, MAX_TASKS, PRIORITY_MAP,
+    JOURNAL_ENABLED, JOURNAL_SUFFIX, COMPACT_THRESHOLD, LAZY_LOAD,
+)
+from models import Task
+from journal import Journal
+from index import NO_DUE_DATE, TaskIndex, stats_from_summary
+from locking import FileLock
+from storage import StorageFormatError, create_storage, storage_for_path
 
 
 class TaskManager:
-    """Manages task persistence and CRUD operations."""
+    """Manages task persistence and CRUD operations.
 
-    def __init__(self, filepath: Path = TASKS_FILE):
+    Several processes may share one store. Every mutation runs under an
+    exclusive file lock and first catches up with changes other processes
+    made since this one last looked (by replaying new journal records, or
+    reloading when the snapshot's revision has moved on), so concurrent
+    writers never overwrite each other's updates.
+    """
+
+    def __init__(self, filepath: Optional[Path] = None, journal: bool = JOURNAL_ENABLED,
+                 lazy: bool = LAZY_LOAD, backend: str = STORAGE_BACKEND):
+        if filepath is None:
+            filepath = BINARY_TASKS_FILE if backend == "binary" else TASKS_FILE
         self._filepath = filepath
-        self._tasks: list[Task] = []
+        self._storage = create_storage(filepath, backend)
+        self._lazy = lazy
+        self._index: Optional[TaskIndex] = None
+        self._summary: Optional[dict] = None
         self._next_id: int = 1
+        self._revision: int = 0
+        self._pending: Optional[list[dict]] = None
+        # The journal is always replayed if present; `journal` only controls
+        # whether new mutations are appended to it or rewrite the snapshot.
+        self._journal = Journal(filepath.with_name(filepath.name + JOURNAL_SUFFIX))
+        self._journaled = journal
+        self._lock = FileLock(filepath.with_name(filepath.name + ".lock"))
         self._load()
 
+    @property
+    def _tasks(self) -> TaskIndex:
+        """The task index, scanning the snapshot first if that was deferred."""
+        if self._index is None:
+            self._load_all()
+        return self._index
+
     def _load(self):
-        """Load tasks from the JSON file."""
-        if not self._filepath.exists():
-            self._tasks = []
+        """Load the store, deferring the record scan when possible.
+
+        In lazy mode with an empty journal, only the snapshot header is read;
+        its persisted summary answers stats() and the records are scanned on
+        first access to the index.
+        """
+        with self._lock.shared():
+            self._index = None
+            self._summary = None
             self._next_id = 1
-            return
+            if self._lazy and self._storage.exists() and self._journal.is_empty():
+                header = self._read_header()
+                if "stats" in header:
+                    self._summary = header["stats"]
+                    self._next_id = header.get("next_id", 1)
+                    self._revision = header.get("revision", 0)
+                    self._journal.offset = 0
+                    return
+            self._load_all()
+
+    def _load_all(self):
+        """Load the snapshot and replay the journal on top of it."""
+        with self._lock.shared():
+            self._index = TaskIndex()
+            self._summary = None
+            self._next_id = 1
+            self._revision = 0
+            if self._storage.exists():
+                self._load_snapshot()
 
+            for record in self._journal.replay():
+                self._apply(record)
+
+    def _read_header(self) -> dict:
+        """Snapshot header values, or {} if there is no readable snapshot."""
         try:
-            with open(self._filepath, "r") as f:
-                data = json.load(f)
+            return self._storage.read_header()
+        except (OSError, json.JSONDecodeError, StorageFormatError):
+            return {}
+
+    def refresh(self):
+        """Pick up changes other processes made since the store was loaded."""
+        with self._lock.shared():
+            self._refresh()
 
-            self._tasks = [Task.from_dict(t) for t in data.get("tasks", [])]
-            self._next_id = data.get("next_id", 1)
+    def _refresh(self):
+        """Catch up with writes made by other processes (call under the lock).
+
+        If the snapshot is unchanged only journal records appended since our
+        last read are replayed; a new snapshot revision means a full reload.
+        """
+        if self._read_header().get("revision", 0) != self._revision:
+            self._load()
+            return
+        size = self._journal.size()
+        if size == self._journal.offset:
+            return
+        if size < self._journal.offset or self._index is None:
+            self._load()
+            return
+        for record in self._journal.replay(self._journal.offset):
+            self._apply(record)
+
+    def _load_snapshot(self):
+        """Stream the snapshot into the index.
+
+        In lazy mode records stay raw until first accessed; otherwise each
+        one is validated into a Task as it is read.
+        """
+        try:
+            with self._tasks.bulk():
+                for record in self._storage.records():
+                    if self._lazy:
+                        self._tasks.add_record(record)
+                    else:
+                        self._tasks.add(Task.from_dict(record))
+            self._next_id = self._storage.header.get("next_id", 1)
+            self._revision = self._storage.header.get("revision", 0)
 
             # Reconcile next_id with actual max
-            if self._tasks:
-                max_id = max(t.id for t in self._tasks)
-                if self._next_id <= max_id:
-                    self._next_id = max_id + 1
-        except (json.JSONDecodeError, KeyError) as e:
+            max_id = self._tasks.max_id()
+            if self._next_id <= max_id:
+                self._next_id = max_id + 1
+        except (json.JSONDecodeError, KeyError, StorageFormatError) as e:
             print(f"Warning: Could not parse {self._filepath}: {e}")
-            self._tasks = []
+            self._index = TaskIndex()
             self._next_id = 1
 
+    def _apply(self, record: dict):
+        """Replay a journal record. Replaying a record twice is harmless."""
+        op = record.get("op")
+        if op == "add":
+            task = Task.from_dict(record["task"])
+            if task.id not in self._tasks:
+                self._tasks.add(task)
+            self._next_id = max(self._next_id, task.id + 1)
+        elif op == "complete":
+            task = self.get(record["id"])
+            if task:
+                old_status = task.status
+                task.status = "done"
+                task.completed_at = record.get("completed_at")
+                self._tasks.update_status(task, old_status)
+        elif op == "delete":
+            self._tasks.remove(record["id"])
+
+    def _commit(self, record: dict):
+        """Persist a single mutation, via the journal when enabled."""
+        if self._pending is not None:
+            self._pending.append(record)
+            return
+        self._flush([record])
+
+    def _flush(self, records: list[dict]):
+        if not records:
+            return
+        if not self._journaled:
+            self._compact()
+            return
+        self._journal.append_many(records)
+        if len(self._journal) >= COMPACT_THRESHOLD:
+            self._compact()
+
+    @contextmanager
+    def batch(self) -> Iterator["TaskManager"]:
+        """Group mutations so they are persisted with a single write.
+
+        The store is locked for the whole block and refreshed first, so the
+        mutations apply to the latest state. If the block raises, the
+        in-memory changes are discarded by reloading the store, so a batch
+        is applied entirely or not at all.
+        """
+        if self._pending is not None:
+            yield self
+            return
+        with self._lock.exclusive():
+            self._refresh()
+            self._pending = []
+            try:
+                yield self
+            except BaseException:
+                self._pending = None
+                self._load()
+                raise
+            records, self._pending = self._pending, None
+            self._flush(records)
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot."""
+        with self.batch():
+            self._compact()
+
+    def _compact(self):
+        self._save()
+        self._journal.truncate()
+
     def _save(self):
-        """Persist tasks to the JSON file."""
-        data = {
+        """Write a full snapshot through the storage backend."""
+        self._revision += 1
+        self._storage.write(self._header(), self._tasks.records())
+
+    def _header(self) -> dict:
+        return {
             "version": 1,
+            "revision": self._revision,
             "next_id": self._next_id,
-            "tasks": [t.to_dict() for t in self._tasks],
+            "stats": self._tasks.summary(),
         }
-        self._filepath.parent.mkdir(parents=True, exist_ok=True)
-        with open(self._filepath, "w") as f:
-            json.dump(data, f, indent=2, cls=TaskEncoder)
+
+    def import_snapshot(self, path: Path, replace: bool = False) -> int:
+        """Load every task from a .json or .bin snapshot into this store."""
+        source = storage_for_path(path)
+        if not source.exists():
+            raise ValueError(f"File not found: {path}")
+        with self.batch():
+            if len(self._tasks) and not replace:
+                raise ValueError(
+                    f"Store already has {len(self._tasks)} tasks (use --replace to overwrite)"
+                )
+            self._index = TaskIndex()
+            with self._tasks.bulk():
+                for record in source.records():
+                    self._tasks.add(Task.from_dict(record))
+            self._next_id = max(source.header.get("next_id", 1), self._tasks.max_id() + 1)
+            self._compact()
+        return len(self._tasks)
+
+    def export_snapshot(self, path: Path) -> int:
+        """Write every task to a .json or .bin snapshot."""
+        storage_for_path(path).write(self._header(), self._tasks.records())
+        return len(self._tasks)
 
     def add(self, title: str, priority: str = "medium",
             due_date: Optional[str] = None, tags: Optional[list[str]] = None) -> Task:
         """Create and persist a new task."""
-        if len(self._tasks) >= MAX_TASKS:
-            raise RuntimeError(f"Task limit reached ({MAX_TASKS})")
-
-        task = Task(
-            id=self._next_id,
-            title=title.strip(),
-            priority=priority,
-            due_date=due_date,
-            tags=tags or [],
-        )
-        self._tasks.append(task)
-        self._next_id += 1
-        self._save()
+        with self.batch():
+            if len(self._tasks) >= MAX_TASKS:
+                raise RuntimeError(f"Task limit reached ({MAX_TASKS})")
+
+            task = Task(
+                id=self._next_id,
+                title=title.strip(),
+                priority=priority,
+                due_date=due_date,
+                tags=tags or [],
+            )
+            self._tasks.add(task)
+            self._next_id += 1
+            self._commit({"op": "add", "task": task.to_dict()})
         return task
 
     def get(self, task_id: int) -> Optional[Task]:
         """Get a task by ID."""
-        for task in self._tasks:
-            if task.id == task_id:
-                return task
-        return None
+        return self._tasks.get(task_id)
 
     def list_tasks(self, status: Optional[str] = None,
                    priority: Optional[str] = None,
-                   sort_by: str = "priority") -> list[Task]:
-        """List tasks with optional filtering and sorting."""
-        result = self._tasks[:]
+                   sort_by: str = "priority",
+                   tags: Optional[list[str]] = None,
+                   any_tags: Optional[list[str]] = None,
+                   not_tags: Optional[list[str]] = None) -> list[Task]:
+        """List tasks with optional filtering and sorting.
 
-        if status:
-            result = [t for t in result if t.status == status]
-        if priority:
-            result = [t for t in result if t.priority == priority]
+        Tasks must carry every tag in `tags`, at least one of `any_tags`
+        and none of `not_tags`.
+        """
+        result = self._tasks.select(
+            status=status or None, priority=priority or None,
+            tags=tags or (), any_tags=any_tags or (), not_tags=not_tags or (),
+        )
 
         if sort_by == "priority":
             result.sort(key=lambda t: (t.priority_rank, t.id))
         elif sort_by == "due_date":
-            result.sort(key=lambda t: (t.due_date or "9999-12-31", t.id))
+            result.sort(key=lambda t: (t.due_date or NO_DUE_DATE, t.id))
         elif sort_by == "created":
             result.sort(key=lambda t: t.created_at)
         elif sort_by == "id":
@@ -99,42 +295,93 @@ class TaskManager:
 
         return result
 
+    def next_tasks(self, limit: int = 10) -> list[Task]:
+        """Open tasks to work on next, by due date, then priority, then id."""
+        if limit < 1:
+            raise ValueError("Limit must be at least 1")
+        return self._tasks.next(limit)
+
     def complete(self, task_id: int) -> Task:
         """Mark a task as done."""
-        task = self.get(task_id)
-        if not task:
-            raise ValueError(f"Task #{task_id} not found")
-        if task.status == "done":
-            raise ValueError(f"Task #{task_id} is already completed")
-        task.complete()
-        self._save()
+        with self.batch():
+            task = self.get(task_id)
+            if not task:
+                raise ValueError(f"Task #{task_id} not found")
+            if task.status == "done":
+                raise ValueError(f"Task #{task_id} is already completed")
+            old_status = task.status
+            task.complete()
+            self._tasks.update_status(task, old_status)
+            self._commit({"op": "complete", "id": task.id, "completed_at": task.completed_at})
         return task
 
     def delete(self, task_id: int) -> Task:
         """Remove a task permanently."""
-        task = self.get(task_id)
-        if not task:
-            raise ValueError(f"Task #{task_id} not found")
-        self._tasks = [t for t in self._tasks if t.id != task_id]
-        self._save()
+        with self.batch():
+            task = self.get(task_id)
+            if not task:
+                raise ValueError(f"Task #{task_id} not found")
+            self._tasks.remove(task_id)
+            self._commit({"op": "delete", "id": task_id})
         return task
 
+    def add_many(self, rows: Iterable[dict]) -> list[Task]:
+        """Create tasks from dicts with title/priority/due_date/tags keys."""
+        added = []
+        with self.batch():
+            for n, row in enumerate(rows, start=1):
+                try:
+                    added.append(self.add(
+                        title=row.get("title") or "",
+                        priority=row.get("priority") or "medium",
+                        due_date=row.get("due_date") or None,
+                        tags=row.get("tags") or [],
+                    ))
+                except ValueError as e:
+                    raise ValueError(f"Row {n}: {e}") from e
+        return added
+
+    def complete_many(self, task_ids: Iterable[int]) -> list[Task]:
+        """Mark several tasks as done; nothing changes if any id is invalid."""
+        task_ids = list(dict.fromkeys(task_ids))
+        with self.batch():
+            for task_id in task_ids:
+                task = self.get(task_id)
+                if not task:
+                    raise ValueError(f"Task #{task_id} not found")
+                if task.status == "done":
+                    raise ValueError(f"Task #{task_id} is already completed")
+            return [self.complete(task_id) for task_id in task_ids]
+
+    def delete_many(self, task_ids: Iterable[int]) -> list[Task]:
+        """Delete several tasks; nothing changes if any id is missing."""
+        task_ids = list(dict.fromkeys(task_ids))
+        with self.batch():
+            for task_id in task_ids:
+                if task_id not in self._tasks:
+                    raise ValueError(f"Task #{task_id} not found")
+            return [self.delete(task_id) for task_id in task_ids]
+
+    def delete_where(self, status: Optional[str] = None,
+                     priority: Optional[str] = None) -> list[Task]:
+        """Delete every task matching the filters (at least one is required)."""
+        if not status and not priority:
+            raise ValueError("Bulk delete needs --status and/or --priority")
+        with self.batch():
+            matches = self._tasks.select(status=status or None, priority=priority or None)
+            return self.delete_many(t.id for t in matches)
+
     def stats(self) -> dict:
-        """Return summary statistics."""
-        total = len(self._tasks)
-        by_status = {}
-        by_priority = {}
-        overdue = 0
-
-        for t in self._tasks:
-            by_status[t.status] = by_status.get(t.status, 0) + 1
-            by_priority[t.priority] = by_priority.get(t.priority, 0) + 1
-            if t.is_overdue:
-                overdue += 1
+        """Return summary statistics.
 
+        Served from the snapshot's persisted summary when the records have
+        not been scanned, otherwise from the live index; neither walks tasks.
+        """
+        if self._index is None and self._summary is not None:
+            return stats_from_summary(self._summary)
         return {
-            "total": total,
-            "by_status": by_status,
-            "by_priority": by_priority,
-            "overdue": overdue,
+            "total": len(self._tasks),
+            "by_status": self._tasks.count_by_status(),
+            "by_priority": self._tasks.count_by_priority(),
+            "overdue": self._tasks.count_overdue(),
         }
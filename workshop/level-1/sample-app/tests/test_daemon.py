@@ -0,0 +1,161 @@
+"""The `serve` daemon and the CLI's fallback when it isn't running."""
+
+import json
+import socket
+import subprocess
+import threading
+import time
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import daemon
+from task_manager import TaskManager
+
+MAIN = os.path.join(os.path.dirname(__file__), "..", "main.py")
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+@pytest.fixture
+def env(tmp_path):
+    return {**os.environ, "TASK_DATA_DIR": str(tmp_path),
+            "TASK_SOCKET": str(tmp_path / "task-tracker.sock")}
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return tmp_path / "task-tracker.sock"
+
+
+def run_cli(env, *argv) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, MAIN, *argv], env=env,
+                          capture_output=True, text=True, timeout=30)
+
+
+def make_stale_socket(path):
+    """A socket file nobody listens on, as left behind by a killed daemon."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(str(path))
+    sock.close()
+
+
+@pytest.fixture
+def served(env, socket_path):
+    proc = subprocess.Popen([sys.executable, MAIN, "serve"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 10
+    while daemon.request(socket_path, ["stats"]) is None:
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill()
+            pytest.fail(f"daemon did not start: {proc.stderr.read().decode()}")
+        time.sleep(0.05)
+    yield proc
+    proc.terminate()
+    proc.wait(timeout=10)
+
+
+class TestDaemon:
+    def test_daemon_answers_request(self, served, socket_path):
+        response = daemon.request(socket_path, ["add", "From the daemon"])
+        assert response["code"] == 0
+        assert "From the daemon" in response["stdout"]
+
+        response = daemon.request(socket_path, ["list", "--format", "json", "--no-color"])
+        assert [t["title"] for t in json.loads(response["stdout"])] == ["From the daemon"]
+
+    def test_cli_goes_through_daemon(self, served, env, tmp_path):
+        assert run_cli(env, "add", "Via CLI").returncode == 0
+        # The daemon persisted it, and its in-memory store has it too
+        assert "Via CLI" in (tmp_path / "tasks.json").read_text()
+        response = daemon.request(tmp_path / "task-tracker.sock", ["stats"])
+        assert "Total tasks: 1" in response["stdout"]
+
+    def test_errors_are_reported_to_client(self, served, socket_path):
+        response = daemon.request(socket_path, ["complete", "999"])
+        assert response["code"] == 1
+        assert "not found" in response["stderr"].lower()
+
+    def test_daemon_picks_up_direct_writes(self, served, socket_path, tmp_path):
+        TaskManager(tmp_path / "tasks.json").add("Written directly")
+        response = daemon.request(socket_path, ["list", "--format", "json"])
+        assert [t["title"] for t in json.loads(response["stdout"])] == ["Written directly"]
+
+    def test_socket_removed_on_exit(self, served, socket_path):
+        served.terminate()
+        served.wait(timeout=10)
+        assert not socket_path.exists()
+
+
+class TestBrokenDaemon:
+    @pytest.fixture
+    def listener(self, socket_path):
+        """Accepts connections on the socket and hands them to the test."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(str(socket_path))
+        sock.listen()
+        yield sock
+        sock.close()
+
+    def serve_once(self, listener, reply: bytes):
+        def run():
+            conn, _ = listener.accept()
+            with conn:
+                conn.recv(65536)
+                conn.sendall(reply)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    @pytest.mark.parametrize("reply", [b"", b"not json", b'{"unexpected": 1}'])
+    def test_bad_reply_raises(self, listener, socket_path, reply):
+        self.serve_once(listener, reply)
+        with pytest.raises(daemon.DaemonError, match="may or may not have run"):
+            daemon.request(socket_path, ["stats"])
+
+    def test_hung_daemon_times_out(self, listener, socket_path, monkeypatch):
+        monkeypatch.setattr(daemon, "REPLY_TIMEOUT", 0.2)
+        started = time.monotonic()
+        with pytest.raises(daemon.DaemonError):
+            daemon.request(socket_path, ["stats"])  # accepted by the backlog, never read
+        assert time.monotonic() - started < 5
+
+    def test_cli_reports_instead_of_crashing(self, listener, env):
+        self.serve_once(listener, b"")
+        result = run_cli(env, "add", "Maybe")
+        assert result.returncode == 1
+        assert "No answer from the daemon" in result.stderr
+        assert "Traceback" not in result.stderr
+
+
+class TestStaleSocket:
+    def test_request_returns_none(self, socket_path):
+        make_stale_socket(socket_path)
+        assert daemon.request(socket_path, ["stats"]) is None
+
+    def test_cli_falls_back_to_the_store(self, env, socket_path, tmp_path):
+        make_stale_socket(socket_path)
+        result = run_cli(env, "add", "No daemon")
+        assert result.returncode == 0, result.stderr
+        assert "No daemon" in (tmp_path / "tasks.json").read_text()
+
+    def test_cli_works_without_socket_file(self, env, tmp_path):
+        assert run_cli(env, "add", "No socket").returncode == 0
+        assert "No socket" in (tmp_path / "tasks.json").read_text()
+
+    def test_serve_replaces_stale_socket(self, env, socket_path):
+        make_stale_socket(socket_path)
+        proc = subprocess.Popen([sys.executable, MAIN, "serve"], env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 10
+            while (response := daemon.request(socket_path, ["stats"])) is None:
+                assert proc.poll() is None and time.monotonic() < deadline
+                time.sleep(0.05)
+            assert response["code"] == 0
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
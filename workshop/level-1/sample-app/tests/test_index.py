@@ -0,0 +1,57 @@
+"""Unit tests for the task indexes and the open-task queue."""
+
+import json
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from index import TaskIndex, normalize_due_date
+from models import Task
+from task_manager import TaskManager
+
+
+def record(task_id: int, **fields) -> dict:
+    return {"id": task_id, "title": f"Task {task_id}", "status": "pending",
+            "priority": "medium", "due_date": None, "tags": [], **fields}
+
+
+class TestRawRecords:
+    def test_due_dates_are_normalized(self):
+        assert normalize_due_date("2030-1-5") == "2030-01-05"
+        assert normalize_due_date("2030-01-05") == "2030-01-05"
+        assert normalize_due_date(None) is None
+
+    def test_completing_a_raw_record_leaves_the_queue(self):
+        index = TaskIndex()
+        index.add_record(record(1, due_date="2030-1-5"))
+        index.add_record(record(2, due_date="2030-02-01"))
+        task = index.get(1)
+        task.status = "done"
+        index.update_status(task, "pending")
+        assert [t.id for t in index.next(10)] == [2]
+
+    def test_raw_and_materialized_tasks_sort_alike(self):
+        index = TaskIndex()
+        index.add_record(record(1, due_date="2030-1-15"))
+        index.add(Task(id=2, title="Two", due_date="2030-01-05"))
+        assert [t.id for t in index.next(10)] == [2, 1]
+        assert index.summary()["open_due"] == {"2030-01-05": 1, "2030-01-15": 1}
+
+    def test_removing_a_raw_record_leaves_the_queue(self):
+        index = TaskIndex()
+        index.add_record(record(1, due_date="2030-1-5"))
+        index.remove(1)
+        assert index.next(10) == []
+        assert index.count_overdue() == 0
+
+    def test_lazy_store_completes_non_canonical_dates(self, tmp_path):
+        path = tmp_path / "tasks.json"
+        path.write_text(json.dumps({"next_id": 3, "tasks": [
+            record(1, due_date="2030-1-5"), record(2, due_date="2030-02-01"),
+        ]}))
+        manager = TaskManager(path, journal=False, lazy=True)
+        manager.complete(1)
+        assert [(t.id, t.status) for t in manager.next_tasks()] == [(2, "pending")]
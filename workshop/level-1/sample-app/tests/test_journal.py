@@ -0,0 +1,94 @@
+"""Unit tests for the mutation journal and its replay."""
+
+import json
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from journal import Journal
+from task_manager import TaskManager
+
+
+@pytest.fixture
+def tasks_file(tmp_path):
+    return tmp_path / "tasks.json"
+
+
+@pytest.fixture
+def journal_file(tasks_file):
+    return tasks_file.with_name(tasks_file.name + ".journal")
+
+
+def snapshot(manager: TaskManager) -> list[dict]:
+    return sorted(manager._tasks.records(), key=lambda r: r["id"])
+
+
+class TestReplay:
+    def test_records_come_back_in_order(self, journal_file):
+        journal = Journal(journal_file)
+        journal.append({"op": "delete", "id": 1})
+        journal.append_many([{"op": "delete", "id": 2}, {"op": "delete", "id": 3}])
+        assert [r["id"] for r in Journal(journal_file).replay()] == [1, 2, 3]
+
+    def test_replay_from_offset_only_yields_new_records(self, journal_file):
+        reader = Journal(journal_file)
+        writer = Journal(journal_file)
+        writer.append({"op": "delete", "id": 1})
+        assert len(list(reader.replay())) == 1
+        writer.append({"op": "delete", "id": 2})
+        assert [r["id"] for r in reader.replay(reader.offset)] == [2]
+
+    def test_replaying_twice_gives_the_same_store(self, tasks_file, journal_file):
+        manager = TaskManager(tasks_file, journal=True)
+        a = manager.add("A")
+        manager.add("B", priority="high")
+        manager.complete(a.id)
+        manager.delete(2)
+        expected = snapshot(TaskManager(tasks_file, journal=True))
+
+        # Replay every record a second time on top of the first pass
+        lines = journal_file.read_text()
+        journal_file.write_text(lines + lines)
+        assert snapshot(TaskManager(tasks_file, journal=True)) == expected
+
+    def test_new_ids_continue_after_replayed_ones(self, tasks_file):
+        TaskManager(tasks_file, journal=True).add("A")
+        assert TaskManager(tasks_file, journal=True).add("B").id == 2
+
+
+class TestTornLine:
+    def test_torn_final_line_is_ignored(self, journal_file):
+        journal_file.write_text('{"op":"delete","id":1}\n{"op":"dele')
+        assert [r["id"] for r in Journal(journal_file).replay()] == [1]
+
+    def test_append_after_torn_line_is_not_swallowed(self, journal_file):
+        journal_file.write_text('{"op":"delete","id":1}\n{"op":"dele')
+        journal = Journal(journal_file)
+        list(journal.replay())
+        journal.append({"op": "delete", "id": 2})
+        assert [r["id"] for r in Journal(journal_file).replay()] == [1, 2]
+
+    def test_store_loads_over_torn_journal(self, tasks_file, journal_file):
+        manager = TaskManager(tasks_file, journal=True)
+        manager.add("A")
+        manager.add("B")
+        with open(journal_file, "a") as f:
+            f.write(json.dumps({"op": "add", "task": {"id": 3}})[:15])
+
+        reloaded = TaskManager(tasks_file, journal=True)
+        assert [t.title for t in reloaded.list_tasks()] == ["A", "B"]
+        reloaded.add("C")
+        assert [t.title for t in TaskManager(tasks_file, journal=True).list_tasks()] == ["A", "B", "C"]
+
+
+class TestCompaction:
+    def test_compact_folds_journal_into_snapshot(self, tasks_file, journal_file):
+        manager = TaskManager(tasks_file, journal=True)
+        manager.add("A")
+        assert journal_file.exists()
+        manager.compact()
+        assert not journal_file.exists()
+        assert [t.title for t in TaskManager(tasks_file, journal=True).list_tasks()] == ["A"]
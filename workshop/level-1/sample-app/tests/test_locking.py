@@ -0,0 +1,95 @@
+"""Concurrent writers sharing one store through the file lock."""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from locking import FileLock, fcntl
+from task_manager import TaskManager
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="flock() is not available")
+
+WORKERS = 4
+TASKS_PER_WORKER = 15
+
+
+def add_tasks(path: str, journal: bool, worker: int) -> list[int]:
+    manager = TaskManager(Path(path), journal=journal)
+    return [manager.add(f"w{worker}-{i}").id for i in range(TASKS_PER_WORKER)]
+
+
+def complete_tasks(path: str, journal: bool, ids: list[int]) -> None:
+    manager = TaskManager(Path(path), journal=journal)
+    for task_id in ids:
+        manager.complete(task_id)
+
+
+@pytest.fixture(params=[False, True], ids=["snapshot", "journal"])
+def journal(request):
+    return request.param
+
+
+@pytest.fixture
+def tasks_file(tmp_path):
+    return tmp_path / "tasks.json"
+
+
+def run_parallel(fn, *calls):
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        return [f.result() for f in [pool.submit(fn, *args) for args in calls]]
+
+
+class TestParallelWriters:
+    def test_parallel_adds_are_all_kept(self, tasks_file, journal):
+        results = run_parallel(add_tasks, *[(str(tasks_file), journal, w) for w in range(WORKERS)])
+
+        ids = [task_id for worker_ids in results for task_id in worker_ids]
+        total = WORKERS * TASKS_PER_WORKER
+        assert sorted(ids) == list(range(1, total + 1))
+        titles = {t.title for t in TaskManager(tasks_file, journal=journal).list_tasks()}
+        assert titles == {f"w{w}-{i}" for w in range(WORKERS) for i in range(TASKS_PER_WORKER)}
+
+    def test_parallel_completes_are_all_kept(self, tasks_file, journal):
+        manager = TaskManager(tasks_file, journal=journal)
+        manager.add_many({"title": f"t{i}"} for i in range(WORKERS * TASKS_PER_WORKER))
+        chunks = [list(range(w + 1, WORKERS * TASKS_PER_WORKER + 1, WORKERS))
+                  for w in range(WORKERS)]
+
+        run_parallel(complete_tasks, *[(str(tasks_file), journal, ids) for ids in chunks])
+
+        stats = TaskManager(tasks_file, journal=journal).stats()
+        assert stats["by_status"] == {"done": WORKERS * TASKS_PER_WORKER}
+
+    def test_adds_and_completes_interleave(self, tasks_file, journal):
+        manager = TaskManager(tasks_file, journal=journal)
+        manager.add_many({"title": f"t{i}"} for i in range(TASKS_PER_WORKER))
+        existing = list(range(1, TASKS_PER_WORKER + 1))
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            added = pool.submit(add_tasks, str(tasks_file), journal, 0)
+            completed = pool.submit(complete_tasks, str(tasks_file), journal, existing)
+            added.result(), completed.result()
+
+        stats = TaskManager(tasks_file, journal=journal).stats()
+        assert stats["total"] == 2 * TASKS_PER_WORKER
+        assert stats["by_status"] == {"done": TASKS_PER_WORKER, "pending": TASKS_PER_WORKER}
+
+
+class TestFileLock:
+    def test_nested_acquisition_is_free(self, tmp_path):
+        lock = FileLock(tmp_path / "tasks.json.lock")
+        with lock.exclusive():
+            with lock.shared():
+                pass
+
+    def test_cannot_upgrade_shared_lock(self, tmp_path):
+        lock = FileLock(tmp_path / "tasks.json.lock")
+        with lock.shared():
+            with pytest.raises(RuntimeError):
+                with lock.exclusive():
+                    pass
@@ -0,0 +1,106 @@
+"""Unit tests for the snapshot storage backends."""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from storage import BinaryStorage, JsonStorage, StorageFormatError, storage_for_path
+from task_manager import TaskManager
+
+RECORDS = [
+    {"id": 1, "title": "Write report", "status": "pending", "priority": "high",
+     "due_date": "2026-03-01", "created_at": "2026-01-01 09:00:00",
+     "completed_at": None, "tags": ["work", "urgent"]},
+    {"id": 2, "title": "Café ☕ run", "status": "done", "priority": "low",
+     "due_date": None, "created_at": "2026-01-02 10:30:00",
+     "completed_at": "2026-01-03 08:00:00", "tags": []},
+    {"id": 7, "title": "Write report", "status": "in_progress", "priority": "critical",
+     "due_date": "1999-12-31", "created_at": "2026-01-01 09:00:00",
+     "completed_at": None, "tags": ["work"]},
+]
+
+HEADER = {
+    "version": 1, "revision": 4, "next_id": 8,
+    "stats": {"total": 3, "by_status": {"pending": 1, "done": 1, "in_progress": 1},
+              "by_priority": {"high": 1, "low": 1, "critical": 1},
+              "open_due": {"1999-12-31": 1, "2026-03-01": 1}},
+}
+
+
+@pytest.fixture(params=["json", "binary"])
+def storage(request, tmp_path):
+    if request.param == "json":
+        return JsonStorage(tmp_path / "tasks.json")
+    return BinaryStorage(tmp_path / "tasks.bin")
+
+
+class TestRoundTrip:
+    def test_records_round_trip(self, storage):
+        storage.write(HEADER, RECORDS)
+        assert [dict(r) for r in storage.records()] == RECORDS
+
+    def test_header_round_trips(self, storage):
+        storage.write(HEADER, RECORDS)
+        assert storage.read_header() == HEADER
+
+    def test_header_is_read_without_records(self, storage):
+        storage.write(HEADER, RECORDS)
+        reader = storage_for_path(storage._filepath)
+        assert reader.read_header()["stats"] == HEADER["stats"]
+
+    def test_empty_store(self, storage):
+        storage.write({"next_id": 1}, [])
+        assert list(storage.records()) == []
+        assert storage.read_header()["next_id"] == 1
+
+    def test_rewrite_replaces_snapshot(self, storage):
+        storage.write(HEADER, RECORDS)
+        storage.write({**HEADER, "next_id": 9}, RECORDS[:1])
+        assert [r["id"] for r in storage.records()] == [1]
+        assert storage.read_header()["next_id"] == 9
+
+
+class TestBinaryFormat:
+    def test_strings_are_stored_once(self, tmp_path):
+        path = tmp_path / "tasks.bin"
+        BinaryStorage(path).write(HEADER, RECORDS)
+        assert path.read_bytes().count("Write report".encode("utf-8")) == 1
+
+    def test_rows_are_read_only_mappings(self, tmp_path):
+        storage = BinaryStorage(tmp_path / "tasks.bin")
+        storage.write(HEADER, RECORDS)
+        row = next(storage.records())
+        assert set(row) == set(RECORDS[0])
+        with pytest.raises(KeyError):
+            row["nope"]
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "tasks.bin"
+        path.write_bytes(b"not a task store at all")
+        with pytest.raises(StorageFormatError):
+            BinaryStorage(path).read_header()
+
+    def test_rejects_truncated_file(self, tmp_path):
+        path = tmp_path / "tasks.bin"
+        BinaryStorage(path).write({"next_id": 8}, RECORDS)
+        path.write_bytes(path.read_bytes()[:40])
+        with pytest.raises(StorageFormatError):
+            list(BinaryStorage(path).records())
+
+
+class TestHeaderStats:
+    @pytest.mark.parametrize("backend", ["json", "binary"])
+    def test_lazy_stats_match_full_scan(self, tmp_path, backend):
+        path = tmp_path / ("tasks.bin" if backend == "binary" else "tasks.json")
+        manager = TaskManager(path, journal=False, backend=backend)
+        manager.add("A", priority="high", due_date="2000-01-01")
+        manager.add("B", due_date="2999-01-01")
+        manager.add("C", priority="low")
+        manager.complete(2)
+
+        lazy = TaskManager(path, journal=False, lazy=True, backend=backend)
+        assert lazy.stats() == TaskManager(path, journal=False, backend=backend).stats()
+        # Answered from the header alone
+        assert lazy._index is None
@@ -0,0 +1,299 @@
+"""Behaviour tests for TaskManager queries and batch operations."""
+
+import json
+import random
+import subprocess
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from index import NO_DUE_DATE
+from task_manager import TaskManager
+
+MAIN = os.path.join(os.path.dirname(__file__), "..", "main.py")
+
+
+@pytest.fixture
+def tasks_file(tmp_path):
+    return tmp_path / "tasks.json"
+
+
+@pytest.fixture(params=[False, True], ids=["snapshot", "journal"])
+def manager(request, tasks_file):
+    return TaskManager(tasks_file, journal=request.param)
+
+
+def reload(manager: TaskManager, lazy: bool = False) -> TaskManager:
+    return TaskManager(manager._filepath, journal=manager._journaled, lazy=lazy)
+
+
+def run_cli(tmp_path, *argv) -> subprocess.CompletedProcess:
+    env = {**os.environ, "TASK_DATA_DIR": str(tmp_path),
+           "TASK_SOCKET": str(tmp_path / "none.sock")}
+    return subprocess.run([sys.executable, MAIN, *argv], env=env,
+                          capture_output=True, text=True, timeout=30)
+
+
+def expected_next(manager: TaskManager, limit: int) -> list[int]:
+    """`next` computed the slow way, from every task."""
+    open_tasks = [t for t in manager.list_tasks() if t.status != "done"]
+    open_tasks.sort(key=lambda t: (t.due_date or NO_DUE_DATE, t.priority_rank, t.id))
+    return [t.id for t in open_tasks[:limit]]
+
+
+class TestNext:
+    def test_orders_by_due_date_then_priority_then_id(self, manager):
+        manager.add("No date, high", priority="high")
+        manager.add("Later", due_date="2030-06-01")
+        manager.add("Sooner, low", priority="low", due_date="2030-01-01")
+        manager.add("Sooner, critical", priority="critical", due_date="2030-01-01")
+        manager.add("Sooner, low again", priority="low", due_date="2030-01-01")
+        assert [t.id for t in manager.next_tasks()] == [4, 3, 5, 2, 1]
+
+    def test_limit(self, manager):
+        for day in range(1, 6):
+            manager.add(f"Day {day}", due_date=f"2030-01-0{day}")
+        assert [t.id for t in manager.next_tasks(2)] == [1, 2]
+        with pytest.raises(ValueError, match="at least 1"):
+            manager.next_tasks(0)
+
+    def test_done_and_deleted_tasks_leave_the_queue(self, manager):
+        for day in range(1, 5):
+            manager.add(f"Day {day}", due_date=f"2030-01-0{day}")
+        manager.complete(1)
+        manager.delete(3)
+        assert [t.id for t in manager.next_tasks()] == [2, 4]
+        assert [t.id for t in reload(manager).next_tasks()] == [2, 4]
+
+    def test_reopened_task_rejoins_the_queue(self, manager):
+        manager.add("A", due_date="2030-01-02")
+        manager.add("B", due_date="2030-01-01")
+        task = manager.get(2)
+        task.status = "done"
+        manager._tasks.update_status(task, "pending")
+        assert [t.id for t in manager.next_tasks()] == [1]
+        task.status = "pending"
+        manager._tasks.update_status(task, "done")
+        assert [t.id for t in manager.next_tasks()] == [2, 1]
+
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_matches_a_full_sort_after_random_changes(self, manager, lazy):
+        rng = random.Random(42)
+        priorities = ["critical", "high", "medium", "low"]
+        manager.add_many(
+            {"title": f"T{i}", "priority": rng.choice(priorities),
+             "due_date": rng.choice([None, f"2030-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}"])}
+            for i in range(60)
+        )
+        manager = reload(manager, lazy=lazy)
+        for _ in range(80):
+            op = rng.random()
+            open_ids = [t.id for t in manager.list_tasks() if t.status != "done"]
+            if op < 0.4 and open_ids:
+                manager.complete(rng.choice(open_ids))
+            elif op < 0.6 and len(manager._tasks):
+                manager.delete(rng.choice([t.id for t in manager.list_tasks()]))
+            else:
+                manager.add("New", priority=rng.choice(priorities),
+                            due_date=rng.choice([None, "2030-05-15", "2029-12-31"]))
+            assert [t.id for t in manager.next_tasks(10)] == expected_next(manager, 10)
+        assert [t.id for t in reload(manager).next_tasks(100)] == expected_next(manager, 100)
+
+    def test_overdue_count_follows_the_queue(self, manager):
+        manager.add("Overdue", due_date="2000-01-01")
+        manager.add("Also overdue", due_date="2001-01-01")
+        manager.add("Future", due_date="2999-01-01")
+        manager.add("No date")
+        assert manager.stats()["overdue"] == 2
+        manager.complete(1)
+        assert manager.stats()["overdue"] == 1
+        assert reload(manager, lazy=True).stats()["overdue"] == 1
+
+    def test_cli(self, tmp_path):
+        run_cli(tmp_path, "add", "Later", "--due", "2030-06-01")
+        run_cli(tmp_path, "add", "Sooner", "--due", "2030-01-01")
+        run_cli(tmp_path, "add", "Undated")
+        result = run_cli(tmp_path, "next", "-n", "2", "--format", "json")
+        assert result.returncode == 0, result.stderr
+        assert [t["title"] for t in json.loads(result.stdout)] == ["Sooner", "Later"]
+
+
+def expected_tags(manager: TaskManager, tags=(), any_tags=(), not_tags=()) -> set[int]:
+    """A tag query computed the slow way, one task at a time."""
+    return {t.id for t in manager.list_tasks()
+            if set(tags) <= set(t.tags)
+            and (not any_tags or set(any_tags) & set(t.tags))
+            and not set(not_tags) & set(t.tags)}
+
+
+class TestTagQueries:
+    @pytest.fixture
+    def tagged(self, manager):
+        manager.add("Bug on web", priority="high", tags=["bug", "web"])
+        manager.add("Bug on api", tags=["bug", "api"])
+        manager.add("Docs for web", priority="low", tags=["docs", "web"])
+        manager.add("Untagged")
+        manager.add("Web api bug", tags=["bug", "web", "api"])
+        return manager
+
+    def ids(self, manager, **filters) -> set[int]:
+        return {t.id for t in manager.list_tasks(**filters)}
+
+    def test_all_of(self, tagged):
+        assert self.ids(tagged, tags=["bug"]) == {1, 2, 5}
+        assert self.ids(tagged, tags=["bug", "web"]) == {1, 5}
+        assert self.ids(tagged, tags=["bug", "missing"]) == set()
+
+    def test_any_of(self, tagged):
+        assert self.ids(tagged, any_tags=["docs", "api"]) == {2, 3, 5}
+        assert self.ids(tagged, any_tags=["missing"]) == set()
+
+    def test_none_of(self, tagged):
+        assert self.ids(tagged, not_tags=["bug"]) == {3, 4}
+        assert self.ids(tagged, not_tags=["missing"]) == {1, 2, 3, 4, 5}
+
+    def test_combined_with_each_other_and_other_filters(self, tagged):
+        assert self.ids(tagged, tags=["bug"], not_tags=["api"]) == {1}
+        assert self.ids(tagged, any_tags=["web", "api"], not_tags=["docs"]) == {1, 2, 5}
+        assert self.ids(tagged, tags=["web"], priority="high") == {1}
+        tagged.complete(5)
+        assert self.ids(tagged, tags=["bug"], status="pending") == {1, 2}
+
+    def test_deleted_tasks_leave_the_tag_index(self, tagged):
+        tagged.delete(1)
+        assert self.ids(tagged, tags=["web"]) == {3, 5}
+        assert self.ids(reload(tagged), tags=["web"]) == {3, 5}
+
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_matches_a_full_scan(self, tagged, lazy):
+        manager = reload(tagged, lazy=lazy)
+        for query in [dict(tags=["web"]), dict(any_tags=["api", "docs"]),
+                      dict(not_tags=["web", "docs"]),
+                      dict(tags=["bug"], any_tags=["web", "docs"], not_tags=["api"])]:
+            assert self.ids(manager, **query) == expected_tags(manager, **query), query
+
+    def test_cli(self, tmp_path):
+        run_cli(tmp_path, "add", "Bug on web", "--tags", "bug", "web")
+        run_cli(tmp_path, "add", "Bug on api", "--tags", "bug", "api")
+        run_cli(tmp_path, "add", "Docs", "--tags", "docs")
+
+        def titles(*argv):
+            result = run_cli(tmp_path, "list", "--format", "json", *argv)
+            assert result.returncode == 0, result.stderr
+            return {t["title"] for t in json.loads(result.stdout)}
+
+        assert titles("--tag", "bug", "--tag", "web") == {"Bug on web"}
+        assert titles("--any-tag", "api", "--any-tag", "docs") == {"Bug on api", "Docs"}
+        assert titles("--not-tag", "bug") == {"Docs"}
+        assert titles("--tag", "bug", "--not-tag", "web") == {"Bug on api"}
+
+
+def state(manager: TaskManager) -> list[tuple]:
+    return sorted((t.id, t.title, t.status) for t in manager.list_tasks())
+
+
+class TestBatches:
+    @pytest.fixture
+    def seeded(self, manager):
+        manager.add_many([
+            {"title": "Low", "priority": "low"},
+            {"title": "High", "priority": "high"},
+            {"title": "Low again", "priority": "low"},
+        ])
+        return manager
+
+    def assert_unchanged(self, manager, before):
+        assert state(manager) == before
+        assert state(reload(manager)) == before
+
+    def test_add_many(self, manager):
+        tasks = manager.add_many([
+            {"title": "One", "priority": "high", "due_date": "2030-01-01", "tags": ["a"]},
+            {"title": "Two"},
+        ])
+        assert [t.id for t in tasks] == [1, 2]
+        two = reload(manager).get(2)
+        assert (two.priority, two.due_date, two.tags) == ("medium", None, [])
+
+    def test_add_many_bad_row_adds_nothing(self, seeded):
+        before = state(seeded)
+        with pytest.raises(ValueError, match="Row 2: Invalid priority"):
+            seeded.add_many([{"title": "Fine"}, {"title": "Bad", "priority": "urgent"}])
+        self.assert_unchanged(seeded, before)
+        # The ids the failed batch used are handed out again
+        assert seeded.add("After").id == 4
+
+    def test_complete_many(self, seeded):
+        assert [t.id for t in seeded.complete_many([1, 3, 1])] == [1, 3]
+        assert reload(seeded).stats()["by_status"] == {"done": 2, "pending": 1}
+
+    @pytest.mark.parametrize("ids,message", [
+        ([2, 99], "Task #99 not found"),
+        ([2, 2, 1], "Task #1 is already completed"),
+    ])
+    def test_complete_many_is_all_or_nothing(self, seeded, ids, message):
+        seeded.complete(1)
+        before = state(seeded)
+        with pytest.raises(ValueError, match=message):
+            seeded.complete_many(ids)
+        self.assert_unchanged(seeded, before)
+
+    def test_delete_many(self, seeded):
+        assert [t.id for t in seeded.delete_many([3, 1])] == [3, 1]
+        assert [t.id for t in reload(seeded).list_tasks()] == [2]
+
+    def test_delete_many_is_all_or_nothing(self, seeded):
+        before = state(seeded)
+        with pytest.raises(ValueError, match="Task #99 not found"):
+            seeded.delete_many([1, 99, 2])
+        self.assert_unchanged(seeded, before)
+
+    def test_delete_where(self, seeded):
+        seeded.complete(3)
+        assert [t.id for t in seeded.delete_where(priority="low", status="done")] == [3]
+        assert {t.id for t in seeded.delete_where(priority="low")} == {1}
+        assert [t.id for t in reload(seeded).list_tasks()] == [2]
+        assert seeded.delete_where(status="done") == []
+
+    def test_delete_where_needs_a_filter(self, seeded):
+        before = state(seeded)
+        with pytest.raises(ValueError, match="needs --status and/or --priority"):
+            seeded.delete_where()
+        self.assert_unchanged(seeded, before)
+
+    def test_cli_add_from_file(self, tmp_path):
+        csv_file = tmp_path / "import.csv"
+        csv_file.write_text(
+            "title,priority,due,tags\n"
+            "Write docs,high,2030-01-01,docs;web\n"
+            "Fix build,,,\n"
+        )
+        result = run_cli(tmp_path, "add", "--from-file", str(csv_file))
+        assert result.returncode == 0, result.stderr
+        assert "Created 2 tasks" in result.stdout
+
+        tasks = TaskManager(tmp_path / "tasks.json").list_tasks(sort_by="id")
+        assert [(t.title, t.priority, t.due_date, t.tags) for t in tasks] == [
+            ("Write docs", "high", "2030-01-01", ["docs", "web"]),
+            ("Fix build", "medium", None, []),
+        ]
+
+    def test_cli_add_from_file_bad_row(self, tmp_path):
+        csv_file = tmp_path / "import.csv"
+        csv_file.write_text("title,due_date\nFine,2030-01-01\nBad,31/12/2030\n")
+        result = run_cli(tmp_path, "add", "--from-file", str(csv_file))
+        assert result.returncode == 1
+        assert "Row 2: Invalid date format" in result.stderr
+        assert TaskManager(tmp_path / "tasks.json").list_tasks() == []
+
+    def test_cli_complete_and_delete(self, tmp_path):
+        for title in ("A", "B", "C"):
+            run_cli(tmp_path, "add", title, "--priority", "low")
+        assert run_cli(tmp_path, "complete", "1", "99").returncode == 1
+        assert run_cli(tmp_path, "complete", "1", "2").returncode == 0
+        assert run_cli(tmp_path, "delete", "--status", "done").returncode == 0
+        stats = TaskManager(tmp_path / "tasks.json").stats()
+        assert (stats["total"], stats["by_status"]) == (1, {"pending": 1})
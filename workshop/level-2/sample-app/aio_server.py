@@ -0,0 +1,168 @@
+"""asyncio serving engine — many keep-alive connections on one event loop.
+
+The event loop only does socket I/O: it reads a request's head and body,
+then hands the raw bytes to the regular `BookmarkHandler` in a thread
+pool. The handler reads the bytes from a buffer and its writes are passed
+to the connection's transport as they happen (waiting for it to drain), so
+routing, auth, logging, error handling and chunked streaming are exactly
+the same as in the threaded server. Repository I/O therefore never blocks
+the loop. Idle connections cost a coroutine, not a thread.
+"""
+
+import asyncio
+import io
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+logger = logging.getLogger("server")
+
+MAX_HEADER_BYTES = 64 * 1024
+# Small handler writes are coalesced up to this size before being sent
+WRITE_BUFFER_BYTES = 64 * 1024
+
+
+class AsyncHTTPServer:
+    """Event-loop server with the `serve_forever`/`shutdown` API of HTTPServer."""
+
+    def __init__(self, server_address, handler_class, workers: int = Config.WORKERS,
+                 keepalive_timeout: float = Config.KEEPALIVE_TIMEOUT):
+        self.handler_class = handler_class
+        self.keepalive_timeout = keepalive_timeout
+        # Bind now so the port is known (and errors raised) before serving
+        self.socket = socket.create_server(server_address, backlog=1024)
+        self.server_address = self.socket.getsockname()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="http-worker")
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopped: asyncio.Event | None = None
+        self._started = threading.Event()
+        self._finished = threading.Event()
+
+    def serve_forever(self):
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._finished.set()
+
+    def shutdown(self):
+        """Stop serve_forever() and wait for it to return (call from another thread)."""
+        self._started.wait()
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._finished.wait()
+
+    def server_close(self):
+        self.socket.close()
+        self._executor.shutdown(wait=False)
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_server(
+            self._handle_connection, sock=self.socket, limit=MAX_HEADER_BYTES
+        )
+        self._started.set()
+        async with server:
+            await self._stopped.wait()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        client_address = writer.get_extra_info("peername")
+        try:
+            while True:
+                raw = await self._read_request(reader)
+                if raw is None:
+                    break
+                close = await self._loop.run_in_executor(
+                    self._executor, self._run_handler, raw, client_address, writer
+                )
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, ValueError) as e:
+            logger.debug(f"Dropping connection from {client_address}: {e}")
+        except asyncio.CancelledError:
+            # shutdown() cancels open connections; asyncio would log the
+            # cancellation of a connection task as an error.
+            logger.debug(f"Closing connection from {client_address} on shutdown")
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> bytes | None:
+        """Read one request (head + body); None when the client is done."""
+        try:
+            head = await asyncio.wait_for(
+                reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout
+            )
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return None
+        length = 0
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        body = await reader.readexactly(length) if length else b""
+        return head + body
+
+    def _run_handler(self, raw: bytes, client_address,
+                     writer: asyncio.StreamWriter) -> bool:
+        """Run one request through the handler class; True to close the connection."""
+        # BaseRequestHandler.__init__ would start reading from a socket, so
+        # set up the attributes it needs by hand.
+        handler = self.handler_class.__new__(self.handler_class)
+        handler.server = self
+        handler.request = None
+        handler.client_address = client_address
+        handler.rfile = io.BytesIO(raw)
+        handler.wfile = io.BufferedWriter(_TransportWriter(self._loop, writer),
+                                          WRITE_BUFFER_BYTES)
+        handler.close_connection = True
+        handler.handle_one_request()
+        handler.wfile.flush()
+        return handler.close_connection
+
+
+class _TransportWriter(io.RawIOBase):
+    """File-like sink that writes to a StreamWriter from a worker thread.
+
+    Each write is handed to the event loop and blocks until the transport
+    has drained, so a slow client holds back the handler instead of the
+    response piling up in memory. Once a write fails, or the client stops
+    reading for REQUEST_TIMEOUT, every later write fails straight away and
+    the connection is dropped.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter):
+        self._loop = loop
+        self._writer = writer
+        self._broken = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self._broken:
+            raise ConnectionAbortedError("Connection is no longer writable")
+        send = self._send(bytes(data))
+        try:
+            future = asyncio.run_coroutine_threadsafe(send, self._loop)
+        except RuntimeError:  # the server has shut down
+            send.close()
+            self._broken = True
+            raise ConnectionAbortedError("Server is shutting down")
+        try:
+            future.result(Config.REQUEST_TIMEOUT)
+        except TimeoutError:
+            future.cancel()
+            self._broken = True
+            raise ConnectionAbortedError("Client stopped reading the response")
+        except BaseException:
+            self._broken = True
+            raise
+        return len(data)
+
+    async def _send(self, data: bytes):
+        self._writer.write(data)
+        await self._writer.drain()
@@ -3,11 +3,12 @@
 
 import argparse
 import logging
-from http.server import HTTPServer
 
+from cache import ResponseCache
 from config import Config
 from middleware import setup_logging
 from repository import create_repository
+from server import create_server
 from service import BookmarkService
 from routes import BookmarkHandler
 
@@ -20,10 +21,16 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--port", type=int, default=Config.PORT, help="Listen port")
     parser.add_argument(
         "--storage",
-        choices=["file", "memory"],
+        choices=["file", "cached", "sqlite", "memory"],
         default=Config.STORAGE_BACKEND,
         help="Storage backend",
     )
+    parser.add_argument(
+        "--server",
+        choices=["threaded", "asyncio", "single"],
+        default=Config.SERVER_MODE,
+        help="Serving mode (threaded = bounded worker pool, asyncio = event loop)",
+    )
     return parser
 
 
@@ -40,17 +47,20 @@ def main():
     repo = create_repository(args.storage)
     service = BookmarkService(repo)
     BookmarkHandler.service = service
+    BookmarkHandler.response_cache = ResponseCache()
 
     # Start server
-    server = HTTPServer((args.host, args.port), BookmarkHandler)
+    server = create_server((args.host, args.port), BookmarkHandler, args.server)
     logger.info(f"Bookmark Manager API running on {args.host}:{args.port}")
-    logger.info(f"Storage: {args.storage}")
+    logger.info(f"Storage: {args.storage}, server: {args.server}")
 
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         logger.info("Shutting down...")
-        server.shutdown()
+    finally:
+        server.server_close()
+        repo.close()
 
 
 if __name__ == "__main__":
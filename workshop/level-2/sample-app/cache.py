@@ -0,0 +1,87 @@
+"""Revision-scoped HTTP response cache and conditional-request helpers."""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import NamedTuple, Optional
+
+from config import Config
+
+
+class CachedResponse(NamedTuple):
+    status: int
+    body: bytes
+    content_encoding: Optional[str]
+
+
+class ResponseCache:
+    """Serialized GET responses for the current store revision.
+
+    Entries are keyed by request target and content coding, and are only
+    valid for the revision they were rendered at. When the store moves to
+    a newer revision every entry is dropped, so nothing stale is ever
+    served and memory stays bounded by `max_bytes` (least recently used
+    entries go first).
+
+    ETags combine the revision with a token chosen at startup. A restarted
+    in-memory store counts revisions from zero again, and must not match
+    ETags handed out by the previous process.
+    """
+
+    def __init__(self, max_bytes: int = Config.RESPONSE_CACHE_BYTES):
+        self._max_bytes = max_bytes
+        self._token = secrets.token_hex(4)
+        self._lock = threading.Lock()
+        self._revision: Optional[int] = None
+        self._since = time.time()
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._size = 0
+
+    def validators(self, revision: int) -> tuple[str, str]:
+        """ETag and Last-Modified values for responses at `revision`."""
+        with self._lock:
+            if self._revision is None or revision > self._revision:
+                self._revision = revision
+                self._since = time.time()
+                self._entries.clear()
+                self._size = 0
+            since = self._since
+        return f'W/"{self._token}-{revision}"', formatdate(since, usegmt=True)
+
+    def get(self, revision: int, key: tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            if revision != self._revision:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, revision: int, key: tuple, entry: CachedResponse):
+        size = len(entry.body)
+        with self._lock:
+            # A response rendered at an older revision may already be stale
+            if revision != self._revision or size > self._max_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[key] = entry
+            self._size += size
+            while self._size > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag."""
+    if not if_none_match:
+        return False
+    wanted = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == wanted:
+            return True
+    return False
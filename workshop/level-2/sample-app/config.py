@@ -10,9 +10,23 @@ class Config:
     HOST: str = os.environ.get("BM_HOST", "0.0.0.0")
     PORT: int = int(os.environ.get("BM_PORT", "8080"))
 
-    # Storage backend: "file" or "memory"
+    # Concurrency: "threaded" (bounded worker pool), "asyncio" or "single"
+    SERVER_MODE: str = os.environ.get("BM_SERVER_MODE", "threaded")
+    WORKERS: int = int(os.environ.get("BM_WORKERS", "16"))
+    QUEUE_SIZE: int = int(os.environ.get("BM_QUEUE_SIZE", "1024"))
+    KEEPALIVE_TIMEOUT: float = float(os.environ.get("BM_KEEPALIVE_TIMEOUT", "15"))
+    REQUEST_TIMEOUT: float = float(os.environ.get("BM_REQUEST_TIMEOUT", "10"))
+
+    # Storage backend: "file", "cached" (file with in-memory cache),
+    # "sqlite" or "memory"
     STORAGE_BACKEND: str = os.environ.get("BM_STORAGE", "file")
     DATA_FILE: str = os.environ.get("BM_DATA_FILE", "bookmarks.json")
+    SQLITE_FILE: str = os.environ.get("BM_SQLITE_FILE", "bookmarks.db")
+
+    # File writes: write-behind delay for the cached backend (0 = write
+    # through) and whether to fsync before replacing the data file
+    FLUSH_INTERVAL: float = float(os.environ.get("BM_FLUSH_INTERVAL", "1.0"))
+    FSYNC: bool = os.environ.get("BM_FSYNC", "false").lower() == "true"
 
     # Limits
     MAX_BOOKMARKS: int = int(os.environ.get("BM_MAX_BOOKMARKS", "5000"))
@@ -20,6 +34,21 @@ class Config:
     MAX_TAGS_PER_BOOKMARK: int = 10
     MAX_TAG_LENGTH: int = 50
 
+    # Pagination for GET /bookmarks?limit=...
+    DEFAULT_PAGE_SIZE: int = int(os.environ.get("BM_PAGE_SIZE", "50"))
+    MAX_PAGE_SIZE: int = int(os.environ.get("BM_MAX_PAGE_SIZE", "1000"))
+
+    # Responses: indented JSON for reading by hand (compact otherwise),
+    # gzip/deflate for bodies of at least COMPRESS_MIN_BYTES, and chunked
+    # streaming for lists longer than STREAM_THRESHOLD items
+    PRETTY_JSON: bool = os.environ.get("BM_PRETTY_JSON", "false").lower() == "true"
+    COMPRESSION: bool = os.environ.get("BM_COMPRESSION", "true").lower() == "true"
+    COMPRESS_MIN_BYTES: int = int(os.environ.get("BM_COMPRESS_MIN_BYTES", "1024"))
+    STREAM_THRESHOLD: int = int(os.environ.get("BM_STREAM_THRESHOLD", "1000"))
+
+    # Rendered GET responses kept for the current store revision (0 = off)
+    RESPONSE_CACHE_BYTES: int = int(os.environ.get("BM_RESPONSE_CACHE_BYTES", str(16 * 1024 * 1024)))
+
     # Auth (simple token-based)
     AUTH_ENABLED: bool = os.environ.get("BM_AUTH_ENABLED", "false").lower() == "true"
     AUTH_TOKEN: str = os.environ.get("BM_AUTH_TOKEN", "")
@@ -34,8 +63,20 @@ class Config:
         warnings = []
         if cls.AUTH_ENABLED and not cls.AUTH_TOKEN:
             warnings.append("AUTH_ENABLED is true but AUTH_TOKEN is empty")
-        if cls.STORAGE_BACKEND not in ("file", "memory"):
+        if cls.STORAGE_BACKEND not in ("file", "cached", "sqlite", "memory"):
             warnings.append(f"Unknown STORAGE_BACKEND: {cls.STORAGE_BACKEND}")
         if cls.PORT < 1 or cls.PORT > 65535:
             warnings.append(f"Invalid PORT: {cls.PORT}")
+        if cls.FLUSH_INTERVAL < 0:
+            warnings.append(f"FLUSH_INTERVAL must not be negative (got {cls.FLUSH_INTERVAL})")
+        if cls.SERVER_MODE not in ("threaded", "asyncio", "single"):
+            warnings.append(f"Unknown SERVER_MODE: {cls.SERVER_MODE}")
+        if cls.WORKERS < 1:
+            warnings.append(f"WORKERS must be at least 1 (got {cls.WORKERS})")
+        if not 1 <= cls.DEFAULT_PAGE_SIZE <= cls.MAX_PAGE_SIZE:
+            warnings.append(
+                f"PAGE_SIZE must be between 1 and MAX_PAGE_SIZE (got {cls.DEFAULT_PAGE_SIZE})"
+            )
+        if cls.QUEUE_SIZE < 1:
+            warnings.append(f"QUEUE_SIZE must be at least 1 (got {cls.QUEUE_SIZE})")
         return warnings
@@ -18,6 +18,10 @@ class AppError(Exception):
             "details": self.details,
         }
 
+    def headers(self) -> dict:
+        """Extra response headers the error status calls for."""
+        return {}
+
 
 class NotFoundError(AppError):
     status_code = 404
@@ -51,3 +55,21 @@ class AuthenticationError(AppError):
 class LimitExceededError(AppError):
     status_code = 429
     error_type = "limit_exceeded"
+
+
+class ServiceUnavailableError(AppError):
+    status_code = 503
+    error_type = "service_unavailable"
+
+
+class MethodNotAllowedError(AppError):
+    status_code = 405
+    error_type = "method_not_allowed"
+
+    def __init__(self, message: str, allowed: list[str]):
+        super().__init__(message, {"allowed": allowed})
+        self.allowed = allowed
+
+    def headers(self) -> dict:
+        # RFC 9110 requires a 405 response to list the allowed methods
+        return {"Allow": ", ".join(self.allowed)}
@@ -0,0 +1,59 @@
+"""Inter-process lock and id counter for the JSON data file."""
+
+import os
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, only threads are excluded
+    fcntl = None
+
+
+class FileLock:
+    """flock() on a sidecar ``.lock`` file, plus the store's id counter.
+
+    Every process that writes the data file takes this lock around its
+    read-modify-write, so no write is based on a stale read. The lock file
+    also records the next free bookmark id. Ids are reserved there when a
+    bookmark is created rather than when the data file is written, so a
+    process holding unflushed bookmarks can never hand out an id another
+    process has already returned to a client.
+    """
+
+    def __init__(self, filepath: Path):
+        self._filepath = filepath
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        try:
+            self._filepath.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self._filepath, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self._release()
+
+    def _release(self):
+        if self._fd is not None:
+            # Closing the descriptor also drops the flock
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+    def reserve_id(self, floor: int) -> int:
+        """Hand out the next id, at least `floor` (call with the lock held)."""
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        raw = os.read(self._fd, 32).strip()
+        bookmark_id = max(int(raw) if raw.isdigit() else 1, floor)
+        os.ftruncate(self._fd, 0)
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, b"%d\n" % (bookmark_id + 1))
+        return bookmark_id
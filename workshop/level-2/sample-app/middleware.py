@@ -3,14 +3,29 @@
 import logging
 import time
 import json
-from typing import Callable
+import zlib
+from typing import Callable, Optional
 from http.server import BaseHTTPRequestHandler
 
 from config import Config
 from errors import AppError, AuthenticationError
 
+try:
+    import orjson  # optional, several times faster than json
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger("middleware")
 
+# zlib wbits for each Content-Encoding: gzip header or zlib wrapper
+COMPRESSION_WBITS = {"gzip": 31, "deflate": 15}
+COMPRESSION_LEVEL = 6
+
+# Streamed lists are encoded this many items at a time, and written once a
+# chunk has grown to at least CHUNK_BYTES
+STREAM_BATCH = 256
+CHUNK_BYTES = 64 * 1024
+
 
 def setup_logging():
     """Configure application-wide logging."""
@@ -64,29 +79,171 @@ def parse_json_body(handler: BaseHTTPRequestHandler) -> dict:
     if content_length == 0:
         return {}
     raw = handler.rfile.read(content_length)
+    handler.body_consumed = True
     try:
         return json.loads(raw.decode("utf-8"))
     except (json.JSONDecodeError, UnicodeDecodeError) as e:
         raise AppError(f"Invalid JSON body: {e}")
 
 
+def encode_json(data: dict | list) -> bytes:
+    """Serialize a response body (compact unless PRETTY_JSON is set)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if Config.PRETTY_JSON else 0)
+    if Config.PRETTY_JSON:
+        return json.dumps(data, indent=2).encode("utf-8")
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick gzip or deflate from an Accept-Encoding header (None = identity)."""
+    if not Config.COMPRESSION:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for coding in COMPRESSION_WBITS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def should_stream(handler: BaseHTTPRequestHandler, data: dict | list) -> bool:
+    """Whether `data` is a list long enough to send with chunked encoding."""
+    return (
+        isinstance(data, list)
+        and len(data) > Config.STREAM_THRESHOLD
+        and not Config.PRETTY_JSON
+        and handler.protocol_version == "HTTP/1.1"
+        and handler.request_version == "HTTP/1.1"
+    )
+
+
+def render_json(data: dict | list, coding: Optional[str]) -> tuple[bytes, Optional[str]]:
+    """Encode and maybe compress a body; returns it and the coding applied."""
+    body = encode_json(data)
+    if coding and len(body) >= Config.COMPRESS_MIN_BYTES:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, COMPRESSION_WBITS[coding])
+        return compressor.compress(body) + compressor.flush(), coding
+    return body, None
+
+
 def send_json_response(
     handler: BaseHTTPRequestHandler,
     data: dict | list,
     status_code: int = 200,
+    headers: Optional[dict] = None,
 ):
-    """Write a JSON response to the HTTP handler."""
-    body = json.dumps(data, indent=2).encode("utf-8")
-    handler.send_response(status_code)
-    handler.send_header("Content-Type", "application/json")
+    """Write a JSON response to the HTTP handler.
+
+    Long lists are streamed with chunked transfer encoding when the
+    connection speaks HTTP/1.1, so the whole body is never held in memory
+    twice. Bodies are compressed if the client accepts gzip or deflate.
+    """
+    coding = negotiate_encoding(handler.headers.get("Accept-Encoding", ""))
+    if should_stream(handler, data):
+        _send_chunked(handler, data, status_code, coding, headers)
+        return
+    body, coding = render_json(data, coding)
+    send_body(handler, status_code, body, coding, headers)
+
+
+def send_body(
+    handler: BaseHTTPRequestHandler,
+    status_code: int,
+    body: bytes,
+    coding: Optional[str],
+    headers: Optional[dict] = None,
+):
+    """Write an already rendered JSON body."""
+    _start_response(handler, status_code)
+    _send_headers(handler, coding, headers)
     handler.send_header("Content-Length", str(len(body)))
     handler.end_headers()
     handler.wfile.write(body)
 
 
+def send_not_modified(handler: BaseHTTPRequestHandler, headers: dict):
+    """Answer a conditional GET whose cached copy is still current."""
+    _start_response(handler, 304)
+    for name, value in headers.items():
+        handler.send_header(name, value)
+    handler.end_headers()
+
+
+def _start_response(handler: BaseHTTPRequestHandler, status_code: int):
+    # From here on an error can't be reported with a response of its own
+    # (see BookmarkHandler._handle_request)
+    handler.headers_sent = True
+    handler.send_response(status_code)
+
+
+def _send_headers(handler: BaseHTTPRequestHandler, coding: Optional[str],
+                  headers: Optional[dict]):
+    handler.send_header("Content-Type", "application/json")
+    if coding:
+        handler.send_header("Content-Encoding", coding)
+    handler.send_header("Vary", "Accept-Encoding")
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
+
+
+def _send_chunked(
+    handler: BaseHTTPRequestHandler,
+    items: list,
+    status_code: int,
+    coding: Optional[str],
+    headers: Optional[dict] = None,
+):
+    """Stream a JSON array in chunks, compressing on the fly if negotiated."""
+    _start_response(handler, status_code)
+    _send_headers(handler, coding, headers)
+    handler.send_header("Transfer-Encoding", "chunked")
+    handler.end_headers()
+
+    compressor = (
+        zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, COMPRESSION_WBITS[coding])
+        if coding else None
+    )
+
+    def write_chunk(data: bytes):
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    pending, size = [b"["], 1
+    for start in range(0, len(items), STREAM_BATCH):
+        # Encode a batch as one array and drop its brackets
+        piece = encode_json(items[start:start + STREAM_BATCH])[1:-1]
+        if start:
+            piece = b"," + piece
+        pending.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            write_chunk(b"".join(pending))
+            pending, size = [], 0
+    pending.append(b"]")
+    write_chunk(b"".join(pending))
+    if compressor:
+        tail = compressor.flush()
+        handler.wfile.write(b"%x\r\n%s\r\n" % (len(tail), tail))
+    handler.wfile.write(b"0\r\n\r\n")
+
+
 def send_error_response(
     handler: BaseHTTPRequestHandler,
     error: AppError,
 ):
     """Write an error JSON response."""
-    send_json_response(handler, error.to_dict(), error.status_code)
+    send_json_response(handler, error.to_dict(), error.status_code, error.headers())
@@ -3,12 +3,30 @@
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from typing import Optional
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse
 
 from config import Config
 from errors import ValidationError
 
 
+DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for duplicate detection.
+
+    Scheme and host are case-insensitive, a default port is redundant and
+    an empty path means "/", so all of these map to the same key.
+    """
+    parts = urlparse(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = DEFAULT_PORTS.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[: -len(default_port)]
+    return urlunparse(parts._replace(scheme=scheme, netloc=netloc, path=parts.path or "/"))
+
+
 @dataclass
 class Bookmark:
     id: int
@@ -27,6 +45,8 @@ class Bookmark:
         self.description = self.description.strip()
         self.tags = [t.strip().lower() for t in self.tags if t.strip()]
         self._validate()
+        # Not a dataclass field, so it stays out of to_dict() and ==
+        self._domain = (self.url, urlparse(self.url).netloc)
 
     def _validate(self):
         """Validate all fields."""
@@ -65,11 +85,18 @@ class Bookmark:
 
     @property
     def domain(self) -> str:
-        """Extract the domain from the URL."""
-        return urlparse(self.url).netloc
+        """Extract the domain from the URL (parsed once per URL)."""
+        url, domain = self._domain
+        if url is not self.url:
+            domain = urlparse(self.url).netloc
+            self._domain = (self.url, domain)
+        return domain
 
-    def to_dict(self) -> dict:
-        return asdict(self)
+    def to_dict(self, fields: Optional[list[str]] = None) -> dict:
+        """All fields, or only the named ones (already validated by the caller)."""
+        if fields is None:
+            return asdict(self)
+        return {f: list(self.tags) if f == "tags" else getattr(self, f) for f in fields}
 
     @classmethod
     def from_dict(cls, data: dict) -> "Bookmark":
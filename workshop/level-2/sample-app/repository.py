@@ -1,14 +1,31 @@
 """Data persistence layer with pluggable storage backends."""
 
+import heapq
 import json
+import logging
+import os
+import sqlite3
+import stat
+import tempfile
 import threading
 from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Optional
 
 from config import Config
-from models import Bookmark
+from models import Bookmark, normalize_url
 from errors import StorageError, NotFoundError
+from locking import FileLock
+
+logger = logging.getLogger("repository")
+
+# Sort orders for BaseRepository.query(); ties are broken by id
+SORT_KEYS = {
+    "created": lambda b: b.created_at,
+    "title": lambda b: b.title.lower(),
+    "visits": lambda b: -b.visit_count,
+    "domain": lambda b: b.domain.lower(),
+}
 
 
 class BaseRepository(ABC):
@@ -35,68 +52,192 @@ class BaseRepository(ABC):
     @abstractmethod
     def find_by_domain(self, domain: str) -> list[Bookmark]: ...
 
+    @abstractmethod
+    def find_by_url(self, url: str) -> Optional[Bookmark]:
+        """The bookmark whose URL normalizes to the same key, if any."""
+
     @abstractmethod
     def count(self) -> int: ...
 
+    @abstractmethod
+    def revision(self) -> int:
+        """Store revision; it increases with every change, so equal values mean equal data."""
+
+    def query(
+        self,
+        tag: Optional[str] = None,
+        domain: Optional[str] = None,
+        include_archived: bool = False,
+        sort_by: str = "created",
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+    ) -> list[Bookmark]:
+        """Filtered bookmarks ordered by (sort key, id).
+
+        `after` is the (sort key, id) of the last bookmark of the previous
+        page; only bookmarks ordered after it are returned. With a `limit`
+        only that many are kept while scanning, instead of sorting them all.
+        """
+        if tag:
+            candidates = self.find_by_tag(tag)
+        elif domain:
+            candidates = self.find_by_domain(domain)
+        else:
+            candidates = self.list_all()
+        sort_key = SORT_KEYS.get(sort_by, SORT_KEYS["created"])
+
+        def key(b: Bookmark) -> tuple:
+            return (sort_key(b), b.id)
+
+        matches = (
+            b for b in candidates
+            if (include_archived or not b.is_archived)
+            and (after is None or key(b) > after)
+        )
+        if limit is None:
+            return sorted(matches, key=key)
+        return heapq.nsmallest(limit, matches, key=key)
+
+    def close(self):
+        """Persist anything still pending and release resources."""
+
 
 class InMemoryRepository(BaseRepository):
-    """Thread-safe in-memory storage (data lost on restart)."""
+    """Thread-safe in-memory storage (data lost on restart).
+
+    Secondary indexes (normalized URL, tag, lower-cased domain -> ids) are
+    kept under the same lock as the store, so filtered lookups cost time
+    proportional to the number of matches rather than the store size.
+    """
 
     def __init__(self):
         self._store: dict[int, Bookmark] = {}
+        self._by_url: dict[str, int] = {}
+        self._by_tag: dict[str, set[int]] = {}
+        self._by_domain: dict[str, set[int]] = {}
+        # The keys each id is filed under. Callers may mutate a stored
+        # bookmark before passing it to update(), so the old keys can't be
+        # recomputed from the object.
+        self._index_keys: dict[int, tuple[str, str, tuple[str, ...]]] = {}
         self._next_id: int = 1
+        self._revision: int = 0
         self._lock = threading.Lock()
 
+    def _replace_all(self, bookmarks: list[Bookmark], next_id: int, revision: int = 0):
+        """Swap in a complete set of bookmarks (used by CachedFileRepository)."""
+        with self._lock:
+            # Never move backwards, even if the new data carries a lower revision
+            self._revision = max(self._revision + 1, revision)
+            self._store = {b.id: b for b in bookmarks}
+            self._by_url, self._by_tag, self._by_domain = {}, {}, {}
+            self._index_keys = {}
+            for b in bookmarks:
+                self._index(b)
+            self._next_id = next_id
+
     def save(self, bookmark: Bookmark) -> Bookmark:
         with self._lock:
             bookmark.id = self._next_id
             self._store[bookmark.id] = bookmark
+            self._index(bookmark)
             self._next_id += 1
+            self._revision += 1
         return bookmark
 
     def get(self, bookmark_id: int) -> Optional[Bookmark]:
         return self._store.get(bookmark_id)
 
     def list_all(self) -> list[Bookmark]:
-        return list(self._store.values())
+        with self._lock:
+            return list(self._store.values())
 
     def delete(self, bookmark_id: int) -> Bookmark:
         with self._lock:
             bookmark = self._store.pop(bookmark_id, None)
             if not bookmark:
                 raise NotFoundError(f"Bookmark #{bookmark_id} not found")
+            self._unindex(bookmark_id)
+            self._revision += 1
             return bookmark
 
     def update(self, bookmark: Bookmark) -> Bookmark:
         with self._lock:
             if bookmark.id not in self._store:
                 raise NotFoundError(f"Bookmark #{bookmark.id} not found")
+            self._unindex(bookmark.id)
             self._store[bookmark.id] = bookmark
+            self._index(bookmark)
+            self._revision += 1
         return bookmark
 
     def find_by_tag(self, tag: str) -> list[Bookmark]:
-        tag = tag.lower()
-        return [b for b in self._store.values() if tag in b.tags]
+        with self._lock:
+            return self._lookup(self._by_tag.get(tag.lower()))
 
     def find_by_domain(self, domain: str) -> list[Bookmark]:
-        domain = domain.lower()
-        return [b for b in self._store.values() if b.domain.lower() == domain]
+        with self._lock:
+            return self._lookup(self._by_domain.get(domain.lower()))
+
+    def find_by_url(self, url: str) -> Optional[Bookmark]:
+        bookmark_id = self._by_url.get(normalize_url(url))
+        return self._store.get(bookmark_id) if bookmark_id is not None else None
 
     def count(self) -> int:
         return len(self._store)
 
+    def revision(self) -> int:
+        return self._revision
+
+    def _lookup(self, ids: Optional[set[int]]) -> list[Bookmark]:
+        """Bookmarks for a set of ids, in id order (the order of a full scan)."""
+        return [self._store[i] for i in sorted(ids)] if ids else []
+
+    def _index(self, bookmark: Bookmark):
+        url_key = normalize_url(bookmark.url)
+        domain = bookmark.domain.lower()
+        tags = tuple(set(bookmark.tags))
+        self._by_url[url_key] = bookmark.id
+        self._by_domain.setdefault(domain, set()).add(bookmark.id)
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(bookmark.id)
+        self._index_keys[bookmark.id] = (url_key, domain, tags)
+
+    def _unindex(self, bookmark_id: int):
+        keys = self._index_keys.pop(bookmark_id, None)
+        if keys is None:
+            return
+        url_key, domain, tags = keys
+        if self._by_url.get(url_key) == bookmark_id:
+            del self._by_url[url_key]
+        self._discard(self._by_domain, domain, bookmark_id)
+        for tag in tags:
+            self._discard(self._by_tag, tag, bookmark_id)
+
+    @staticmethod
+    def _discard(index: dict[str, set[int]], key: str, bookmark_id: int):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(bookmark_id)
+            if not ids:
+                del index[key]
+
 
 class FileRepository(BaseRepository):
     """JSON file-based storage with file locking."""
 
-    def __init__(self, filepath: str = Config.DATA_FILE):
+    def __init__(self, filepath: str = Config.DATA_FILE, fsync: bool = Config.FSYNC):
         self._filepath = Path(filepath)
+        self._fsync = fsync
         self._lock = threading.Lock()
+        # Shared with every process writing the same file (see locking.py)
+        self._file_lock = FileLock(self._filepath.with_name(self._filepath.name + ".lock"))
+        self._revision_cache: tuple[Optional[tuple], int] = (None, 0)
         self._ensure_file()
 
     def _ensure_file(self):
-        if not self._filepath.exists():
-            self._write({"next_id": 1, "bookmarks": []})
+        with self._file_lock:
+            if not self._filepath.exists():
+                self._write({"next_id": 1, "revision": 0, "bookmarks": []})
 
     def _read(self) -> dict:
         try:
@@ -105,21 +246,65 @@ class FileRepository(BaseRepository):
         except json.JSONDecodeError as e:
             raise StorageError(f"Corrupted data file: {e}")
 
-    def _write(self, data: dict):
+    def _write(self, data: dict) -> tuple:
+        """Replace the data file; returns the new file's stat signature."""
+        # Write a temp file and rename it over the original, so concurrent
+        # readers never see a half-written file. The temp name is unique, so
+        # two processes writing at once can't clobber each other's file.
+        tmp = None
         try:
             self._filepath.parent.mkdir(parents=True, exist_ok=True)
-            with open(self._filepath, "w") as f:
+            fd, tmp = tempfile.mkstemp(dir=self._filepath.parent,
+                                       prefix=f"{self._filepath.name}.", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
                 json.dump(data, f, indent=2)
+                if self._fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            # mkstemp files are private; keep the data file's own mode
+            os.chmod(tmp, self._file_mode())
+            # Taken before the rename, so a writer that replaces the file
+            # right after us can't be mistaken for our write
+            signature = self._signature_of(os.stat(tmp))
+            os.replace(tmp, self._filepath)
+            return signature
         except OSError as e:
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
             raise StorageError(f"Failed to write data file: {e}")
 
+    def _file_mode(self) -> int:
+        try:
+            return stat.S_IMODE(os.stat(self._filepath).st_mode)
+        except FileNotFoundError:
+            return 0o644
+
+    def _write_next(self, data: dict):
+        """Write a changed store under the next revision."""
+        data["revision"] = data.get("revision", 0) + 1
+        # Count any replacement we haven't seen yet before our own write
+        current = self.revision()
+        # We know what we just wrote, so revision() needn't parse it again
+        self._revision_cache = (self._write(data), max(current + 1, data["revision"]))
+
+    def _stat_signature(self) -> Optional[tuple]:
+        """Identifies the current file contents without reading them."""
+        try:
+            return self._signature_of(os.stat(self._filepath))
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _signature_of(st: os.stat_result) -> tuple:
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
     def save(self, bookmark: Bookmark) -> Bookmark:
-        with self._lock:
+        with self._lock, self._file_lock:
             data = self._read()
-            bookmark.id = data["next_id"]
+            bookmark.id = self._file_lock.reserve_id(data["next_id"])
             data["bookmarks"].append(bookmark.to_dict())
-            data["next_id"] += 1
-            self._write(data)
+            data["next_id"] = bookmark.id + 1
+            self._write_next(data)
         return bookmark
 
     def get(self, bookmark_id: int) -> Optional[Bookmark]:
@@ -134,22 +319,22 @@ class FileRepository(BaseRepository):
         return [Bookmark.from_dict(b) for b in data["bookmarks"]]
 
     def delete(self, bookmark_id: int) -> Bookmark:
-        with self._lock:
+        with self._lock, self._file_lock:
             data = self._read()
             for i, entry in enumerate(data["bookmarks"]):
                 if entry["id"] == bookmark_id:
                     removed = data["bookmarks"].pop(i)
-                    self._write(data)
+                    self._write_next(data)
                     return Bookmark.from_dict(removed)
             raise NotFoundError(f"Bookmark #{bookmark_id} not found")
 
     def update(self, bookmark: Bookmark) -> Bookmark:
-        with self._lock:
+        with self._lock, self._file_lock:
             data = self._read()
             for i, entry in enumerate(data["bookmarks"]):
                 if entry["id"] == bookmark.id:
                     data["bookmarks"][i] = bookmark.to_dict()
-                    self._write(data)
+                    self._write_next(data)
                     return bookmark
             raise NotFoundError(f"Bookmark #{bookmark.id} not found")
 
@@ -161,10 +346,477 @@ class FileRepository(BaseRepository):
         domain = domain.lower()
         return [b for b in self.list_all() if b.domain.lower() == domain]
 
+    def find_by_url(self, url: str) -> Optional[Bookmark]:
+        # The file is re-read on every call anyway, so there is no index to
+        # keep; compare raw entries without building every Bookmark.
+        key = normalize_url(url)
+        for entry in self._read()["bookmarks"]:
+            if normalize_url(entry["url"]) == key:
+                return Bookmark.from_dict(entry)
+        return None
+
     def count(self) -> int:
         data = self._read()
         return len(data["bookmarks"])
 
+    def revision(self) -> int:
+        """A counter that moves whenever the file is replaced.
+
+        The stored "revision" key alone isn't enough: a hand edit, or another
+        process writing the same revision, would leave it unchanged. So any
+        new stat signature moves the counter on, like _replace_all does for
+        the in-memory store, and the stored value only ever raises it.
+        """
+        signature = self._stat_signature()
+        cached_signature, current = self._revision_cache
+        if signature != cached_signature:
+            stored = self._read().get("revision", 0)
+            self._revision_cache = (signature, max(current + 1, stored))
+        return self._revision_cache[1]
+
+
+class CachedFileRepository(InMemoryRepository):
+    """JSON file storage served from memory, with write-behind persistence.
+
+    Reads are answered from the in-memory store. The file is only re-read
+    when its mtime, size or inode changes, i.e. when another process
+    replaced it. Mutations mark the store dirty and a background thread
+    writes it out every `flush_interval` seconds (0 writes on every
+    mutation).
+
+    If another process replaces the file while changes are pending, the
+    file is merged with them instead of being overwritten (see _merge).
+    The store lock is held across every reload and mutation, so a reload
+    can never swap out a write that has not reached the file yet. A flush
+    holds the inter-process file lock from its merge to its write, but the
+    store lock only while it copies the store, so reads don't wait for disk.
+    New ids are reserved through the file lock (see locking.py), so they
+    are never handed out twice, however long they sit unflushed.
+    """
+
+    def __init__(self, filepath: str = Config.DATA_FILE,
+                 flush_interval: float = Config.FLUSH_INTERVAL,
+                 fsync: bool = Config.FSYNC):
+        super().__init__()
+        # Re-entrant: mutations call the base class and flush() with it held
+        self._lock = threading.RLock()
+        self._file = FileRepository(filepath, fsync=fsync)
+        self._flush_interval = flush_interval
+        self._dirty = False
+        # Bumped by every mutation, so a flush can tell if it missed one
+        self._generation = 0
+        self._flushing = False
+        # Ids changed since the last flush, and the subset we created
+        self._touched: set[int] = set()
+        self._created: set[int] = set()
+        self._signature: Optional[tuple] = None
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._sync()
+        if flush_interval > 0:
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name="bookmark-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def save(self, bookmark: Bookmark) -> Bookmark:
+        file_lock = self._file._file_lock
+        with file_lock, self._lock:
+            self._sync()
+            self._next_id = file_lock.reserve_id(self._next_id)
+            bookmark = super().save(bookmark)
+            self._created.add(bookmark.id)
+            self._mark_dirty(bookmark.id)
+        self._write_through()
+        return bookmark
+
+    def get(self, bookmark_id: int) -> Optional[Bookmark]:
+        self._sync()
+        return super().get(bookmark_id)
+
+    def list_all(self) -> list[Bookmark]:
+        self._sync()
+        return super().list_all()
+
+    def delete(self, bookmark_id: int) -> Bookmark:
+        with self._lock:
+            self._sync()
+            bookmark = super().delete(bookmark_id)
+            self._mark_dirty(bookmark_id)
+        self._write_through()
+        return bookmark
+
+    def update(self, bookmark: Bookmark) -> Bookmark:
+        with self._lock:
+            self._sync()
+            bookmark = super().update(bookmark)
+            self._mark_dirty(bookmark.id)
+        self._write_through()
+        return bookmark
+
+    def find_by_tag(self, tag: str) -> list[Bookmark]:
+        self._sync()
+        return super().find_by_tag(tag)
+
+    def find_by_domain(self, domain: str) -> list[Bookmark]:
+        self._sync()
+        return super().find_by_domain(domain)
+
+    def find_by_url(self, url: str) -> Optional[Bookmark]:
+        self._sync()
+        return super().find_by_url(url)
+
+    def count(self) -> int:
+        self._sync()
+        return super().count()
+
+    def revision(self) -> int:
+        self._sync()
+        return super().revision()
+
+    def flush(self):
+        """Write pending changes to the data file now."""
+        # No other process can replace the file between our merge and write
+        with self._file._file_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # Merge in anything another process wrote since our last look
+                self._sync()
+                data = {
+                    "next_id": self._next_id,
+                    "revision": self._revision,
+                    "bookmarks": [b.to_dict() for b in self._store.values()],
+                }
+                generation, created = self._generation, set(self._created)
+                self._flushing = True
+            try:
+                # Still dirty while writing, so a failed write is retried
+                signature = self._file._write(data)
+            finally:
+                with self._lock:
+                    self._flushing = False
+            with self._lock:
+                self._signature = signature
+                # Ours are on disk now, so they are no longer "created here"
+                self._created -= created
+                if self._generation == generation:
+                    self._dirty = False
+                    self._touched.clear()
+
+    def close(self):
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def _mark_dirty(self, bookmark_id: int):
+        """Call with the lock held, right after changing the store."""
+        self._touched.add(bookmark_id)
+        self._dirty = True
+        self._generation += 1
+
+    def _write_through(self):
+        """Flush now when not writing behind (call without the locks held)."""
+        if self._flush_interval == 0:
+            self.flush()
+
+    def _sync(self):
+        """Pick up the data file if another process replaced it."""
+        with self._lock:
+            # Mid-flush the file is ours (we hold the file lock); its new
+            # signature is recorded once the write returns
+            if self._flushing:
+                return
+            signature = self._file._stat_signature()
+            if signature == self._signature:
+                return
+            data = self._file._read()
+            if self._dirty:
+                self._merge(data)
+            else:
+                self._replace_all(
+                    [Bookmark.from_dict(b) for b in data["bookmarks"]],
+                    data["next_id"],
+                    data.get("revision", 0),
+                )
+            self._signature = signature
+
+    def _merge(self, data: dict):
+        """Combine newer file contents with changes not flushed yet.
+
+        Bookmarks we changed or deleted keep our version; everything else
+        comes from the file. Ids are reserved through the file lock, so two
+        repositories never create the same one; if a writer that bypasses
+        the lock (a hand edit) did, ours moves to a fresh id rather than
+        replacing theirs.
+        """
+        merged = {entry["id"]: Bookmark.from_dict(entry) for entry in data["bookmarks"]}
+        next_id = max(data["next_id"], self._next_id)
+        touched, created = set(), set()
+        for bookmark_id in sorted(self._touched):
+            mine = self._store.get(bookmark_id)
+            if mine is None:
+                # Deleted here; an id we created never reached the file
+                if bookmark_id not in self._created:
+                    merged.pop(bookmark_id, None)
+                continue
+            if bookmark_id in self._created:
+                if bookmark_id in merged:
+                    logger.warning(
+                        f"Bookmark #{bookmark_id} was also created by another "
+                        f"process; storing ours as #{next_id}"
+                    )
+                    mine.id = next_id
+                    next_id += 1
+                created.add(mine.id)
+            merged[mine.id] = mine
+            touched.add(mine.id)
+        self._touched, self._created = touched, created
+        self._replace_all(
+            sorted(merged.values(), key=lambda b: b.id), next_id, data.get("revision", 0)
+        )
+
+    def _run_flusher(self):
+        while not self._closed.wait(self._flush_interval):
+            try:
+                self.flush()
+            except StorageError as e:
+                logger.error(f"Write-behind flush failed, will retry: {e}")
+
+
+class SqliteRepository(BaseRepository):
+    """SQLite storage with indexed lookups.
+
+    Tags live in a join table, so tag and domain filters use indexes
+    instead of scanning. The database runs in WAL mode, so readers don't
+    block the writer. Each thread gets its own connection, because sqlite3
+    connections must not be shared between threads; connections of threads
+    that have exited are closed when the next one is opened.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS bookmarks (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            url         TEXT NOT NULL,
+            url_key     TEXT NOT NULL,
+            title       TEXT NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            domain      TEXT NOT NULL,
+            created_at  TEXT NOT NULL,
+            updated_at  TEXT,
+            visit_count INTEGER NOT NULL DEFAULT 0,
+            is_archived INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS bookmark_tags (
+            bookmark_id INTEGER NOT NULL REFERENCES bookmarks(id) ON DELETE CASCADE,
+            tag         TEXT NOT NULL,
+            position    INTEGER NOT NULL,
+            PRIMARY KEY (bookmark_id, tag)
+        );
+        CREATE INDEX IF NOT EXISTS idx_bookmarks_url_key ON bookmarks(url_key);
+        CREATE INDEX IF NOT EXISTS idx_bookmarks_domain ON bookmarks(domain);
+        CREATE INDEX IF NOT EXISTS idx_bookmarks_created_at ON bookmarks(created_at);
+        CREATE INDEX IF NOT EXISTS idx_bookmark_tags_tag ON bookmark_tags(tag);
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+    """
+
+    COLUMNS = ("id", "url", "title", "description", "created_at",
+               "updated_at", "visit_count", "is_archived")
+
+    # SQL for SORT_KEYS. py_lower is Python's str.lower, so cursors built
+    # from SORT_KEYS compare the same way for non-ASCII titles.
+    SORT_COLUMNS = {
+        "created": "created_at",
+        "title": "py_lower(title)",
+        "visits": "-visit_count",
+        "domain": "domain",
+    }
+
+    def __init__(self, filepath: str = Config.SQLITE_FILE):
+        self._filepath = filepath
+        self._local = threading.local()
+        self._connections: dict[threading.Thread, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        with self._conn() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                # check_same_thread=False only so close() can close every
+                # connection; each one is still used by a single thread.
+                conn = sqlite3.connect(self._filepath, timeout=10, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA foreign_keys=ON")
+                conn.create_function("py_lower", 1, str.lower, deterministic=True)
+            except sqlite3.Error as e:
+                raise StorageError(f"Cannot open database {self._filepath}: {e}")
+            self._local.conn = conn
+            with self._lock:
+                for thread in [t for t in self._connections if not t.is_alive()]:
+                    self._connections.pop(thread).close()
+                self._connections[threading.current_thread()] = conn
+        return conn
+
+    def save(self, bookmark: Bookmark) -> Bookmark:
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT INTO bookmarks (url, url_key, title, description, domain, created_at,"
+                " updated_at, visit_count, is_archived) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (bookmark.url, normalize_url(bookmark.url), bookmark.title, bookmark.description,
+                 bookmark.domain.lower(), bookmark.created_at, bookmark.updated_at,
+                 bookmark.visit_count, int(bookmark.is_archived)),
+            )
+            bookmark.id = cur.lastrowid
+            self._insert_tags(conn, bookmark)
+            self._bump_revision(conn)
+        return bookmark
+
+    def get(self, bookmark_id: int) -> Optional[Bookmark]:
+        found = self._select("WHERE id = ?", (bookmark_id,))
+        return found[0] if found else None
+
+    def list_all(self) -> list[Bookmark]:
+        return self._select("", ())
+
+    def delete(self, bookmark_id: int) -> Bookmark:
+        with self._conn() as conn:
+            bookmark = self.get(bookmark_id)
+            if not bookmark:
+                raise NotFoundError(f"Bookmark #{bookmark_id} not found")
+            conn.execute("DELETE FROM bookmarks WHERE id = ?", (bookmark_id,))
+            self._bump_revision(conn)
+        return bookmark
+
+    def update(self, bookmark: Bookmark) -> Bookmark:
+        with self._conn() as conn:
+            cur = conn.execute(
+                "UPDATE bookmarks SET url = ?, url_key = ?, title = ?, description = ?,"
+                " domain = ?, created_at = ?, updated_at = ?, visit_count = ?,"
+                " is_archived = ? WHERE id = ?",
+                (bookmark.url, normalize_url(bookmark.url), bookmark.title, bookmark.description,
+                 bookmark.domain.lower(), bookmark.created_at, bookmark.updated_at,
+                 bookmark.visit_count, int(bookmark.is_archived), bookmark.id),
+            )
+            if cur.rowcount == 0:
+                raise NotFoundError(f"Bookmark #{bookmark.id} not found")
+            conn.execute("DELETE FROM bookmark_tags WHERE bookmark_id = ?", (bookmark.id,))
+            self._insert_tags(conn, bookmark)
+            self._bump_revision(conn)
+        return bookmark
+
+    def find_by_tag(self, tag: str) -> list[Bookmark]:
+        return self._select(
+            "WHERE id IN (SELECT bookmark_id FROM bookmark_tags WHERE tag = ?)",
+            (tag.lower(),),
+        )
+
+    def find_by_domain(self, domain: str) -> list[Bookmark]:
+        return self._select("WHERE domain = ?", (domain.lower(),))
+
+    def find_by_url(self, url: str) -> Optional[Bookmark]:
+        found = self._select("WHERE url_key = ?", (normalize_url(url),))
+        return found[0] if found else None
+
+    def query(
+        self,
+        tag: Optional[str] = None,
+        domain: Optional[str] = None,
+        include_archived: bool = False,
+        sort_by: str = "created",
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+    ) -> list[Bookmark]:
+        clauses, params = [], []
+        if tag:
+            clauses.append("id IN (SELECT bookmark_id FROM bookmark_tags WHERE tag = ?)")
+            params.append(tag.lower())
+        elif domain:
+            clauses.append("domain = ?")
+            params.append(domain.lower())
+        if not include_archived:
+            clauses.append("is_archived = 0")
+        order = self.SORT_COLUMNS.get(sort_by, self.SORT_COLUMNS["created"])
+        if after is not None:
+            clauses.append(f"({order}, id) > (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._select(where, tuple(params), order=f"{order}, id", limit=limit)
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM bookmarks").fetchone()[0]
+
+    def revision(self) -> int:
+        return self._conn().execute(
+            "SELECT value FROM meta WHERE key = 'revision'"
+        ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    @staticmethod
+    def _bump_revision(conn: sqlite3.Connection):
+        # Same transaction as the change, so readers never see one without the other
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+
+    @staticmethod
+    def _insert_tags(conn: sqlite3.Connection, bookmark: Bookmark):
+        conn.executemany(
+            "INSERT OR IGNORE INTO bookmark_tags (bookmark_id, tag, position)"
+            " VALUES (?, ?, ?)",
+            [(bookmark.id, tag, i) for i, tag in enumerate(bookmark.tags)],
+        )
+
+    def _select(self, where: str, params: tuple, order: str = "id",
+                limit: Optional[int] = None) -> list[Bookmark]:
+        """Load the bookmarks matching `where`, with their tags, in `order`."""
+        conn = self._conn()
+        tail = f"{where} ORDER BY {order}"
+        if limit is not None:
+            tail += " LIMIT ?"
+            params += (limit,)
+        # Both SELECTs read the same snapshot, so a write committed between
+        # them can't pair rows with another version's tags.
+        own_transaction = not conn.in_transaction
+        try:
+            if own_transaction:
+                conn.execute("BEGIN")
+            try:
+                rows = conn.execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM bookmarks {tail}", params
+                ).fetchall()
+                tags: dict[int, list[str]] = {}
+                for bookmark_id, tag in conn.execute(
+                    "SELECT bookmark_id, tag FROM bookmark_tags WHERE bookmark_id IN"
+                    f" (SELECT id FROM bookmarks {tail}) ORDER BY bookmark_id, position",
+                    params,
+                ):
+                    tags.setdefault(bookmark_id, []).append(tag)
+            finally:
+                if own_transaction:
+                    conn.commit()
+        except sqlite3.Error as e:
+            raise StorageError(f"Database query failed: {e}")
+        bookmarks = []
+        for row in rows:
+            data = dict(zip(self.COLUMNS, row))
+            data["is_archived"] = bool(data["is_archived"])
+            data["tags"] = tags.get(data["id"], [])
+            bookmarks.append(Bookmark.from_dict(data))
+        return bookmarks
+
 
 def create_repository(backend: str = Config.STORAGE_BACKEND) -> BaseRepository:
     """Factory function to create the configured repository."""
@@ -172,5 +824,9 @@ def create_repository(backend: str = Config.STORAGE_BACKEND) -> BaseRepository:
         return InMemoryRepository()
     elif backend == "file":
         return FileRepository()
+    elif backend == "cached":
+        return CachedFileRepository()
+    elif backend == "sqlite":
+        return SqliteRepository()
     else:
         raise ValueError(f"Unknown storage backend: {backend}")
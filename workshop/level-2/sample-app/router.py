@@ -0,0 +1,92 @@
+"""Declarative routing — method + path template → handler name.
+
+Templates look like `/bookmarks/{id:int}/visit`. All templates are
+compiled into a single regex with one named group per template, so a
+lookup is one `match()` plus a dict lookup however many routes exist.
+"""
+
+import re
+from typing import NamedTuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from errors import MethodNotAllowedError, NotFoundError
+
+# Placeholder types: regex and converter
+CONVERTERS = {
+    "int": (r"\d+", int),
+    "str": (r"[^/]+", str),
+}
+
+PLACEHOLDER = re.compile(r"\{(\w+)(?::(\w+))?\}")
+
+
+class Route(NamedTuple):
+    method: str
+    template: str
+    handler: str
+    status: int = 200
+
+
+class Match(NamedTuple):
+    handler: str
+    status: int
+    params: dict
+    query: dict
+
+
+class Router:
+    """Compiled route table."""
+
+    def __init__(self, routes: list[Route]):
+        # One entry per distinct template: group name, params, methods
+        templates: dict[str, dict[str, Route]] = {}
+        for route in routes:
+            templates.setdefault(route.template, {})[route.method] = route
+
+        parts = []
+        self._groups: dict[str, tuple[list, dict[str, Route]]] = {}
+        for i, (template, methods) in enumerate(templates.items()):
+            group = f"r{i}"
+            pattern, params = self._compile_template(template, group)
+            parts.append(f"(?P<{group}>{pattern})")
+            self._groups[group] = (params, methods)
+        self._regex = re.compile(f"^(?:{'|'.join(parts)})$")
+
+    @staticmethod
+    def _compile_template(template: str, group: str) -> tuple[str, list]:
+        """Regex for one template; params are (name, group, converter)."""
+        pattern, params, pos = "", [], 0
+        for m in PLACEHOLDER.finditer(template):
+            name, kind = m.group(1), m.group(2) or "str"
+            regex, convert = CONVERTERS[kind]
+            param_group = f"{group}_{name}"
+            pattern += re.escape(template[pos:m.start()]) + f"(?P<{param_group}>{regex})"
+            params.append((name, param_group, convert))
+            pos = m.end()
+        return pattern + re.escape(template[pos:]), params
+
+    def match(self, method: str, path: str) -> Match:
+        """Resolve a request; raises NotFoundError or MethodNotAllowedError."""
+        split = urlsplit(path)
+        clean_path = unquote(split.path).rstrip("/")
+        m = self._regex.match(clean_path)
+        if not m:
+            raise NotFoundError(f"Not found: {method} {split.path}")
+        # The enclosing template group closes last, so it is lastgroup
+        params, methods = self._groups[m.lastgroup]
+        route = methods.get(method)
+        if route is None:
+            raise MethodNotAllowedError(
+                f"{method} not allowed on {split.path}", allowed=sorted(methods)
+            )
+        return Match(
+            route.handler,
+            route.status,
+            {name: convert(m.group(group)) for name, group, convert in params},
+            parse_query(split.query),
+        )
+
+
+def parse_query(query: str) -> dict[str, str]:
+    """Decode a query string; the last value wins for repeated keys."""
+    return {k: v[-1] for k, v in parse_qs(query, keep_blank_values=True).items()}
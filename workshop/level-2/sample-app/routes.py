@@ -1,19 +1,24 @@
 """HTTP route handlers for the bookmark API."""
 
-import json
-import re
 import logging
 from http.server import BaseHTTPRequestHandler
-from typing import Optional
 
+from cache import CachedResponse, ResponseCache, etag_matches
+from config import Config
 from service import BookmarkService
-from errors import AppError, AuthenticationError
+from errors import AppError, AuthenticationError, ValidationError
+from router import Route, Router
 from middleware import (
     RequestContext,
     check_auth,
+    negotiate_encoding,
     parse_json_body,
-    send_json_response,
+    render_json,
+    send_body,
     send_error_response,
+    send_json_response,
+    send_not_modified,
+    should_stream,
 )
 
 logger = logging.getLogger("routes")
@@ -24,6 +29,27 @@ class BookmarkHandler(BaseHTTPRequestHandler):
 
     # Injected by app.py at startup
     service: BookmarkService = None  # type: ignore
+    response_cache: ResponseCache = None  # type: ignore
+
+    # Set by parse_json_body once the request body has been read
+    body_consumed: bool = False
+
+    # Decoded query string of the current request
+    query: dict[str, str] = {}
+
+    router = Router([
+        Route("GET", "/bookmarks", "_list_bookmarks"),
+        Route("POST", "/bookmarks", "_create_bookmark", 201),
+        Route("GET", "/bookmarks/{bid:int}", "_get_bookmark"),
+        Route("PUT", "/bookmarks/{bid:int}", "_update_bookmark"),
+        Route("DELETE", "/bookmarks/{bid:int}", "_delete_bookmark"),
+        Route("POST", "/bookmarks/{bid:int}/visit", "_visit_bookmark"),
+        Route("POST", "/bookmarks/{bid:int}/archive", "_archive_bookmark"),
+        Route("POST", "/bookmarks/{bid:int}/restore", "_restore_bookmark"),
+        Route("GET", "/tags", "_list_tags"),
+        Route("GET", "/stats", "_get_stats"),
+        Route("GET", "/health", "_health"),
+    ])
 
     def do_GET(self):
         self._handle_request("GET")
@@ -45,6 +71,8 @@ class BookmarkHandler(BaseHTTPRequestHandler):
         """Central dispatcher with auth, logging, and error handling."""
         ctx = RequestContext(method, self.path, self.client_address[0])
         ctx.log_start()
+        self.body_consumed = False
+        self.headers_sent = False
 
         try:
             # Auth check
@@ -52,85 +80,107 @@ class BookmarkHandler(BaseHTTPRequestHandler):
                 raise AuthenticationError("Invalid or missing authentication token")
 
             # Route dispatch
-            response, status = self._dispatch(method, self.path)
-            send_json_response(self, response, status)
+            if method == "GET" and self.response_cache is not None:
+                status = self._cached_get()
+            else:
+                response, status = self._dispatch(method, self.path)
+                send_json_response(self, response, status)
             ctx.log_end(status)
 
-        except AppError as e:
-            send_error_response(self, e)
-            ctx.log_end(e.status_code)
-
         except Exception as e:
-            logger.exception(f"Unhandled error: {e}")
-            err = AppError("Internal server error")
-            send_error_response(self, err)
-            ctx.log_end(500)
+            if self.headers_sent or isinstance(e, ConnectionError):
+                self._abort_response(e)
+            elif isinstance(e, AppError):
+                send_error_response(self, e)
+                ctx.log_end(e.status_code)
+            else:
+                logger.exception(f"Unhandled error: {e}")
+                err = AppError("Internal server error")
+                send_error_response(self, err)
+                ctx.log_end(500)
+
+        # On a keep-alive connection an unread body would be parsed as the
+        # next request, so drop the connection instead.
+        if not self.body_consumed and int(self.headers.get("Content-Length", 0) or 0):
+            self.close_connection = True
+
+    def _abort_response(self, error: Exception):
+        """Drop the connection when an error can't get a response of its own.
+
+        Once the status line is out, a second one would land in the middle
+        of the body; and a client that went away can't be answered at all.
+        """
+        self.close_connection = True
+        if isinstance(error, ConnectionError):
+            logger.debug(f"Client {self.client_address[0]} went away: {error}")
+        else:
+            logger.exception(f"Error after the response started: {error}")
 
     def _dispatch(self, method: str, path: str) -> tuple[dict | list, int]:
-        """Match the path and method to a handler function."""
-        # Strip query string for path matching
-        clean_path = path.split("?")[0].rstrip("/")
-        query = self._parse_query(path)
-
-        # GET /bookmarks
-        if method == "GET" and clean_path == "/bookmarks":
-            return self._list_bookmarks(query), 200
-
-        # POST /bookmarks
-        if method == "POST" and clean_path == "/bookmarks":
-            return self._create_bookmark(), 201
-
-        # GET /bookmarks/:id
-        match = re.match(r"^/bookmarks/(\d+)$", clean_path)
-        if match:
-            bid = int(match.group(1))
-            if method == "GET":
-                return self._get_bookmark(bid), 200
-            if method == "DELETE":
-                return self._delete_bookmark(bid), 200
-            if method == "PUT":
-                return self._update_bookmark(bid), 200
-
-        # POST /bookmarks/:id/visit
-        match = re.match(r"^/bookmarks/(\d+)/visit$", clean_path)
-        if match and method == "POST":
-            return self._visit_bookmark(int(match.group(1))), 200
-
-        # POST /bookmarks/:id/archive
-        match = re.match(r"^/bookmarks/(\d+)/archive$", clean_path)
-        if match and method == "POST":
-            return self._archive_bookmark(int(match.group(1))), 200
-
-        # POST /bookmarks/:id/restore
-        match = re.match(r"^/bookmarks/(\d+)/restore$", clean_path)
-        if match and method == "POST":
-            return self._restore_bookmark(int(match.group(1))), 200
-
-        # GET /tags
-        if method == "GET" and clean_path == "/tags":
-            return self._list_tags(), 200
-
-        # GET /stats
-        if method == "GET" and clean_path == "/stats":
-            return self._get_stats(), 200
-
-        # GET /health
-        if method == "GET" and clean_path == "/health":
-            return {"status": "ok"}, 200
-
-        raise AppError(f"Not found: {method} {path}")
+        """Resolve the route and call its handler with the path parameters."""
+        match = self.router.match(method, path)
+        self.query = match.query
+        return getattr(self, match.handler)(**match.params), match.status
+
+    def _cached_get(self) -> int:
+        """Serve a GET from the response cache, or with 304 if the client is current.
+
+        Everything a GET returns is derived from the store, so the store
+        revision is a validator for every resource. A 304 is only sent for
+        a request that would otherwise succeed: unknown routes and missing
+        bookmarks raise from _dispatch, and only 2xx bodies are cached.
+        """
+        revision = self.service.revision()
+        etag, last_modified = self.response_cache.validators(revision)
+        headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "no-cache"}
+        not_modified = etag_matches(self.headers.get("If-None-Match"), etag)
+
+        coding = negotiate_encoding(self.headers.get("Accept-Encoding", ""))
+        key = (self.path, coding)
+        cached = self.response_cache.get(revision, key)
+        if cached is None:
+            response, status = self._dispatch("GET", self.path)
+            if not_modified:
+                send_not_modified(self, headers)
+                return 304
+            if should_stream(self, response):
+                # Too big to buffer, so too big to cache
+                send_json_response(self, response, status, headers)
+                return status
+            body, applied = render_json(response, coding)
+            cached = CachedResponse(status, body, applied)
+            self.response_cache.put(revision, key, cached)
+        elif not_modified:
+            send_not_modified(self, headers)
+            return 304
+        send_body(self, cached.status, cached.body, cached.content_encoding, headers)
+        return cached.status
 
     # ── Handler methods ─────────────────────────────────────────
 
-    def _list_bookmarks(self, query: dict) -> list:
+    def _list_bookmarks(self) -> list | dict:
+        query = self.query
         tag = query.get("tag")
         domain = query.get("domain")
         sort_by = query.get("sort", "created")
         include_archived = query.get("archived", "false").lower() == "true"
-        bookmarks = self.service.list_bookmarks(
-            tag=tag, domain=domain, sort_by=sort_by, include_archived=include_archived
+        fields = [f for f in query["fields"].split(",") if f] if "fields" in query else None
+        if "limit" not in query and "cursor" not in query:
+            bookmarks = self.service.list_bookmarks(
+                tag=tag, domain=domain, sort_by=sort_by, include_archived=include_archived
+            )
+            return self.service.project(bookmarks, fields)
+
+        # Paginated: wrap the page so the next cursor can travel with it
+        try:
+            limit = int(query.get("limit", Config.DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ValidationError("limit must be an integer", field="limit")
+        page, next_cursor = self.service.list_page(
+            tag=tag, domain=domain, sort_by=sort_by, include_archived=include_archived,
+            limit=limit, cursor=query.get("cursor"),
         )
-        return [b.to_dict() for b in bookmarks]
+        return {"bookmarks": self.service.project(page, fields), "next_cursor": next_cursor}
 
     def _create_bookmark(self) -> dict:
         body = parse_json_body(self)
@@ -151,16 +201,9 @@ class BookmarkHandler(BaseHTTPRequestHandler):
 
     def _update_bookmark(self, bid: int) -> dict:
         body = parse_json_body(self)
-        bookmark = self.service.get_bookmark(bid)
         # Only update provided fields
-        if "title" in body:
-            bookmark.title = body["title"]
-        if "description" in body:
-            bookmark.description = body["description"]
-        if "tags" in body:
-            bookmark.tags = body["tags"]
-        bookmark._validate()
-        return self.service._repo.update(bookmark).to_dict()
+        fields = {k: body[k] for k in ("title", "description", "tags") if k in body}
+        return self.service.update_bookmark(bid, **fields).to_dict()
 
     def _visit_bookmark(self, bid: int) -> dict:
         return self.service.visit_bookmark(bid).to_dict()
@@ -177,17 +220,5 @@ class BookmarkHandler(BaseHTTPRequestHandler):
     def _get_stats(self) -> dict:
         return self.service.get_stats()
 
-    # ── Helpers ──────────────────────────────────────────────────
-
-    @staticmethod
-    def _parse_query(path: str) -> dict:
-        """Parse query string from a URL path."""
-        if "?" not in path:
-            return {}
-        query_str = path.split("?", 1)[1]
-        params = {}
-        for pair in query_str.split("&"):
-            if "=" in pair:
-                k, v = pair.split("=", 1)
-                params[k] = v
-        return params
+    def _health(self) -> dict:
+        return {"status": "ok"}
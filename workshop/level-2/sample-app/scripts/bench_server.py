@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Serving benchmark — compares the single, threaded and asyncio servers.
+
+Each mode is started as `app.py --storage memory` in a subprocess. It is
+seeded with bookmarks and then driven by an asyncio load generator that
+keeps `--clients` keep-alive connections busy. A connection that the
+server closes (HTTP/1.0 in single mode) is reopened for the next request.
+
+Usage:
+    python scripts/bench_server.py                         # 10 and 100 clients
+    python scripts/bench_server.py --clients 1000 --requests 20 --modes asyncio threaded
+    python scripts/bench_server.py --path "/bookmarks?tag=python"
+    python scripts/bench_server.py --bookmarks 2000 --path /bookmarks   # chunked
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+APP = str(Path(__file__).resolve().parent.parent / "app.py")
+MODES = ["single", "threaded", "asyncio"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(mode: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "BM_LOG_LEVEL": "WARNING", "BM_MAX_BOOKMARKS": "1000000"}
+    proc = subprocess.Popen(
+        [sys.executable, APP, "--server", mode, "--storage", "memory",
+         "--host", "127.0.0.1", "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def seed(port: int, count: int):
+    for i in range(count):
+        body = json.dumps({
+            "url": f"https://site{i % 50}.example.com/page/{i}",
+            "title": f"Bookmark {i}",
+            "tags": ["python" if i % 3 == 0 else "web", f"t{i % 10}"],
+        }).encode("utf-8")
+        req = urllib.request.Request(f"http://127.0.0.1:{port}/bookmarks", data=body,
+                                     method="POST")
+        urllib.request.urlopen(req).read()
+
+
+async def read_chunked(reader: asyncio.StreamReader):
+    """Consume a chunked body (long lists are streamed that way)."""
+    while True:
+        size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+        if size == 0:
+            # No trailers are sent, so only the final CRLF is left
+            await reader.readuntil(b"\r\n")
+            return
+        await reader.readexactly(size + 2)
+
+
+async def client(port: int, path: str, requests: int, latencies: list, errors: list):
+    request = (f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n").encode("ascii")
+    reader = writer = None
+    for _ in range(requests):
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length, chunked, close = 0, False, head.startswith(b"HTTP/1.0")
+            for line in head.split(b"\r\n")[1:]:
+                name, _, value = line.partition(b":")
+                name, value = name.strip().lower(), value.strip().lower()
+                if name == b"content-length":
+                    length = int(value)
+                elif name == b"transfer-encoding":
+                    chunked = value == b"chunked"
+                elif name == b"connection":
+                    close = value == b"close"
+            if chunked:
+                await read_chunked(reader)
+            else:
+                await reader.readexactly(length)
+            if status != 200:
+                errors.append(status)
+            else:
+                latencies.append(time.perf_counter() - start)
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def drive(port: int, path: str, clients: int, requests: int) -> tuple[float, list, list]:
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, path, requests, latencies, errors)
+                           for _ in range(clients)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 100],
+                        help="Concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per client")
+    parser.add_argument("--bookmarks", type=int, default=200, help="Bookmarks to seed")
+    parser.add_argument("--path", default="/bookmarks/1", help="Path to GET")
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(f"  Server benchmark — GET {args.path}, {args.requests} requests/client, "
+          f"{args.bookmarks} bookmarks")
+    print("=" * 78)
+    print(f"  {'mode':10s} {'clients':>8s} {'req/s':>10s} {'p50 ms':>9s} "
+          f"{'p99 ms':>9s} {'errors':>8s}")
+    for mode in args.modes:
+        port = free_port()
+        proc = start_app(mode, port)
+        try:
+            seed(port, args.bookmarks)
+            for clients in args.clients:
+                elapsed, latencies, errors = asyncio.run(
+                    drive(port, args.path, clients, args.requests))
+                latencies.sort()
+                p50 = statistics.median(latencies) * 1000 if latencies else float("nan")
+                p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else float("nan")
+                print(f"  {mode:10s} {clients:8d} {len(latencies) / elapsed:10.0f} "
+                      f"{p50:9.2f} {p99:9.2f} {len(errors):8d}")
+        finally:
+            proc.terminate()
+            proc.wait()
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
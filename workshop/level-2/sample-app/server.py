@@ -0,0 +1,221 @@
+"""HTTP server variants — single-threaded, a bounded worker pool, or asyncio."""
+
+import collections
+import json
+import logging
+import queue
+import selectors
+import socket
+import threading
+import time
+from http.server import HTTPServer
+
+from config import Config
+from errors import ServiceUnavailableError
+
+logger = logging.getLogger("server")
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands requests to a fixed pool of worker threads.
+
+    A worker only holds a connection while it serves one request. Between
+    requests (and before the first one) connections wait in a selector,
+    so idle keep-alive clients cost a file descriptor, not a worker. A
+    connection that stays idle for `keepalive_timeout` seconds is closed.
+
+    Connections with a request ready wait in a queue of at most
+    `queue_size` entries. When the queue is full they get an immediate
+    503, so a traffic burst can't pile up unbounded threads or memory.
+    """
+
+    request_queue_size = 128  # listen() backlog; the stdlib default is 5
+
+    def __init__(self, server_address, handler_class,
+                 workers: int = Config.WORKERS, queue_size: int = Config.QUEUE_SIZE,
+                 keepalive_timeout: float = Config.KEEPALIVE_TIMEOUT):
+        super().__init__(server_address, handler_class)
+        self.keepalive_timeout = keepalive_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        # Workers hand connections back through _parking; the wakeup socket
+        # interrupts select() so only the idle thread touches the selector.
+        self._selector = selectors.DefaultSelector()
+        self._parking: collections.deque = collections.deque()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._threads = [
+            threading.Thread(target=self._work, name=f"http-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._threads.append(
+            threading.Thread(target=self._watch_idle, name="http-idle", daemon=True)
+        )
+        for thread in self._threads:
+            thread.start()
+
+    def process_request(self, request, client_address):
+        # Wait for the first request off the worker pool too
+        self._park(_Connection(self, request, client_address))
+
+    def server_close(self):
+        super().server_close()
+        self._stopping.set()
+        self._wakeup_w.send(b"\0")
+        for thread in self._threads:
+            thread.join()
+        # Whatever was still waiting never got a worker
+        while True:
+            try:
+                self._queue.get_nowait().close()
+            except queue.Empty:
+                break
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None:
+                key.data.close()
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def _park(self, conn: "_Connection"):
+        conn.parked_at = time.monotonic()
+        self._parking.append(conn)
+        try:
+            self._wakeup_w.send(b"\0")
+        except OSError:
+            conn.close()  # server is shutting down
+
+    def _watch_idle(self):
+        while not self._stopping.is_set():
+            for key, _ in self._selector.select(timeout=1.0):
+                if key.data is None:
+                    self._drain_wakeups()
+                    continue
+                self._selector.unregister(key.fileobj)
+                self._dispatch(key.data)
+            deadline = time.monotonic() - self.keepalive_timeout
+            for key in list(self._selector.get_map().values()):
+                if key.data is not None and key.data.parked_at < deadline:
+                    self._selector.unregister(key.fileobj)
+                    key.data.close()
+
+    def _drain_wakeups(self):
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        while self._parking:
+            conn = self._parking.popleft()
+            self._selector.register(conn.request, selectors.EVENT_READ, conn)
+
+    def _dispatch(self, conn: "_Connection"):
+        try:
+            self._queue.put_nowait(conn)
+        except queue.Full:
+            logger.warning(f"Request queue full, rejecting {conn.client_address[0]}")
+            self._reject(conn)
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                conn = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                keep_alive = conn.handle_one_request()
+            except ConnectionError as e:
+                logger.debug(f"Client {conn.client_address[0]} went away: {e}")
+                keep_alive = False
+            except Exception:
+                self.handle_error(conn.request, conn.client_address)
+                keep_alive = False
+            if not keep_alive:
+                conn.close()
+            elif conn.has_buffered_request():
+                self._dispatch(conn)  # pipelined: the selector won't see it
+            else:
+                self._park(conn)
+
+    def _reject(self, conn: "_Connection"):
+        body = json.dumps(
+            ServiceUnavailableError("Server is busy, try again later").to_dict()
+        ).encode("utf-8")
+        head = (
+            "HTTP/1.1 503 Service Unavailable\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Retry-After: 1\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("ascii")
+        try:
+            conn.request.sendall(head + body)
+        except OSError:
+            pass
+        conn.close()
+
+
+class _Connection:
+    """A client socket and the handler that serves it, one request at a time."""
+
+    def __init__(self, server: PooledHTTPServer, request, client_address):
+        self.server = server
+        self.request = request
+        self.client_address = client_address
+        self.parked_at = 0.0
+        # BaseRequestHandler.__init__ would serve the whole connection, so
+        # set the handler up by hand and drive it request by request.
+        handler_class = server.RequestHandlerClass
+        self.handler = handler_class.__new__(handler_class)
+        self.handler.server = server
+        self.handler.request = request
+        self.handler.client_address = client_address
+        self.handler.setup()
+
+    def handle_one_request(self) -> bool:
+        """Serve one request; True if the connection stays open."""
+        self.handler.close_connection = True
+        self.handler.handle_one_request()
+        return not self.handler.close_connection
+
+    def has_buffered_request(self) -> bool:
+        """Whether the next request was already read into the buffer."""
+        self.request.settimeout(0)
+        try:
+            return bool(self.handler.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.request.settimeout(self.handler.timeout)
+
+    def close(self):
+        try:
+            self.handler.finish()
+        except OSError:
+            pass
+        self.server.shutdown_request(self.request)
+
+
+def create_server(server_address, handler_class, mode: str = Config.SERVER_MODE,
+                  workers: int = Config.WORKERS,
+                  queue_size: int = Config.QUEUE_SIZE) -> HTTPServer:
+    """Factory function to create the configured HTTP server."""
+    if mode == "single":
+        return HTTPServer(server_address, handler_class)
+    # Keep-alive only makes sense when an idle connection can't block
+    # every other client; idle connections are closed after a timeout.
+    handler_class.protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY the body
+    # waits for the client's delayed ACK on a kept-alive connection.
+    handler_class.disable_nagle_algorithm = True
+    if mode == "threaded":
+        # Bounds how long a worker waits for the rest of a started request;
+        # idle connections between requests are timed out by the server
+        handler_class.timeout = Config.REQUEST_TIMEOUT
+        return PooledHTTPServer(server_address, handler_class, workers, queue_size)
+    elif mode == "asyncio":
+        from aio_server import AsyncHTTPServer
+        return AsyncHTTPServer(server_address, handler_class, workers)
+    else:
+        raise ValueError(f"Unknown server mode: {mode}")
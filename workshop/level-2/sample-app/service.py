@@ -1,10 +1,16 @@
 """Business logic layer — orchestrates validation, storage, and tag management."""
 
+import base64
+import json
+import threading
+from collections import Counter
+from dataclasses import dataclass, field, fields as dataclass_fields, replace
+from datetime import datetime
 from typing import Optional
 
 from config import Config
 from models import Bookmark
-from repository import BaseRepository
+from repository import SORT_KEYS, BaseRepository
 from errors import (
     NotFoundError,
     DuplicateError,
@@ -13,11 +19,70 @@ from errors import (
 )
 
 
+# The parts of a bookmark that the aggregates count
+Facts = tuple[tuple[str, ...], str, int, bool]
+
+
+@dataclass
+class Aggregates:
+    """Tag, domain, visit and archive totals over the whole store."""
+
+    tags: Counter = field(default_factory=Counter)
+    domains: Counter = field(default_factory=Counter)
+    total: int = 0
+    archived: int = 0
+    visits: int = 0
+
+    @staticmethod
+    def facts(bookmark: Bookmark) -> Facts:
+        """Snapshot what counts, before the bookmark is mutated."""
+        return (tuple(bookmark.tags), bookmark.domain, bookmark.visit_count, bookmark.is_archived)
+
+    @classmethod
+    def from_bookmarks(cls, bookmarks: list[Bookmark]) -> "Aggregates":
+        aggregates = cls()
+        for bookmark in bookmarks:
+            aggregates.add(cls.facts(bookmark))
+        return aggregates
+
+    def add(self, facts: Facts, sign: int = 1):
+        tags, domain, visits, archived = facts
+        for tag in tags:
+            self._bump(self.tags, tag, sign)
+        self._bump(self.domains, domain, sign)
+        self.total += sign
+        self.archived += sign * archived
+        self.visits += sign * visits
+
+    def remove(self, facts: Facts):
+        self.add(facts, -1)
+
+    @staticmethod
+    def _bump(counter: Counter, key: str, delta: int):
+        counter[key] += delta
+        if counter[key] <= 0:
+            del counter[key]
+
+
 class BookmarkService:
-    """Encapsulates business rules for bookmark management."""
+    """Encapsulates business rules for bookmark management.
+
+    Operations that read and then write (limit and duplicate checks, visit
+    counters, archive state) hold a service-wide lock, so concurrent
+    requests can't interleave between the check and the write.
+
+    Tag and stats totals are kept in `Aggregates` and updated by each
+    write made through the service. They are tagged with the store
+    revision they describe. If the revision moves on without us (another
+    process wrote the data file), they are rebuilt with one full scan on
+    the next read.
+    """
 
     def __init__(self, repository: BaseRepository):
         self._repo = repository
+        self._lock = threading.RLock()
+        self._aggregates: Optional[Aggregates] = None
+        self._aggregates_revision: Optional[int] = None
 
     def create_bookmark(
         self,
@@ -27,26 +92,30 @@ class BookmarkService:
         tags: list[str] | None = None,
     ) -> Bookmark:
         """Create a new bookmark with duplicate URL detection."""
-        if self._repo.count() >= Config.MAX_BOOKMARKS:
-            raise LimitExceededError(
-                f"Bookmark limit reached ({Config.MAX_BOOKMARKS})"
-            )
+        with self._lock:
+            if self._repo.count() >= Config.MAX_BOOKMARKS:
+                raise LimitExceededError(
+                    f"Bookmark limit reached ({Config.MAX_BOOKMARKS})"
+                )
 
-        # Check for duplicate URL
-        existing = self._find_by_url(url.strip())
-        if existing:
-            raise DuplicateError(
-                f"URL already bookmarked as #{existing.id}: {existing.title}"
-            )
+            # Check for duplicate URL
+            existing = self._repo.find_by_url(url)
+            if existing:
+                raise DuplicateError(
+                    f"URL already bookmarked as #{existing.id}: {existing.title}"
+                )
 
-        bookmark = Bookmark(
-            id=0,  # Will be assigned by repository
-            url=url,
-            title=title,
-            description=description,
-            tags=tags or [],
-        )
-        return self._repo.save(bookmark)
+            bookmark = Bookmark(
+                id=0,  # Will be assigned by repository
+                url=url,
+                title=title,
+                description=description,
+                tags=tags or [],
+            )
+            revision = self._repo.revision()
+            saved = self._repo.save(bookmark)
+            self._record(revision, None, saved)
+            return saved
 
     def get_bookmark(self, bookmark_id: int) -> Bookmark:
         """Retrieve a bookmark by ID."""
@@ -63,84 +132,192 @@ class BookmarkService:
         sort_by: str = "created",
     ) -> list[Bookmark]:
         """List bookmarks with optional filtering and sorting."""
-        if tag:
-            bookmarks = self._repo.find_by_tag(tag)
-        elif domain:
-            bookmarks = self._repo.find_by_domain(domain)
-        else:
-            bookmarks = self._repo.list_all()
-
-        if not include_archived:
-            bookmarks = [b for b in bookmarks if not b.is_archived]
-
-        sort_keys = {
-            "created": lambda b: b.created_at,
-            "title": lambda b: b.title.lower(),
-            "visits": lambda b: -b.visit_count,
-            "domain": lambda b: b.domain,
-        }
-        key_fn = sort_keys.get(sort_by, sort_keys["created"])
-        bookmarks.sort(key=key_fn)
+        return self._repo.query(
+            tag=tag, domain=domain, include_archived=include_archived, sort_by=sort_by
+        )
+
+    def list_page(
+        self,
+        tag: Optional[str] = None,
+        domain: Optional[str] = None,
+        include_archived: bool = False,
+        sort_by: str = "created",
+        limit: int = Config.DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[Bookmark], Optional[str]]:
+        """One page of list_bookmarks() and the cursor of the next page.
 
-        return bookmarks
+        The cursor holds the sort key and id of the page's last bookmark,
+        so the next page starts right after it even if bookmarks were added
+        or deleted in between. It is None on the last page.
+        """
+        if not 1 <= limit <= Config.MAX_PAGE_SIZE:
+            raise ValidationError(
+                f"limit must be between 1 and {Config.MAX_PAGE_SIZE}", field="limit"
+            )
+        if sort_by not in SORT_KEYS:
+            sort_by = "created"
+        after = self._decode_cursor(cursor, sort_by) if cursor else None
+        # One extra row tells whether there is a next page
+        page = self._repo.query(
+            tag=tag, domain=domain, include_archived=include_archived,
+            sort_by=sort_by, after=after, limit=limit + 1,
+        )
+        if len(page) <= limit:
+            return page, None
+        page = page[:limit]
+        last = page[-1]
+        return page, self._encode_cursor(sort_by, SORT_KEYS[sort_by](last), last.id)
+
+    @staticmethod
+    def project(bookmarks: list[Bookmark], fields: Optional[list[str]] = None) -> list[dict]:
+        """Serialize bookmarks, keeping only `fields` if given."""
+        if fields is not None:
+            if not fields:
+                raise ValidationError("No fields requested", field="fields")
+            known = {f.name for f in dataclass_fields(Bookmark)}
+            unknown = [f for f in fields if f not in known]
+            if unknown:
+                raise ValidationError(f"Unknown fields: {', '.join(unknown)}", field="fields")
+        return [b.to_dict(fields) for b in bookmarks]
+
+    def update_bookmark(
+        self,
+        bookmark_id: int,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+        tags: list[str] | None = None,
+    ) -> Bookmark:
+        """Change the given fields; the result is validated like a new bookmark."""
+        changes = {
+            k: v for k, v in
+            (("title", title), ("description", description), ("tags", tags))
+            if v is not None
+        }
+        with self._lock:
+            revision = self._repo.revision()
+            bookmark = self.get_bookmark(bookmark_id)
+            # replace() re-runs __post_init__, so an invalid update leaves
+            # the stored bookmark untouched
+            updated = replace(bookmark, **changes, updated_at=datetime.utcnow().isoformat())
+            self._repo.update(updated)
+            self._record(revision, Aggregates.facts(bookmark), updated)
+            return updated
 
     def delete_bookmark(self, bookmark_id: int) -> Bookmark:
         """Permanently remove a bookmark."""
-        return self._repo.delete(bookmark_id)
+        with self._lock:
+            revision = self._repo.revision()
+            deleted = self._repo.delete(bookmark_id)
+            self._record(revision, Aggregates.facts(deleted), None)
+            return deleted
 
     def visit_bookmark(self, bookmark_id: int) -> Bookmark:
         """Record a visit (increment counter, update timestamp)."""
-        bookmark = self.get_bookmark(bookmark_id)
-        bookmark.touch()
-        return self._repo.update(bookmark)
+        with self._lock:
+            revision = self._repo.revision()
+            bookmark = self.get_bookmark(bookmark_id)
+            before = Aggregates.facts(bookmark)
+            bookmark.touch()
+            self._repo.update(bookmark)
+            self._record(revision, before, bookmark)
+            return bookmark
 
     def archive_bookmark(self, bookmark_id: int) -> Bookmark:
         """Move a bookmark to the archive."""
-        bookmark = self.get_bookmark(bookmark_id)
-        if bookmark.is_archived:
-            raise ValidationError("Bookmark is already archived")
-        bookmark.archive()
-        return self._repo.update(bookmark)
+        with self._lock:
+            bookmark = self.get_bookmark(bookmark_id)
+            if bookmark.is_archived:
+                raise ValidationError("Bookmark is already archived")
+            revision = self._repo.revision()
+            before = Aggregates.facts(bookmark)
+            bookmark.archive()
+            self._repo.update(bookmark)
+            self._record(revision, before, bookmark)
+            return bookmark
 
     def restore_bookmark(self, bookmark_id: int) -> Bookmark:
         """Restore a bookmark from the archive."""
-        bookmark = self.get_bookmark(bookmark_id)
-        if not bookmark.is_archived:
-            raise ValidationError("Bookmark is not archived")
-        bookmark.unarchive()
-        return self._repo.update(bookmark)
+        with self._lock:
+            bookmark = self.get_bookmark(bookmark_id)
+            if not bookmark.is_archived:
+                raise ValidationError("Bookmark is not archived")
+            revision = self._repo.revision()
+            before = Aggregates.facts(bookmark)
+            bookmark.unarchive()
+            self._repo.update(bookmark)
+            self._record(revision, before, bookmark)
+            return bookmark
+
+    def revision(self) -> int:
+        """Store revision; changes whenever any bookmark does."""
+        return self._repo.revision()
 
     def get_all_tags(self) -> dict[str, int]:
-        """Return all tags with their usage count."""
-        tag_counts: dict[str, int] = {}
-        for bookmark in self._repo.list_all():
-            for tag in bookmark.tags:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-        return dict(sorted(tag_counts.items(), key=lambda x: -x[1]))
+        """Return all tags with their usage count, most used first."""
+        with self._lock:
+            tags = self._current_aggregates().tags
+            return dict(sorted(tags.items(), key=lambda x: (-x[1], x[0])))
 
     def get_stats(self) -> dict:
         """Return aggregate statistics."""
-        bookmarks = self._repo.list_all()
-        total = len(bookmarks)
-        archived = sum(1 for b in bookmarks if b.is_archived)
-        domains = {}
-        for b in bookmarks:
-            domains[b.domain] = domains.get(b.domain, 0) + 1
-        top_domains = sorted(domains.items(), key=lambda x: -x[1])[:10]
-
-        return {
-            "total": total,
-            "active": total - archived,
-            "archived": archived,
-            "total_visits": sum(b.visit_count for b in bookmarks),
-            "unique_tags": len(self.get_all_tags()),
-            "unique_domains": len(domains),
-            "top_domains": dict(top_domains),
-        }
+        with self._lock:
+            aggregates = self._current_aggregates()
+            top_domains = sorted(aggregates.domains.items(), key=lambda x: (-x[1], x[0]))[:10]
+            return {
+                "total": aggregates.total,
+                "active": aggregates.total - aggregates.archived,
+                "archived": aggregates.archived,
+                "total_visits": aggregates.visits,
+                "unique_tags": len(aggregates.tags),
+                "unique_domains": len(aggregates.domains),
+                "top_domains": dict(top_domains),
+            }
+
+    def _current_aggregates(self) -> Aggregates:
+        """Aggregates for the current revision; call with the lock held."""
+        revision = self._repo.revision()
+        if self._aggregates is None or self._aggregates_revision != revision:
+            self._aggregates = Aggregates.from_bookmarks(self._repo.list_all())
+            self._aggregates_revision = revision
+        return self._aggregates
+
+    def _record(self, revision: int, before: Optional[Facts], after: Optional[Bookmark]):
+        """Apply one write, made at `revision`, to the aggregates.
+
+        If anything else changed the store in the meantime, drop them
+        instead; the next read rebuilds them.
+        """
+        if self._aggregates is None or self._aggregates_revision != revision:
+            self._aggregates = None
+            return
+        current = self._repo.revision()
+        if current != revision + 1:
+            self._aggregates = None
+            return
+        if before is not None:
+            self._aggregates.remove(before)
+        if after is not None:
+            self._aggregates.add(Aggregates.facts(after))
+        self._aggregates_revision = current
+
+    @staticmethod
+    def _encode_cursor(sort_by: str, key, bookmark_id: int) -> str:
+        raw = json.dumps([sort_by, key, bookmark_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
 
-    def _find_by_url(self, url: str) -> Optional[Bookmark]:
-        """Find a bookmark by exact URL match."""
-        for bookmark in self._repo.list_all():
-            if bookmark.url == url:
-                return bookmark
-        return None
+    @staticmethod
+    def _decode_cursor(cursor: str, sort_by: str) -> tuple:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            cursor_sort, key, bookmark_id = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError):
+            raise ValidationError("Invalid cursor", field="cursor")
+        if cursor_sort != sort_by:
+            raise ValidationError("Cursor does not match this query", field="cursor")
+        # The key is compared with live sort keys, so it must have their type
+        key_type = int if sort_by == "visits" else str
+        if not all(isinstance(v, t) and not isinstance(v, bool)
+                   for v, t in ((key, key_type), (bookmark_id, int))):
+            raise ValidationError("Invalid cursor", field="cursor")
+        return (key, bookmark_id)
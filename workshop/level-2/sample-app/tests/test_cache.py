@@ -0,0 +1,69 @@
+"""Tests for the response cache and ETag matching."""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cache import CachedResponse, ResponseCache, etag_matches
+
+
+def entry(size: int) -> CachedResponse:
+    return CachedResponse(200, b"x" * size, None)
+
+
+class TestResponseCache:
+    def test_hit_at_same_revision(self):
+        cache = ResponseCache()
+        cache.validators(1)
+        cache.put(1, ("/tags", None), entry(10))
+        assert cache.get(1, ("/tags", None)) == entry(10)
+        assert cache.get(1, ("/tags", "gzip")) is None
+
+    def test_new_revision_drops_entries(self):
+        cache = ResponseCache()
+        cache.validators(1)
+        cache.put(1, ("/tags", None), entry(10))
+        cache.validators(2)
+        assert cache.get(2, ("/tags", None)) is None
+        assert cache.get(1, ("/tags", None)) is None
+
+    def test_stale_render_is_not_stored(self):
+        cache = ResponseCache()
+        cache.validators(2)
+        cache.validators(1)  # a slower request that read the old revision
+        cache.put(1, ("/tags", None), entry(10))
+        assert cache.get(2, ("/tags", None)) is None
+
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(max_bytes=25)
+        cache.validators(1)
+        cache.put(1, ("a",), entry(10))
+        cache.put(1, ("b",), entry(10))
+        cache.get(1, ("a",))
+        cache.put(1, ("c",), entry(10))
+        assert cache.get(1, ("b",)) is None
+        assert cache.get(1, ("a",)) is not None
+        cache.put(1, ("huge",), entry(100))
+        assert cache.get(1, ("huge",)) is None
+
+    def test_etag_changes_with_revision_and_process(self):
+        cache = ResponseCache()
+        etag1, _ = cache.validators(1)
+        etag2, _ = cache.validators(2)
+        assert etag1 != etag2
+        assert ResponseCache().validators(1)[0] != etag1
+
+
+class TestEtagMatches:
+    @pytest.mark.parametrize("header, expected", [
+        (None, False),
+        ('W/"abc-1"', True),
+        ('"abc-1"', True),
+        ('"abc-2", W/"abc-1"', True),
+        ("*", True),
+        ('W/"abc-2"', False),
+    ])
+    def test_weak_comparison(self, header, expected):
+        assert etag_matches(header, 'W/"abc-1"') is expected
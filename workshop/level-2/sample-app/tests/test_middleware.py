@@ -0,0 +1,46 @@
+"""Tests for response encoding and content negotiation."""
+
+import json
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import middleware
+from config import Config
+from middleware import encode_json, negotiate_encoding
+
+
+class TestNegotiateEncoding:
+    @pytest.mark.parametrize("header, expected", [
+        ("", None),
+        ("gzip, deflate, br", "gzip"),
+        ("deflate", "deflate"),
+        ("gzip;q=0.5, deflate;q=0.8", "deflate"),
+        ("gzip;q=0", None),
+        ("*", "gzip"),
+        ("identity", None),
+    ])
+    def test_picks_the_preferred_coding(self, header, expected):
+        assert negotiate_encoding(header) == expected
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(Config, "COMPRESSION", False)
+        assert negotiate_encoding("gzip") is None
+
+
+class TestEncodeJson:
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_compact_by_default(self, monkeypatch, fast):
+        if not fast:
+            monkeypatch.setattr(middleware, "orjson", None)
+        assert encode_json({"a": [1, 2]}) == b'{"a":[1,2]}'
+
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_pretty(self, monkeypatch, fast):
+        if not fast:
+            monkeypatch.setattr(middleware, "orjson", None)
+        monkeypatch.setattr(Config, "PRETTY_JSON", True)
+        assert json.loads(encode_json({"a": [1, 2]})) == {"a": [1, 2]}
+        assert b"\n  " in encode_json({"a": [1, 2]})
@@ -63,6 +63,12 @@ class TestBookmarkProperties:
         b = Bookmark(id=1, url="https://docs.python.org/3/library/", title="Python Docs")
         assert b.domain == "docs.python.org"
 
+    def test_domain_follows_url_change(self):
+        b = Bookmark(id=1, url="https://docs.python.org/3/", title="Python Docs")
+        b.url = "https://pypi.org/"
+        assert b.domain == "pypi.org"
+        assert "domain" not in b.to_dict()
+
     def test_touch_increments_visits(self):
         b = Bookmark(id=1, url="https://example.com", title="Test")
         assert b.visit_count == 0
@@ -0,0 +1,358 @@
+"""Unit tests for the storage backends."""
+
+import json
+import threading
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import Bookmark
+from errors import NotFoundError, StorageError
+from repository import (
+    CachedFileRepository, FileRepository, InMemoryRepository, SqliteRepository,
+)
+
+
+def make_bookmark(n: int, **kwargs) -> Bookmark:
+    return Bookmark(id=0, url=f"https://site{n}.example.com", title=f"Site {n}", **kwargs)
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    return str(tmp_path / "bookmarks.json")
+
+
+@pytest.fixture(params=["memory", "file", "cached", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        repo = InMemoryRepository()
+    elif request.param == "file":
+        repo = FileRepository(str(tmp_path / "bookmarks.json"))
+    elif request.param == "cached":
+        repo = CachedFileRepository(str(tmp_path / "bookmarks.json"), flush_interval=0)
+    else:
+        repo = SqliteRepository(str(tmp_path / "bookmarks.db"))
+    yield repo
+    repo.close()
+
+
+class TestRepositoryContract:
+    """Behaviour every backend must share."""
+
+    def test_save_assigns_ids(self, repo):
+        assert [repo.save(make_bookmark(n)).id for n in range(3)] == [1, 2, 3]
+        assert repo.count() == 3
+
+    def test_round_trip_keeps_fields(self, repo):
+        saved = repo.save(make_bookmark(1, description="d", tags=["web", "python"]))
+        loaded = repo.get(saved.id)
+        assert loaded.to_dict() == saved.to_dict()
+
+    def test_update_replaces_tags(self, repo):
+        saved = repo.save(make_bookmark(1, tags=["a", "b"]))
+        saved.tags = ["c"]
+        repo.update(saved)
+        assert repo.get(saved.id).tags == ["c"]
+        assert repo.find_by_tag("a") == []
+        assert [b.id for b in repo.find_by_tag("c")] == [saved.id]
+
+    def test_find_by_domain_ignores_case(self, repo):
+        repo.save(make_bookmark(1))
+        repo.save(make_bookmark(2))
+        assert [b.id for b in repo.find_by_domain("SITE2.example.com")] == [2]
+
+    def test_delete_does_not_reuse_ids(self, repo):
+        repo.save(make_bookmark(1, tags=["web"]))
+        repo.delete(1)
+        assert repo.get(1) is None
+        assert repo.find_by_tag("web") == []
+        assert repo.save(make_bookmark(2)).id == 2
+
+    def test_find_by_url_normalizes(self, repo):
+        saved = repo.save(make_bookmark(1))
+        assert repo.find_by_url("HTTPS://Site1.Example.com:443/").id == saved.id
+        assert repo.find_by_url("https://site1.example.com/other") is None
+
+    def test_find_by_url_follows_update_and_delete(self, repo):
+        saved = repo.save(make_bookmark(1))
+        saved.url = "https://moved.example.com"
+        repo.update(saved)
+        assert repo.find_by_url("https://site1.example.com") is None
+        assert repo.find_by_url("https://moved.example.com").id == saved.id
+        repo.delete(saved.id)
+        assert repo.find_by_url("https://moved.example.com") is None
+
+    def test_query_pages_by_sort_key_and_id(self, repo):
+        for n, title in enumerate(["b", "A", "b", "É", "c"]):
+            repo.save(Bookmark(id=0, url=f"https://s{n}.example.com", title=title,
+                               tags=["web"]))
+        first = repo.query(tag="web", sort_by="title", limit=2)
+        assert [b.id for b in first] == [2, 1]
+        rest = repo.query(tag="web", sort_by="title", after=("b", 1))
+        assert [b.id for b in rest] == [3, 5, 4]
+
+    def test_query_skips_archived(self, repo):
+        repo.save(make_bookmark(1))
+        archived = repo.save(make_bookmark(2))
+        archived.archive()
+        repo.update(archived)
+        assert [b.id for b in repo.query()] == [1]
+        assert [b.id for b in repo.query(include_archived=True)] == [1, 2]
+
+    def test_revision_moves_on_every_change(self, repo):
+        revisions = [repo.revision()]
+        saved = repo.save(make_bookmark(1))
+        revisions.append(repo.revision())
+        repo.update(saved)
+        revisions.append(repo.revision())
+        repo.list_all()
+        repo.find_by_tag("web")
+        assert repo.revision() == revisions[-1]
+        repo.delete(saved.id)
+        revisions.append(repo.revision())
+        assert revisions == sorted(set(revisions))
+
+    def test_missing_ids_raise(self, repo):
+        with pytest.raises(NotFoundError):
+            repo.delete(42)
+        with pytest.raises(NotFoundError):
+            repo.update(Bookmark(id=42, url="https://x.example.com", title="X"))
+
+
+class TestFileRepository:
+    def test_concurrent_writers_use_their_own_temp_files(self, data_file):
+        errors = []
+
+        def write_many(repo):
+            try:
+                for i in range(50):
+                    repo._write({"bookmarks": [], "next_id": i + 1})
+            except StorageError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write_many, args=(FileRepository(data_file),))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert sorted(os.listdir(os.path.dirname(data_file))) == [
+            "bookmarks.json", "bookmarks.json.lock"]
+
+    def test_out_of_band_edit_moves_the_revision(self, data_file):
+        repo = FileRepository(data_file)
+        repo.save(make_bookmark(1))
+        before = repo.revision()
+        with open(data_file) as f:
+            data = json.load(f)
+        data["bookmarks"][0]["title"] = "Edited by hand"
+        with open(data_file, "w") as f:
+            json.dump(data, f)
+        assert repo.revision() > before
+        # and our own writes still count one revision each
+        edited = repo.revision()
+        repo.save(make_bookmark(2))
+        assert repo.revision() == edited + 1
+
+    def test_rewrite_keeps_file_mode(self, data_file):
+        repo = FileRepository(data_file)
+        os.chmod(data_file, 0o640)
+        repo.save(make_bookmark(1))
+        assert os.stat(data_file).st_mode & 0o777 == 0o640
+
+
+class TestInMemoryIndexes:
+    def test_tag_index_follows_in_place_mutation(self):
+        repo = InMemoryRepository()
+        saved = repo.save(make_bookmark(1, tags=["old"]))
+        saved.tags = ["new"]
+        repo.update(saved)
+        assert repo.find_by_tag("old") == []
+        assert repo.find_by_tag("new") == [saved]
+        assert "old" not in repo._by_tag
+
+    def test_lookups_return_id_order(self):
+        repo = InMemoryRepository()
+        for n in range(5):
+            repo.save(make_bookmark(n, tags=["web"]))
+        last = repo.get(5)
+        repo.update(last)
+        repo.update(repo.get(1))
+        assert [b.id for b in repo.find_by_tag("web")] == [1, 2, 3, 4, 5]
+
+    def test_replace_all_rebuilds_indexes(self):
+        repo = InMemoryRepository()
+        repo.save(make_bookmark(1, tags=["stale"]))
+        repo._replace_all([Bookmark(id=7, url="https://a.example.com", title="A",
+                                    tags=["fresh"])], next_id=8)
+        assert repo.find_by_tag("stale") == []
+        assert [b.id for b in repo.find_by_tag("fresh")] == [7]
+        assert [b.id for b in repo.find_by_domain("a.example.com")] == [7]
+
+
+class TestCachedFileRepository:
+    def test_write_through(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=0)
+        repo.save(make_bookmark(1))
+        assert len(FileRepository(data_file).list_all()) == 1
+
+    def test_write_behind_until_flush(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=3600)
+        saved = repo.save(make_bookmark(1))
+        assert repo.get(saved.id).title == "Site 1"
+        assert FileRepository(data_file).count() == 0
+        repo.flush()
+        assert FileRepository(data_file).count() == 1
+        repo.close()
+
+    def test_close_flushes(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=3600)
+        repo.save(make_bookmark(1))
+        repo.close()
+        with open(data_file) as f:
+            assert json.load(f)["next_id"] == 2
+
+    def test_reloads_when_file_changes(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=0)
+        repo.save(make_bookmark(1))
+        FileRepository(data_file).save(make_bookmark(2, tags=["python"]))
+        assert repo.count() == 2
+        assert [b.id for b in repo.find_by_tag("python")] == [2]
+        assert repo.save(make_bookmark(3)).id == 3
+
+    def test_revision_follows_other_writers(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=0)
+        repo.save(make_bookmark(1))
+        before = repo.revision()
+        FileRepository(data_file).save(make_bookmark(2))
+        assert repo.revision() > before
+
+    def test_save_during_reload_is_kept(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=0)
+        repo.save(make_bookmark(1))
+        FileRepository(data_file).save(make_bookmark(2))
+        read = repo._file._read
+        writer = threading.Thread(target=lambda: repo.save(make_bookmark(3)))
+
+        def slow_read():
+            # A save arriving while the reload reads the file must wait
+            writer.start()
+            writer.join(0.2)
+            return read()
+
+        repo._file._read = slow_read
+        repo.count()
+        writer.join()
+        repo._file._read = read
+        urls = [b.url for b in FileRepository(data_file).list_all()]
+        assert urls == [f"https://site{n}.example.com" for n in (1, 2, 3)]
+
+    def test_flush_merges_other_writers(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=3600)
+        kept = repo.save(make_bookmark(1))
+        gone = repo.save(make_bookmark(2))
+        repo.flush()
+        kept.title = "Changed here"
+        repo.update(kept)
+        other = FileRepository(data_file)
+        other.delete(gone.id)
+        other.save(make_bookmark(3))
+        repo.flush()
+        on_disk = {b.id: b.title for b in FileRepository(data_file).list_all()}
+        assert on_disk == {1: "Changed here", 3: "Site 3"}
+        repo.close()
+
+    def test_unflushed_ids_are_not_handed_out_again(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=3600)
+        mine = repo.save(make_bookmark(1))
+        other = CachedFileRepository(data_file, flush_interval=3600)
+        theirs = other.save(make_bookmark(2))
+        plain = FileRepository(data_file).save(make_bookmark(3))
+        assert (mine.id, theirs.id, plain.id) == (1, 2, 3)
+        other.close()
+        repo.flush()
+        on_disk = {b.id: b.title for b in FileRepository(data_file).list_all()}
+        assert on_disk == {1: "Site 1", 2: "Site 2", 3: "Site 3"}
+        assert repo.save(make_bookmark(4)).id == 4
+        repo.close()
+
+    def test_hand_made_id_collision_keeps_both(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=3600)
+        mine = repo.save(make_bookmark(1))
+        # Written without the lock, so the reserved id is reused
+        with open(data_file) as f:
+            data = json.load(f)
+        data["bookmarks"].append({**make_bookmark(2).to_dict(), "id": 1})
+        data["next_id"] = 2
+        with open(data_file, "w") as f:
+            json.dump(data, f)
+        repo.flush()
+        on_disk = {b.id: b.title for b in FileRepository(data_file).list_all()}
+        assert on_disk == {1: "Site 2", 2: "Site 1"}
+        assert mine.id == 2
+        repo.close()
+
+    def test_reads_do_not_wait_for_a_flush(self, data_file):
+        repo = CachedFileRepository(data_file, flush_interval=3600)
+        repo.save(make_bookmark(1))
+        write, writing, release = repo._file._write, threading.Event(), threading.Event()
+
+        def slow_write(data):
+            writing.set()
+            release.wait(5)
+            return write(data)
+
+        repo._file._write = slow_write
+        flusher = threading.Thread(target=repo.flush)
+        flusher.start()
+        try:
+            assert writing.wait(5)
+            assert [b.id for b in repo.list_all()] == [1]
+            repo.update(repo.get(1))
+        finally:
+            release.set()
+            flusher.join()
+        repo._file._write = write
+        # The update made during the write is still pending
+        assert repo._dirty
+        repo.close()
+        assert not repo._dirty
+
+
+class TestSqliteRepository:
+    @pytest.fixture
+    def repo(self, tmp_path):
+        repo = SqliteRepository(str(tmp_path / "bookmarks.db"))
+        yield repo
+        repo.close()
+
+    def test_exited_threads_release_connections(self, repo):
+        threads = [threading.Thread(target=repo.count) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        last = threading.Thread(target=repo.count)
+        last.start()
+        last.join()
+        # This thread's connection and the last one's
+        assert len(repo._connections) == 2
+
+    def test_rows_and_tags_come_from_one_snapshot(self, repo):
+        saved = repo.save(make_bookmark(1, tags=["old"]))
+
+        def write_between_selects(statement):
+            if statement.startswith("SELECT bookmark_id, tag"):
+                changed = Bookmark.from_dict({**saved.to_dict(), "tags": ["new"]})
+                writer = threading.Thread(target=repo.update, args=(changed,))
+                writer.start()
+                writer.join()
+
+        repo._conn().set_trace_callback(write_between_selects)
+        assert repo.get(saved.id).tags == ["old"]
+        repo._conn().set_trace_callback(None)
+        assert repo.get(saved.id).tags == ["new"]
@@ -0,0 +1,57 @@
+"""Tests for the compiled route table."""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from errors import MethodNotAllowedError, NotFoundError
+from router import Route, Router, parse_query
+
+
+@pytest.fixture
+def router():
+    return Router([
+        Route("GET", "/items", "list_items"),
+        Route("POST", "/items", "create_item", 201),
+        Route("GET", "/items/{item_id:int}", "get_item"),
+        Route("POST", "/items/{item_id:int}/tags/{tag}", "tag_item"),
+    ])
+
+
+class TestRouter:
+    def test_static_route(self, router):
+        match = router.match("POST", "/items")
+        assert (match.handler, match.status, match.params) == ("create_item", 201, {})
+
+    def test_params_are_converted(self, router):
+        match = router.match("POST", "/items/42/tags/python")
+        assert match.handler == "tag_item"
+        assert match.params == {"item_id": 42, "tag": "python"}
+
+    def test_trailing_slash_and_escapes(self, router):
+        assert router.match("GET", "/items/").handler == "list_items"
+        assert router.match("GET", "/items/%34%32").params == {"item_id": 42}
+
+    def test_unknown_path_is_404(self, router):
+        with pytest.raises(NotFoundError):
+            router.match("GET", "/items/abc")
+
+    def test_wrong_method_is_405(self, router):
+        with pytest.raises(MethodNotAllowedError) as exc:
+            router.match("DELETE", "/items")
+        assert exc.value.status_code == 405
+        assert exc.value.details == {"allowed": ["GET", "POST"]}
+        assert exc.value.headers() == {"Allow": "GET, POST"}
+
+
+class TestParseQuery:
+    def test_decodes_values(self):
+        assert parse_query("tag=c%2B%2B&q=two+words") == {"tag": "c++", "q": "two words"}
+
+    def test_last_value_wins_and_blanks_kept(self):
+        assert parse_query("sort=title&sort=visits&tag=") == {"sort": "visits", "tag": ""}
+
+    def test_query_is_split_from_path(self, router):
+        assert router.match("GET", "/items?limit=5").query == {"limit": "5"}
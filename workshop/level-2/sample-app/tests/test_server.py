@@ -0,0 +1,349 @@
+"""Tests for the pooled and asyncio HTTP servers."""
+
+import gzip
+import http.client
+import json
+import logging
+import socket
+import threading
+import time
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cache import ResponseCache
+from config import Config
+from repository import InMemoryRepository
+from routes import BookmarkHandler
+from server import create_server
+from service import BookmarkService
+
+
+def start_server(mode="threaded", workers=4, queue_size=16):
+    BookmarkHandler.service = BookmarkService(InMemoryRepository())
+    BookmarkHandler.response_cache = ResponseCache()
+    server = create_server(("127.0.0.1", 0), BookmarkHandler, mode,
+                           workers=workers, queue_size=queue_size)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture(params=["threaded", "asyncio"])
+def server(request):
+    server = start_server(request.param)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(conn, method, path, body=None):
+    payload = json.dumps(body) if body is not None else None
+    headers = {"Content-Type": "application/json"} if payload else {}
+    conn.request(method, path, body=payload, headers=headers)
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read())
+
+
+class TestKeepAlive:
+    def test_requests_share_one_connection(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        status, _ = request(conn, "GET", "/health")
+        sock = conn.sock
+        status2, _ = request(conn, "POST", "/bookmarks",
+                             {"url": "https://example.com", "title": "Example"})
+        assert (status, status2) == (200, 201)
+        assert conn.sock is sock
+        conn.close()
+
+    def test_errors_keep_the_connection_open(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        status, body = request(conn, "GET", "/bookmarks/999")
+        sock = conn.sock
+        assert status == 404
+        assert body["error"] == "not_found"
+        status, _ = request(conn, "GET", "/health")
+        assert status == 200
+        assert conn.sock is sock
+        conn.close()
+
+    def test_405_lists_the_allowed_methods(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        conn.request("DELETE", "/tags")
+        resp = conn.getresponse()
+        assert resp.status == 405
+        assert resp.getheader("Allow") == "GET"
+        assert json.loads(resp.read())["details"] == {"allowed": ["GET"]}
+        conn.close()
+
+
+class TestPagination:
+    def test_pages_carry_next_cursor(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        for i in range(3):
+            request(conn, "POST", "/bookmarks",
+                    {"url": f"https://s{i}.example.com", "title": f"Site {i}"})
+        status, body = request(conn, "GET", "/bookmarks?limit=2&fields=id,title")
+        assert status == 200
+        assert body["bookmarks"] == [{"id": 1, "title": "Site 0"},
+                                     {"id": 2, "title": "Site 1"}]
+        status, body = request(conn, "GET",
+                               f"/bookmarks?limit=2&fields=id&cursor={body['next_cursor']}")
+        assert body == {"bookmarks": [{"id": 3}], "next_cursor": None}
+        status, body = request(conn, "GET", "/bookmarks?limit=lots")
+        assert (status, body["details"]) == (422, {"field": "limit"})
+        status, body = request(conn, "GET", "/bookmarks?fields=")
+        assert (status, body["details"]) == (422, {"field": "fields"})
+        conn.close()
+
+
+class TestResponseEncoding:
+    def seed(self, conn, count):
+        for i in range(count):
+            request(conn, "POST", "/bookmarks",
+                    {"url": f"https://s{i}.example.com", "title": f"Site {i}"})
+
+    def test_gzip_when_accepted(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        self.seed(conn, 20)
+        conn.request("GET", "/bookmarks", headers={"Accept-Encoding": "gzip"})
+        resp = conn.getresponse()
+        assert resp.getheader("Content-Encoding") == "gzip"
+        assert len(json.loads(gzip.decompress(resp.read()))) == 20
+        conn.request("GET", "/bookmarks")
+        resp = conn.getresponse()
+        assert resp.getheader("Content-Encoding") is None
+        assert len(json.loads(resp.read())) == 20
+        conn.close()
+
+    @pytest.mark.parametrize("accept", ["", "gzip"])
+    def test_long_lists_are_chunked(self, server, monkeypatch, accept):
+        monkeypatch.setattr(Config, "STREAM_THRESHOLD", 5)
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        self.seed(conn, 300)
+        conn.request("GET", "/bookmarks", headers={"Accept-Encoding": accept})
+        resp = conn.getresponse()
+        assert resp.getheader("Transfer-Encoding") == "chunked"
+        body = resp.read()
+        if accept:
+            body = gzip.decompress(body)
+        assert [b["id"] for b in json.loads(body)] == list(range(1, 301))
+        # The connection is still usable after the terminating chunk
+        status, _ = request(conn, "GET", "/health")
+        assert status == 200
+        conn.close()
+
+    def test_chunks_reach_the_client_before_the_response_ends(self, server, monkeypatch):
+        import aio_server
+        import middleware
+        monkeypatch.setattr(Config, "STREAM_THRESHOLD", 5)
+        monkeypatch.setattr(middleware, "STREAM_BATCH", 10)
+        monkeypatch.setattr(middleware, "CHUNK_BYTES", 1)
+        monkeypatch.setattr(aio_server, "WRITE_BUFFER_BYTES", 1)
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        self.seed(conn, 30)
+
+        encode_json, batches, release = middleware.encode_json, [], threading.Event()
+
+        def held_after_first_batch(data):
+            batches.append(data)
+            if len(batches) == 2:
+                release.wait(10)
+            return encode_json(data)
+
+        monkeypatch.setattr(middleware, "encode_json", held_after_first_batch)
+        try:
+            conn.request("GET", "/bookmarks")
+            resp = conn.getresponse()
+            # The second batch is held, so this chunk was sent mid-response:
+            # "[" plus the first batch without its brackets
+            size = int(resp.fp.readline(), 16)
+            assert resp.fp.read(size) == b"[" + encode_json(batches[0])[1:-1]
+        finally:
+            release.set()
+        conn.close()
+
+    def test_error_mid_stream_closes_instead_of_a_second_response(self, server, monkeypatch):
+        import middleware
+        monkeypatch.setattr(Config, "STREAM_THRESHOLD", 5)
+        monkeypatch.setattr(middleware, "STREAM_BATCH", 10)
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        self.seed(conn, 30)
+
+        encode_json, calls = middleware.encode_json, []
+
+        def fail_on_second_batch(data):
+            calls.append(data)
+            if len(calls) == 2:
+                raise RuntimeError("boom")
+            return encode_json(data)
+
+        monkeypatch.setattr(middleware, "encode_json", fail_on_second_batch)
+        conn.close()
+        sock = socket.create_connection(("127.0.0.1", server.server_address[1]), timeout=5)
+        sock.sendall(b"GET /bookmarks HTTP/1.1\r\nHost: test\r\n\r\n")
+        raw = b""
+        while chunk := sock.recv(65536):  # the server closes the connection
+            raw += chunk
+        sock.close()
+        # One status line, and the body just ends without a terminating chunk
+        assert raw.count(b"HTTP/1.1 ") == 1
+        assert raw.startswith(b"HTTP/1.1 200")
+        assert not raw.endswith(b"0\r\n\r\n")
+
+        monkeypatch.setattr(middleware, "encode_json", encode_json)
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        assert request(conn, "GET", "/health")[0] == 200
+        conn.close()
+
+
+class TestConditionalGet:
+    def test_etag_and_304(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        request(conn, "POST", "/bookmarks",
+                {"url": "https://example.com", "title": "Example", "tags": ["web"]})
+        conn.request("GET", "/tags")
+        resp = conn.getresponse()
+        etag = resp.getheader("ETag")
+        assert json.loads(resp.read()) == {"tags": {"web": 1}}
+        assert resp.getheader("Last-Modified")
+
+        conn.request("GET", "/tags", headers={"If-None-Match": etag})
+        resp = conn.getresponse()
+        assert (resp.status, resp.read()) == (304, b"")
+        assert resp.getheader("ETag") == etag
+
+        # A write moves the revision on: full response, new ETag
+        request(conn, "POST", "/bookmarks",
+                {"url": "https://other.example.com", "title": "Other", "tags": ["web"]})
+        conn.request("GET", "/tags", headers={"If-None-Match": etag})
+        resp = conn.getresponse()
+        assert resp.status == 200
+        assert resp.getheader("ETag") != etag
+        assert json.loads(resp.read()) == {"tags": {"web": 2}}
+        conn.close()
+
+    @pytest.mark.parametrize("path, status", [("/nope", 404), ("/bookmarks/999", 404)])
+    def test_no_304_for_failing_requests(self, server, path, status):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        conn.request("GET", "/health")
+        resp = conn.getresponse()
+        resp.read()
+        conn.request("GET", path, headers={"If-None-Match": resp.getheader("ETag")})
+        resp = conn.getresponse()
+        assert resp.status == status
+        assert json.loads(resp.read())["error"] == "not_found"
+        conn.close()
+
+    def test_repeated_reads_come_from_the_cache(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        request(conn, "POST", "/bookmarks", {"url": "https://example.com", "title": "Example"})
+        _, first = request(conn, "GET", "/bookmarks")
+        calls = []
+        original = BookmarkHandler.service.list_bookmarks
+        BookmarkHandler.service.list_bookmarks = lambda **kw: calls.append(kw) or original(**kw)
+        _, second = request(conn, "GET", "/bookmarks")
+        assert second == first
+        assert calls == []
+        conn.close()
+
+
+class TestConcurrency:
+    def test_parallel_creates_detect_duplicates(self, server):
+        port = server.server_address[1]
+        statuses = []
+
+        def create(i):
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+            status, _ = request(conn, "POST", "/bookmarks",
+                                {"url": "https://same.example.com", "title": f"Copy {i}"})
+            statuses.append(status)
+            conn.close()
+
+        threads = [threading.Thread(target=create, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(statuses) == [201] + [409] * 19
+
+
+class TestBackpressure:
+    def block_worker(self, port):
+        """Occupy a worker with a /stats request until the event is set."""
+        release = threading.Event()
+        stats = BookmarkHandler.service.get_stats
+        BookmarkHandler.service.get_stats = lambda: release.wait(10) and stats()
+        busy = http.client.HTTPConnection("127.0.0.1", port)
+        busy.request("GET", "/stats")
+        time.sleep(0.2)
+        return busy, release
+
+    def test_full_queue_gets_503(self):
+        server = start_server("threaded", workers=1, queue_size=1)
+        port = server.server_address[1]
+        try:
+            busy, release = self.block_worker(port)
+            queued = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            queued.request("GET", "/health")
+            time.sleep(0.2)
+
+            rejected = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            status, body = request(rejected, "GET", "/health")
+            assert status == 503
+            assert body["error"] == "service_unavailable"
+
+            release.set()
+            assert busy.getresponse().status == 200
+            assert queued.getresponse().status == 200
+        finally:
+            release.set()
+            busy.close()
+            queued.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_idle_connections_do_not_hold_workers(self):
+        server = start_server("threaded", workers=1, queue_size=1)
+        port = server.server_address[1]
+        conns = [http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                 for _ in range(10)]
+        try:
+            for _ in range(2):
+                for conn in conns:
+                    assert request(conn, "GET", "/health")[0] == 200
+        finally:
+            for conn in conns:
+                conn.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_close_with_a_full_queue_does_not_hang(self):
+        server = start_server("threaded", workers=1, queue_size=1)
+        port = server.server_address[1]
+        busy, release = self.block_worker(port)
+        queued = socket.create_connection(("127.0.0.1", port))
+        queued.sendall(b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n")
+        time.sleep(0.2)
+        server.shutdown()
+        closer = threading.Thread(target=server.server_close)
+        closer.start()
+        release.set()
+        closer.join(5)
+        assert not closer.is_alive()
+        busy.close()
+        queued.close()
+
+    def test_shutdown_with_open_connections_logs_no_errors(self, caplog):
+        server = start_server("asyncio")
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        assert request(conn, "GET", "/health")[0] == 200
+        time.sleep(0.1)  # the connection task is now waiting for the next request
+        with caplog.at_level(logging.ERROR):
+            server.shutdown()
+            server.server_close()
+        conn.close()
+        assert [r.getMessage() for r in caplog.records if r.levelno >= logging.ERROR] == []
@@ -3,11 +3,13 @@
 import pytest
 import sys
 import os
+import threading
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from service import BookmarkService
-from repository import InMemoryRepository
+from models import Bookmark
+from service import Aggregates, BookmarkService
+from repository import FileRepository, InMemoryRepository
 from errors import NotFoundError, DuplicateError, ValidationError
 
 
@@ -35,6 +37,11 @@ class TestCreateBookmark:
         with pytest.raises(DuplicateError, match="already bookmarked"):
             service.create_bookmark(url="https://example.com", title="Second")
 
+    def test_duplicate_detection_normalizes_url(self, service):
+        service.create_bookmark(url="https://example.com", title="First")
+        with pytest.raises(DuplicateError):
+            service.create_bookmark(url="HTTPS://Example.COM/", title="Second")
+
     def test_ids_increment(self, service):
         b1 = service.create_bookmark(url="https://one.com", title="One")
         b2 = service.create_bookmark(url="https://two.com", title="Two")
@@ -75,6 +82,62 @@ class TestListBookmarks:
         assert result[0].title == "One"
 
 
+class TestPagination:
+    @pytest.fixture
+    def filled(self, service):
+        for i in range(7):
+            service.create_bookmark(url=f"https://s{i}.com", title=f"Title {6 - i}")
+        return service
+
+    def test_pages_cover_everything_once(self, filled):
+        seen, cursor = [], None
+        while True:
+            page, cursor = filled.list_page(sort_by="title", limit=3, cursor=cursor)
+            seen += [b.title for b in page]
+            if cursor is None:
+                break
+        assert seen == [f"Title {i}" for i in range(7)]
+
+    def test_last_full_page_has_no_cursor(self, filled):
+        page, cursor = filled.list_page(limit=7)
+        assert len(page) == 7
+        assert cursor is None
+
+    def test_cursor_survives_deletes(self, filled):
+        page, cursor = filled.list_page(limit=2)
+        filled.delete_bookmark(page[-1].id)
+        page, _ = filled.list_page(limit=2, cursor=cursor)
+        assert [b.id for b in page] == [3, 4]
+
+    def test_cursor_must_match_sort(self, filled):
+        _, cursor = filled.list_page(sort_by="title", limit=2)
+        with pytest.raises(ValidationError, match="does not match"):
+            filled.list_page(sort_by="visits", limit=2, cursor=cursor)
+
+    def test_bad_cursor_and_limit_raise(self, service):
+        with pytest.raises(ValidationError, match="Invalid cursor"):
+            service.list_page(cursor="not-a-cursor")
+        with pytest.raises(ValidationError, match="limit"):
+            service.list_page(limit=0)
+
+    @pytest.mark.parametrize("sort_by, key", [
+        ("visits", "x"), ("created", None), ("visits", True), ("title", 3),
+    ])
+    def test_cursor_key_must_fit_the_sort(self, filled, sort_by, key):
+        cursor = BookmarkService._encode_cursor(sort_by, key, 1)
+        with pytest.raises(ValidationError, match="Invalid cursor") as exc:
+            filled.list_page(sort_by=sort_by, cursor=cursor)
+        assert exc.value.details == {"field": "cursor"}
+
+    def test_projection(self, filled):
+        rows = filled.project(filled.list_page(limit=1)[0], ["id", "tags"])
+        assert rows == [{"id": 1, "tags": []}]
+        with pytest.raises(ValidationError, match="Unknown fields: secret"):
+            filled.project([], ["id", "secret"])
+        with pytest.raises(ValidationError, match="No fields requested"):
+            filled.project([], [])
+
+
 class TestVisitBookmark:
     def test_visit_increments_count(self, service):
         b = service.create_bookmark(url="https://example.com", title="Test")
@@ -114,3 +177,92 @@ class TestStats:
         assert s["active"] == 2
         assert s["archived"] == 1
         assert s["unique_tags"] == 2
+
+
+class TestAggregates:
+    def mixed_history(self, service):
+        a = service.create_bookmark(url="https://a.com/1", title="A1", tags=["x", "y"])
+        b = service.create_bookmark(url="https://a.com/2", title="A2", tags=["y"])
+        c = service.create_bookmark(url="https://c.com", title="C", tags=["z"])
+        service.update_bookmark(a.id, tags=["y", "w"])
+        service.visit_bookmark(b.id)
+        service.visit_bookmark(b.id)
+        service.archive_bookmark(c.id)
+        service.restore_bookmark(c.id)
+        service.archive_bookmark(b.id)
+        service.delete_bookmark(c.id)
+
+    def test_incremental_matches_full_scan(self, service):
+        self.mixed_history(service)
+        assert service.get_all_tags() == {"y": 2, "w": 1}
+        stats = service.get_stats()
+        assert stats == {
+            "total": 2, "active": 1, "archived": 1, "total_visits": 2,
+            "unique_tags": 2, "unique_domains": 1, "top_domains": {"a.com": 2},
+        }
+        rebuilt = Aggregates.from_bookmarks(service._repo.list_all())
+        assert service._aggregates == rebuilt
+
+    def test_reads_do_not_scan(self, service, monkeypatch):
+        service.get_stats()
+        self.mixed_history(service)
+        monkeypatch.setattr(service._repo, "list_all",
+                            lambda: pytest.fail("aggregates were rebuilt"))
+        assert service.get_stats()["total"] == 2
+        assert list(service.get_all_tags()) == ["y", "w"]
+
+    def test_ties_sort_by_name(self, service):
+        for tag in ["b", "c", "a"]:
+            service.create_bookmark(url=f"https://{tag}.com", title=tag, tags=[tag])
+        assert list(service.get_all_tags()) == ["a", "b", "c"]
+
+    def test_outside_writes_trigger_rebuild(self, tmp_path):
+        path = str(tmp_path / "bookmarks.json")
+        service = BookmarkService(FileRepository(path))
+        service.create_bookmark(url="https://one.com", title="One", tags=["a"])
+        assert service.get_all_tags() == {"a": 1}
+        # Another process appends to the same file
+        FileRepository(path).save(Bookmark(id=0, url="https://two.com", title="Two",
+                                           tags=["a"]))
+        service.create_bookmark(url="https://three.com", title="Three", tags=["a"])
+        assert service.get_all_tags() == {"a": 3}
+
+    def test_hand_edits_trigger_rebuild(self, tmp_path):
+        path = tmp_path / "bookmarks.json"
+        service = BookmarkService(FileRepository(str(path)))
+        service.create_bookmark(url="https://one.com", title="One", tags=["a"])
+        assert service.get_all_tags() == {"a": 1}
+        # Edited in place; the stored revision stays the same
+        path.write_text(path.read_text().replace('"a"', '"b"'))
+        assert service.get_all_tags() == {"b": 1}
+
+
+class TestUpdateBookmark:
+    def test_update_fields(self, service):
+        b = service.create_bookmark(url="https://example.com", title="Old")
+        updated = service.update_bookmark(b.id, title="New", tags=["Python"])
+        assert updated.title == "New"
+        assert updated.tags == ["python"]
+        assert updated.updated_at is not None
+
+    def test_invalid_update_leaves_bookmark_unchanged(self, service):
+        b = service.create_bookmark(url="https://example.com", title="Keep")
+        with pytest.raises(ValidationError):
+            service.update_bookmark(b.id, title="")
+        assert service.get_bookmark(b.id).title == "Keep"
+
+
+class TestConcurrency:
+    def test_parallel_visits_are_all_counted(self, service):
+        b = service.create_bookmark(url="https://example.com", title="Test")
+
+        def visit():
+            for _ in range(50):
+                service.visit_bookmark(b.id)
+
+        threads = [threading.Thread(target=visit) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert service.get_bookmark(b.id).visit_count == 400